@@ -0,0 +1,91 @@
+"""
+Plan artifacts - everything needed to re-render a floor plan without the LLM.
+
+plan_output writes a small, versioned JSON document next to each image with
+the request, the room allocation, the layout, the doors and how they were
+generated. `python main.py render` reads artifacts back in bulk and draws
+them again, so colors, format or resolution can change without paying for
+any model calls.
+"""
+
+import glob
+import json
+import os
+import time
+
+
+ARTIFACT_VERSION = 1
+ARTIFACT_SUFFIX = ".plan.json"
+
+
+def artifact_path(output_path: str) -> str:
+    """Artifact file written alongside an image, e.g. 'floor_plan.png' -> 'floor_plan.plan.json'."""
+    return os.path.splitext(output_path)[0] + ARTIFACT_SUFFIX
+
+
+def _dump(value):
+    return value.model_dump() if hasattr(value, "model_dump") else dict(value)
+
+
+def build_artifact(state, metadata: dict | None = None) -> dict:
+    """Collect the request, allocation, layout and doors of a finished run."""
+    return {
+        "version": ARTIFACT_VERSION,
+        "request": state.get("input"),
+        "allocation": {
+            "total_area": state["total_area"],
+            "width": state["width"],
+            "height": state["height"],
+            "rooms": [_dump(room) for room in state["rooms"]],
+        },
+        "layout": _dump(state["plan"]),
+        "doors": _dump(state["door_plan"])["doors"],
+        "metadata": {"created_at": time.time(), **(metadata or {})},
+    }
+
+
+def save_artifact(artifact: dict, path: str) -> str:
+    """Write an artifact as compact JSON and return its path."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(artifact, f, ensure_ascii=False, separators=(",", ":"))
+    return path
+
+
+def load_artifact(path: str) -> dict:
+    """Read an artifact, rejecting files written by a newer format version."""
+    with open(path, encoding="utf-8") as f:
+        artifact = json.load(f)
+    version = artifact.get("version") if isinstance(artifact, dict) else None
+    if not isinstance(version, int) or not {"layout", "doors"} <= artifact.keys():
+        raise ValueError(f"{path} is not a plan artifact")
+    if version > ARTIFACT_VERSION:
+        raise ValueError(f"{path} uses artifact version {version}, newer than supported ({ARTIFACT_VERSION})")
+    return artifact
+
+
+def iter_artifact_paths(paths):
+    """Expand files, directories and glob patterns into artifact paths, one at a time."""
+    for path in paths:
+        if os.path.isdir(path):
+            yield from sorted(glob.glob(os.path.join(path, f"*{ARTIFACT_SUFFIX}")))
+        elif glob.has_magic(path):
+            yield from sorted(glob.glob(path))
+        else:
+            yield path
+
+
+def render_artifact(artifact: dict, image_format: str = "png", renderer: str = "matplotlib",
+                    dpi: float | None = None, colors: dict | None = None) -> bytes:
+    """Render an artifact to image bytes; no LLM is involved.
+
+    renderer="svg" uses the lightweight SVG writer (image_format is then svg),
+    otherwise matplotlib renders png, svg or pdf at the requested dpi.
+    """
+    from utils import render_plan, draw_plan_svg
+
+    if renderer == "svg":
+        return draw_plan_svg(artifact["layout"], artifact["doors"], colors).encode("utf-8")
+    return render_plan(artifact["layout"], artifact["doors"], image_format, dpi=dpi, colors=colors)
@@ -0,0 +1,169 @@
+"""
+Batch mode - run many floor plan requests from a JSONL file.
+
+Each input line is either a JSON string or an object with an "input" field
+and an optional "id". Lines that are not valid requests, and requests
+repeating an earlier id, get an error record and the batch moves on.
+Requests are streamed from disk and executed on a
+bounded worker pool; one result record is appended to the output file as
+soon as each request finishes. With a checkpointing graph, re-running a batch
+resumes failed requests from their last completed node.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED, ALL_COMPLETED
+import hashlib
+import json
+import os
+import re
+import time
+
+from checkpoints import run_or_resume, thread_config
+from events import headless
+
+
+DEFAULT_CONCURRENCY = 4
+MAX_ID_LENGTH = 64
+
+_UNSAFE_ID_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def iter_requests(path: str):
+    """Yield (request_id, input_text, error) from a JSONL file, one line at a time.
+
+    error is None for a valid request; for a malformed line it says what is
+    wrong, input_text is None and request_id falls back to the line number.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield str(line_number), None, f"Invalid JSON on line {line_number}: {e}"
+                continue
+            if isinstance(record, str):
+                yield str(line_number), record, None
+            elif isinstance(record, dict) and isinstance(record.get("input"), str):
+                yield str(record.get("id", line_number)), record["input"], None
+            else:
+                request_id = str(record.get("id", line_number)) if isinstance(record, dict) else str(line_number)
+                yield request_id, None, f"Line {line_number} has no \"input\" string"
+
+
+def safe_request_id(request_id: str) -> str:
+    """A request id usable in file names and run ids.
+
+    Ids that are already safe are kept; anything else becomes a slug plus a
+    hash of the original, so "../x" cannot leave the output directory and
+    two different ids never share a slug.
+    """
+    slug = _UNSAFE_ID_CHARS.sub("-", request_id).strip(".-")[:MAX_ID_LENGTH]
+    if slug == request_id:
+        return slug
+    digest = hashlib.sha256(request_id.encode("utf-8")).hexdigest()[:8]
+    return f"{slug}-{digest}" if slug else f"request-{digest}"
+
+
+def request_thread_id(request_id: str, input_text: str) -> str:
+    """Checkpoint thread of a request; a changed input starts a new thread."""
+    digest = hashlib.sha256(input_text.encode("utf-8")).hexdigest()[:12]
+    return f"batch-{request_id}-{digest}"
+
+
+def run_request(graph, request_id: str, input_text: str, output_dir: str,
+                metrics=None, submitted_at: float | None = None) -> dict:
+    """Run a single request through the graph and build its result record.
+
+    With a MetricsSubscriber the record also holds the run's per-stage metrics.
+    The record keeps the id as given; files, checkpoints and metrics use
+    safe_request_id(request_id).
+    """
+    run_id = safe_request_id(request_id)
+    output_path = os.path.join(output_dir, f"{run_id}.png")
+    started_at = time.time()
+    start = time.perf_counter()
+    thread_id = request_thread_id(run_id, input_text)
+    record = {"id": request_id, "input": input_text, "thread_id": thread_id, "started_at": started_at}
+    if submitted_at is not None:
+        record["queue_s"] = round(start - submitted_at, 3)
+
+    events = headless(run_id)
+    if metrics is not None:
+        events.subscribe(metrics)
+    try:
+        result = run_or_resume(
+            graph,
+            {"input": input_text, "output_path": output_path},
+            thread_config(thread_id, events)
+        )
+        if result.get("rendered_plan") is not None:
+            record["status"] = "ok"
+            record["output_path"] = result.get("output_path", output_path)
+            record["artifact_path"] = result.get("artifact_path")
+        else:
+            record["status"] = "rejected"
+            record["output_path"] = None
+    except Exception as e:
+        record["status"] = "error"
+        record["output_path"] = None
+        record["error"] = f"{type(e).__name__}: {e}"
+
+    record["duration_s"] = round(time.perf_counter() - start, 3)
+    record["finished_at"] = time.time()
+    if metrics is not None:
+        record["stages"] = metrics.run(run_id)
+    return record
+
+
+def error_record(request_id: str, input_text: str | None, error: str) -> dict:
+    """Result record of a request that was not run."""
+    return {"id": request_id, "input": input_text, "status": "error", "output_path": None, "error": error}
+
+
+def run_batch(graph, input_path: str, results_path: str, output_dir: str = "plans",
+              concurrency: int = DEFAULT_CONCURRENCY, metrics=None) -> dict:
+    """Run every request in input_path with at most `concurrency` in flight.
+
+    A MetricsSubscriber passed as `metrics` is attached to every run.
+    Malformed lines and repeated ids are written as error records without
+    running. Returns a dict of status counts.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    counts = {"ok": 0, "rejected": 0, "error": 0}
+
+    with open(results_path, "a", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+        pending = set()
+        seen = set()
+
+        def write(record):
+            counts[record["status"]] += 1
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+
+        def drain(return_when):
+            nonlocal pending
+            done, pending = wait(pending, return_when=return_when)
+            for future in done:
+                write(future.result())
+
+        for request_id, input_text, error in iter_requests(input_path):
+            if error is None and safe_request_id(request_id) in seen:
+                error = f"Duplicate request id '{request_id}'"
+            if error is not None:
+                write(error_record(request_id, input_text, error))
+                continue
+            seen.add(safe_request_id(request_id))
+            # Only read the next line once a worker slot is free
+            if len(pending) >= concurrency:
+                drain(FIRST_COMPLETED)
+            pending.add(pool.submit(
+                run_request, graph, request_id, input_text, output_dir, metrics, time.perf_counter()
+            ))
+
+        if pending:
+            drain(ALL_COMPLETED)
+
+    return counts
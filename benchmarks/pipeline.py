@@ -0,0 +1,299 @@
+"""
+Offline pipeline benchmark.
+
+Runs the whole workflow with a deterministic fake chat model swapped in for
+create_llm(), so only the pipeline's own overhead is measured: graph
+dispatch, prompt formatting, pydantic parsing, validation, rendering
+(draw_plan/savefig or the SVG writer), file output and optionally the
+terminal UI. The canned FloorPlan, LayoutPlan and DoorPlan answers are
+generated locally for houses of any size, from 5 to 500 rooms. No network
+access is needed, and results are written as JSON that can be compared
+between commits.
+
+Usage:
+    python benchmarks/pipeline.py [--sizes 5 50 500] [--runs 5] [--warmup 1]
+                                  [--renderer matplotlib|svg] [--latency-ms 0] [--ui]
+                                  [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from doors import plan_doors  # noqa: E402
+from events import EventBus  # noqa: E402
+from layout import plan_layout  # noqa: E402
+from metrics import MetricsSubscriber  # noqa: E402
+from models import FloorPlan, LayoutPlan, DoorPlan, Room  # noqa: E402
+
+
+DEFAULT_SIZES = (5, 20, 50, 100, 500)
+BATHROOM_AREA = 6.0        # m² of the smallest room; every other room is a multiple of it
+ROOM_WEIGHTS = {"Living Room": 6.0, "Kitchen": 3.0, "Hallway": 3.0, "Bedroom": 2.5, "Bathroom": 1.0, "Storage": 1.5}
+ROOMS_PER_WING = 10        # validate_floor_plan allows at most 10 rooms of one type
+
+# Pipeline settings, so that runs are comparable and every stage executes
+BENCHMARK_ENV = {
+    "LLM_CACHE": "0",
+    "ROOM_PLANNER": "llm",
+    "DOOR_PLANNER": "llm",
+    "LAYOUT_CANDIDATES": "1",
+    "LAYOUT_REPAIR_ATTEMPTS": "0",
+    "REJECT_INVALID_PLANS": "0",
+    "ALLOCATION_LLM_CHECK": "0",
+}
+
+
+class FakeChatModel:
+    """Deterministic stand-in for a chat model.
+
+    Structured calls return the canned answer for the requested schema,
+    parsed from JSON on every call like a real structured output. Plain
+    calls answer the validation prompts. An optional latency simulates the
+    provider round trip.
+    """
+
+    def __init__(self, answers: dict, latency: float = 0.0, schema=None):
+        self._answers = answers
+        self._latency = latency
+        self._schema = schema
+
+    def with_structured_output(self, schema):
+        return FakeChatModel(self._answers, self._latency, schema)
+
+    def with_temperature(self, temperature):
+        return self
+
+    def _answer(self, prompt):
+        if self._schema is not None:
+            return self._schema.model_validate_json(self._answers[self._schema.__name__])
+        from langchain_core.messages import AIMessage
+        return AIMessage(content="REASONABLE" if "REASONABLE" in str(prompt) else "VALID")
+
+    def invoke(self, prompt, *args, **kwargs):
+        if self._latency:
+            time.sleep(self._latency)
+        return self._answer(prompt)
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        return self._answer(prompt)
+
+
+def _wing(index: int) -> str:
+    """Spreadsheet-style wing label: 0 -> '', 1 -> 'Wing A ', 27 -> 'Wing AA '."""
+    if index == 0:
+        return ""
+    label = ""
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        label = chr(ord("A") + remainder) + label
+    return f"Wing {label} "
+
+
+def _numbered(base: str, number: int) -> str:
+    wing, n = divmod(number - 1, ROOMS_PER_WING)
+    return f"{base} {_wing(wing)}{n + 1}"
+
+
+def make_allocation(room_count: int) -> FloorPlan:
+    """Canned allocation with room_count rooms: day rooms, a hallway and bedroom/bathroom pairs."""
+    if room_count < 3:
+        raise ValueError("a benchmark house needs at least 3 rooms")
+    rooms = [("Living Room", "Living Room"), ("Kitchen", "Kitchen"), ("Hallway", "Hallway")]
+    pairs, extra = divmod(room_count - len(rooms), 2)
+    for number in range(1, pairs + 1):
+        rooms += [(_numbered("Bedroom", number), "Bedroom"), (_numbered("Bathroom", number), "Bathroom")]
+    if extra:
+        rooms.append(("Storage", "Storage"))
+
+    names = [name for name, _ in rooms]
+    weights = [ROOM_WEIGHTS[base] for _, base in rooms]
+    area = sum(weights) * BATHROOM_AREA
+    width = math.ceil(math.sqrt(area))
+    height = math.ceil(area / width)
+    total_area = width * height
+    scale = total_area / sum(weights)
+    rooms = [
+        Room(name=name, proportion=round(weight * scale / total_area, 4), area=round(weight * scale, 2))
+        for name, weight in zip(names, weights)
+    ]
+    return FloorPlan(total_area=total_area, width=width, height=height, rooms=rooms)
+
+
+def make_answers(room_count: int) -> dict:
+    """JSON answers of the fake model for each structured output schema."""
+    allocation = make_allocation(room_count)
+    layout = plan_layout(allocation.width, allocation.height, allocation.rooms)
+    return {
+        FloorPlan.__name__: allocation.model_dump_json(),
+        LayoutPlan.__name__: layout.model_dump_json(),
+        DoorPlan.__name__: plan_doors(layout).model_dump_json(),
+    }
+
+
+def _silence_ui():
+    """Keep the terminal UI in the measurement while sending its output nowhere."""
+    from rich.console import Console
+    import niceterminalui
+    niceterminalui.console = Console(file=open(os.devnull, "w", encoding="utf-8"), force_terminal=True)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _summary(samples: list) -> dict:
+    return {
+        "median": round(statistics.median(samples), 3),
+        "min": round(min(samples), 3),
+        "max": round(max(samples), 3),
+    }
+
+
+def bench_size(app, room_count: int, runs: int, warmup: int, latency: float, ui: bool, output_dir: str) -> dict:
+    """Run the workflow `warmup + runs` times for one house size and summarise the measured runs."""
+    from events import ConsoleSubscriber
+
+    fake = FakeChatModel(make_answers(room_count), latency)
+    app.create_llm = lambda *args, **kwargs: fake
+    app.get_shared_llm.cache_clear()
+    app.get_stage_llm.cache_clear()
+    request = f"House {make_allocation(room_count).total_area:g}m² benchmark"
+
+    start = time.perf_counter()
+    graph = app.build_graph()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    metrics = MetricsSubscriber()
+    end_to_end, stages, result = [], {}, {}
+    for i in range(warmup + runs):
+        events = EventBus([ConsoleSubscriber(), metrics] if ui else [metrics])
+        output_path = os.path.join(output_dir, f"plan_{room_count}_{i}.png")
+        start = time.perf_counter()
+        result = graph.invoke(
+            {"input": request, "output_path": output_path},
+            config={"configurable": {"events": events}}
+        )
+        elapsed = (time.perf_counter() - start) * 1000
+        if i < warmup:
+            continue
+        end_to_end.append(elapsed)
+        for stage, values in metrics.run(events.run_id).items():
+            stages.setdefault(stage, []).append(values["wall_s"] * 1000)
+
+    layout_report, plan_report = result.get("layout_report"), result.get("plan_report")
+    return {
+        "rooms": room_count,
+        "runs": runs,
+        "build_graph_ms": round(build_ms, 3),
+        "end_to_end_ms": _summary(end_to_end),
+        "throughput_per_s": round(len(end_to_end) / (sum(end_to_end) / 1000), 3),
+        "stages_ms": {stage: _summary(samples) for stage, samples in stages.items()},
+        "rendered": result.get("rendered_plan") is not None,
+        "layout_valid": layout_report.valid if layout_report is not None else None,
+        "plan_valid": plan_report.valid if plan_report is not None else None,
+    }
+
+
+def run_benchmark(sizes, runs: int, warmup: int, renderer: str, latency: float, ui: bool) -> dict:
+    os.environ.update(BENCHMARK_ENV, PLAN_RENDERER=renderer)
+    import main as app
+    if ui:
+        _silence_ui()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for room_count in sizes:
+            results[str(room_count)] = bench_size(app, room_count, runs, warmup, latency, ui, output_dir)
+    return {
+        "meta": {
+            "timestamp": time.time(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "renderer": renderer,
+            "latency_ms": latency * 1000,
+            "ui": ui,
+            "runs": runs,
+            "warmup": warmup,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict) -> list:
+    """Median end-to-end and per-stage timings of current vs baseline, as printable lines."""
+    lines = []
+    for size, result in current["results"].items():
+        before = baseline.get("results", {}).get(size)
+        if before is None:
+            continue
+        rows = [("end_to_end", before["end_to_end_ms"], result["end_to_end_ms"])]
+        rows += [
+            (stage, before["stages_ms"][stage], timings)
+            for stage, timings in result["stages_ms"].items() if stage in before["stages_ms"]
+        ]
+        lines.append(f"{size} rooms")
+        for name, old, new in rows:
+            change = (new["median"] - old["median"]) / old["median"] if old["median"] else 0.0
+            lines.append(f"  {name:<20} {old['median']:>10.2f} ms -> {new['median']:>10.2f} ms  {change:+.1%}")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the WhitePrint AI pipeline offline with a fake LLM")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Room counts to benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Measured runs per size")
+    parser.add_argument("--warmup", type=int, default=1, help="Unmeasured runs per size")
+    parser.add_argument("--renderer", default="matplotlib", choices=("matplotlib", "svg"))
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated latency of each fake LLM call")
+    parser.add_argument("--ui", action="store_true", help="Include the Rich terminal UI (output discarded)")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    parser.add_argument("--compare", help="Baseline JSON results to compare against")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.sizes, args.runs, args.warmup, args.renderer, args.latency_ms / 1000, args.ui)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    print(f"Pipeline benchmark ({args.runs} runs, renderer={args.renderer}, fake LLM latency {args.latency_ms:g} ms)")
+    print(f"  {'rooms':>6}  {'median':>10}  {'runs/s':>8}  slowest stage")
+    for size, result in results["results"].items():
+        stages = result["stages_ms"]
+        slowest = "-"
+        if stages:
+            name = max(stages, key=lambda stage: stages[stage]["median"])
+            slowest = f"{name} ({stages[name]['median']:.1f} ms)"
+        print(f"  {size:>6}  {result['end_to_end_ms']['median']:>8.1f}ms  {result['throughput_per_s']:>8.2f}  {slowest}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print()
+        print(f"Compared with {args.compare} (commit {baseline.get('meta', {}).get('commit')})")
+        for line in compare(baseline, results):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Prompt size benchmark.
+
+Formats the room planner and door planner prompts for a sample allocation
+twice: with the payloads interpolated as pydantic reprs (the old format) and
+with the compact CSV tables from prompt_format. Reports characters and
+estimated tokens for each, so regressions in prompt size show up
+immediately. No LLM is called.
+
+Usage:
+    python benchmarks/prompt_tokens.py [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from layout import plan_layout  # noqa: E402
+from models import Room  # noqa: E402
+from prompt_format import rooms_table, layout_table, estimate_tokens, format_number  # noqa: E402
+from prompts import ROOM_PLANNER_TEMPLATE, DOOR_PLANNER_TEMPLATE  # noqa: E402
+
+
+WIDTH, HEIGHT = 28, 25
+SAMPLE_ROOMS = [
+    Room(name="Living Room", proportion=0.24, area=168.0),
+    Room(name="Kitchen", proportion=0.12, area=84.0),
+    Room(name="Hallway", proportion=0.1, area=70.0),
+    Room(name="Bedroom 1", proportion=0.15, area=105.0),
+    Room(name="Bathroom 1", proportion=0.06, area=42.0),
+    Room(name="Bedroom 2", proportion=0.15, area=105.0),
+    Room(name="Bathroom 2", proportion=0.06, area=42.0),
+    Room(name="Bathroom 3", proportion=0.05, area=35.0),
+    Room(name="Storage", proportion=0.07, area=49.0),
+]
+
+
+def prompt_sizes() -> dict:
+    """Characters and estimated tokens of each prompt, before and after compaction."""
+    total_area = WIDTH * HEIGHT
+    layout = plan_layout(WIDTH, HEIGHT, SAMPLE_ROOMS)
+
+    prompts = {
+        "room_planner": (
+            ROOM_PLANNER_TEMPLATE.format(width=WIDTH, height=HEIGHT, total_area=float(total_area), rooms=SAMPLE_ROOMS),
+            ROOM_PLANNER_TEMPLATE.format(
+                width=WIDTH, height=HEIGHT, total_area=format_number(total_area), rooms=rooms_table(SAMPLE_ROOMS)
+            ),
+        ),
+        "door_planner": (
+            DOOR_PLANNER_TEMPLATE.format(width=WIDTH, height=HEIGHT, plan=layout),
+            DOOR_PLANNER_TEMPLATE.format(width=WIDTH, height=HEIGHT, plan=layout_table(layout)),
+        ),
+    }
+    sizes = {}
+    for name, (before, after) in prompts.items():
+        sizes[name] = {
+            "before_chars": len(before),
+            "after_chars": len(after),
+            "before_tokens": estimate_tokens(before),
+            "after_tokens": estimate_tokens(after),
+        }
+        sizes[name]["saved"] = round(1 - sizes[name]["after_tokens"] / sizes[name]["before_tokens"], 3)
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare prompt sizes before and after compact serialization")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    sizes = prompt_sizes()
+    if args.json:
+        print(json.dumps(sizes, indent=2))
+        return
+
+    print(f"Estimated prompt tokens ({len(SAMPLE_ROOMS)} rooms, {WIDTH}x{HEIGHT}m)")
+    print(f"  {'prompt':<14} {'before':>8} {'after':>8}  saved")
+    for name, row in sizes.items():
+        print(f"  {name:<14} {row['before_tokens']:>8} {row['after_tokens']:>8}  {row['saved']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
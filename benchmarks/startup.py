@@ -0,0 +1,109 @@
+"""
+Startup benchmark.
+
+Times cold starts in fresh interpreters: the bare interpreter, `import main`
+and building the workflow graph. It then breaks `import main` down by module
+with `python -X importtime`, so slow imports that creep back into the
+startup path show up immediately.
+
+Usage:
+    python benchmarks/startup.py [--runs 5] [--top 15] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "interpreter": "pass",
+    "import main": "import main",
+    "build graph": "import main; main.build_graph()",
+}
+
+
+def _python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+
+def time_cold_start(code: str, runs: int) -> dict:
+    """Wall-clock time of running `code` in a fresh interpreter, in ms."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        _python(code)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 1),
+        "min_ms": round(min(samples), 1),
+        "max_ms": round(max(samples), 1),
+    }
+
+
+def import_breakdown(module: str = "main") -> list:
+    """Per-module import cost of `import module` from -X importtime.
+
+    Only the modules imported on behalf of `module` are kept, not the ones
+    the interpreter loads at startup (site, encodings, ...).
+
+    Returns:
+        list: {"module", "depth", "self_ms", "cumulative_ms"} dicts, slowest first
+    """
+    stderr = _python(f"import {module}", "-X", "importtime").stderr
+    block = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        row = {
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        }
+        # importtime lists children before their parent: a top-level row closes a block
+        if row["depth"] == 0:
+            if row["module"] == module:
+                return sorted(block + [row], key=lambda r: r["cumulative_ms"], reverse=True)
+            block = []
+        else:
+            block.append(row)
+    return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure WhitePrint AI startup time")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts per scenario")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    timings = {name: time_cold_start(code, args.runs) for name, code in SCENARIOS.items()}
+    imports = [row for row in import_breakdown() if row["module"] != "main"][:args.top]
+
+    if args.json:
+        print(json.dumps({"cold_start": timings, "imports": imports}, indent=2))
+        return
+
+    print(f"Cold start ({args.runs} runs)")
+    for name, stats in timings.items():
+        print(f"  {name:<14} {stats['median_ms']:>8.1f} ms  (min {stats['min_ms']:.1f}, max {stats['max_ms']:.1f})")
+    print()
+    print("Slowest imports under 'import main'")
+    print(f"  {'cumulative':>10}  {'self':>8}  module")
+    for row in imports:
+        indent = "  " * row["depth"]
+        print(f"  {row['cumulative_ms']:>8.1f}ms  {row['self_ms']:>6.1f}ms  {indent}{row['module']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Layout validation benchmark.
+
+Times validate_layout on two kinds of layouts of growing size: a grid of
+bedroom/bathroom pairs (every pair checked for a shared wall) and the
+algorithmic three-row layout of benchmarks/pipeline.py's allocations. The
+best of several repeats is compared with the sub-millisecond target, which
+holds up to 200 rooms; larger layouts are timed for reference (about
+3-5 us per room, so 500 rooms take roughly 1.5-2.5 ms). No LLM is called.
+
+Usage:
+    python benchmarks/validation.py [--sizes 100 200 500 1001] [--repeats 7] [--json] [--check]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from layout import plan_layout  # noqa: E402
+from models import LayoutPlan, RoomLayout  # noqa: E402
+from pipeline import make_allocation  # noqa: E402
+from validators import validate_layout  # noqa: E402
+
+
+DEFAULT_SIZES = (100, 200, 500, 1001)
+TARGET_MS = 1.0            # per validate_layout call
+TARGET_MAX_ROOMS = 200     # sizes the target applies to
+GRID_CELL = 4.0            # m, side of a grid room
+CALLS_PER_REPEAT = 20
+
+
+def make_grid(room_count: int) -> LayoutPlan:
+    """Square grid of alternating 'Bedroom N' / 'Bathroom N' rooms, each pair side by side."""
+    columns = math.ceil(math.sqrt(room_count))
+    columns += columns % 2
+    rooms = []
+    for i in range(room_count):
+        row, column = divmod(i, columns)
+        pair, side = divmod(i, 2)
+        rooms.append(RoomLayout(
+            name=f"{'Bathroom' if side else 'Bedroom'} {pair + 1}",
+            area=GRID_CELL * GRID_CELL,
+            x=column * GRID_CELL, y=row * GRID_CELL,
+            width=GRID_CELL, height=GRID_CELL,
+        ))
+    rows = math.ceil(room_count / columns)
+    return LayoutPlan(width=int(columns * GRID_CELL), height=int(rows * GRID_CELL), rooms=rooms)
+
+
+def make_algorithmic(room_count: int) -> LayoutPlan:
+    allocation = make_allocation(room_count)
+    return plan_layout(allocation.width, allocation.height, allocation.rooms)
+
+
+def time_validation(layout: LayoutPlan, repeats: int) -> float:
+    """Best per-call time of validate_layout in milliseconds."""
+    validate_layout(layout)
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(CALLS_PER_REPEAT):
+            validate_layout(layout)
+        best = min(best, (time.perf_counter() - start) / CALLS_PER_REPEAT)
+    return best * 1000
+
+
+def run_benchmark(sizes, repeats: int) -> dict:
+    results = {}
+    for kind, make in (("grid", make_grid), ("algorithmic", make_algorithmic)):
+        for size in sizes:
+            layout = make(size)
+            ms = time_validation(layout, repeats)
+            results.setdefault(kind, {})[str(size)] = {
+                "rooms": len(layout.rooms),
+                "validate_layout_ms": round(ms, 3),
+                "within_target": ms <= TARGET_MS if size <= TARGET_MAX_ROOMS else None,
+            }
+    return {"target_ms": TARGET_MS, "target_max_rooms": TARGET_MAX_ROOMS, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark validate_layout on large layouts")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Room counts to benchmark")
+    parser.add_argument("--repeats", type=int, default=7, help="Timed repeats per size (the best is kept)")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    parser.add_argument("--check", action="store_true", help="Exit with status 1 if a size misses the target")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.sizes, args.repeats)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"validate_layout (best of {args.repeats}, target {TARGET_MS:g} ms up to {TARGET_MAX_ROOMS} rooms)")
+        for kind, sizes in results["results"].items():
+            for size, result in sizes.items():
+                verdict = {True: "ok", False: "SLOW", None: "-"}[result["within_target"]]
+                print(f"  {kind:<12} {result['rooms']:>6} rooms  {result['validate_layout_ms']:>8.3f} ms  {verdict}")
+
+    missed = [
+        result for sizes in results["results"].values() for result in sizes.values()
+        if result["within_target"] is False
+    ]
+    if args.check and missed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
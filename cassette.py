@@ -0,0 +1,189 @@
+"""
+Record/replay cassettes for LLM calls.
+
+In record mode every prompt sent by the workflow is stored together with
+its response (structured FloorPlan/LayoutPlan/DoorPlan objects or plain
+validator verdicts) in an append-only JSONL cassette. In replay mode the
+responses are served from the cassette without building a chat model, so
+a recorded run can be reproduced, profiled or load-tested offline and
+deterministically, with optional simulated latency.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+
+from llm_cache import schema_digest
+
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode for a prompt that was never recorded."""
+
+
+def make_cassette_key(prompt: str, schema=None, temperature: float | None = None) -> str:
+    """Key a recording by the formatted prompt, the structured output schema definition and the temperature."""
+    payload = json.dumps(
+        {"prompt": prompt, "schema": schema_digest(schema), "temperature": temperature},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """An append-only JSONL file of prompt/response recordings, safe to share between threads.
+
+    Repeated prompts are replayed in the order they were recorded; once
+    their recordings run out, the last one is served again. `latency` is a
+    delay in seconds per replayed call, or "recorded" to reproduce the
+    original call durations.
+    """
+
+    def __init__(self, path: str, mode: str = REPLAY, latency: float | str = 0.0):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode {mode!r} (expected {RECORD!r} or {REPLAY!r})")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._recordings = {}
+        self._played = {}
+
+        if mode == REPLAY:
+            self._load()
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """Create the cassette configured by LLM_CASSETTE* environment variables, or None if unset."""
+        path = os.getenv("LLM_CASSETTE")
+        if not path:
+            return None
+        latency = os.getenv("LLM_CASSETTE_LATENCY", "0")
+        return cls(
+            path,
+            mode=os.getenv("LLM_CASSETTE_MODE", REPLAY).lower(),
+            latency=latency if latency == "recorded" else float(latency),
+        )
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._recordings.setdefault(entry["key"], []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._recordings.values())
+
+    def record(self, prompt: str, schema, response: str, duration: float, temperature: float | None = None):
+        """Append one recording and flush it to disk."""
+        key = make_cassette_key(prompt, schema, temperature)
+        entry = {
+            "key": key,
+            "schema": schema.__name__ if schema is not None else None,
+            "temperature": temperature,
+            "prompt": prompt,
+            "response": response,
+            "duration": round(duration, 3),
+            "recorded_at": time.time(),
+        }
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._recordings.setdefault(key, []).append(entry)
+
+    def play(self, prompt: str, schema, temperature: float | None = None) -> tuple:
+        """Return (response, delay in seconds) for the next recording of this prompt."""
+        key = make_cassette_key(prompt, schema, temperature)
+        with self._lock:
+            entries = self._recordings.get(key)
+            if not entries:
+                name = schema.__name__ if schema is not None else "text"
+                raise CassetteMiss(f"No {name} response recorded in {self.path} for prompt {key[:12]}")
+            index = self._played.get(key, 0)
+            self._played[key] = index + 1
+        entry = entries[min(index, len(entries) - 1)]
+        delay = entry.get("duration", 0.0) if self.latency == "recorded" else self.latency
+        return entry["response"], delay
+
+
+class CassetteChatModel:
+    """Wrap a chat model so invoke() and structured invoke() are recorded to, or replayed from, a Cassette.
+
+    In replay mode no model is needed and none is called.
+    """
+
+    def __init__(self, model, cassette: Cassette, schema=None, temperature: float | None = None):
+        self._model = model
+        self._cassette = cassette
+        self._schema = schema
+        self._temperature = temperature
+        if model is not None and schema is not None:
+            self._runnable = model.with_structured_output(schema)
+        else:
+            self._runnable = model
+
+    def with_structured_output(self, schema):
+        return CassetteChatModel(self._model, self._cassette, schema=schema, temperature=self._temperature)
+
+    def with_temperature(self, temperature: float):
+        model = self._model.with_temperature(temperature) if self._model is not None else None
+        return CassetteChatModel(model, self._cassette, schema=self._schema, temperature=temperature)
+
+    def _encode(self, result) -> str:
+        if self._schema is not None:
+            return result.model_dump_json()
+        return json.dumps({"content": result.content})
+
+    def _decode(self, value: str):
+        if self._schema is not None:
+            return self._schema.model_validate_json(value)
+        from langchain_core.messages import AIMessage
+        return AIMessage(content=json.loads(value)["content"])
+
+    def _record(self, prompt, result, duration: float):
+        self._cassette.record(str(prompt), self._schema, self._encode(result), duration, self._temperature)
+
+    def invoke(self, prompt, *args, **kwargs):
+        if self._cassette.mode == REPLAY:
+            value, delay = self._cassette.play(str(prompt), self._schema, self._temperature)
+            if delay:
+                time.sleep(delay)
+            return self._decode(value)
+
+        start = time.perf_counter()
+        result = self._runnable.invoke(prompt, *args, **kwargs)
+        if result is not None:
+            self._record(prompt, result, time.perf_counter() - start)
+        return result
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        if self._cassette.mode == REPLAY:
+            value, delay = self._cassette.play(str(prompt), self._schema, self._temperature)
+            if delay:
+                await asyncio.sleep(delay)
+            return self._decode(value)
+
+        start = time.perf_counter()
+        result = await self._runnable.ainvoke(prompt, *args, **kwargs)
+        if result is not None:
+            # The append blocks on file I/O, so it runs off the event loop
+            await asyncio.to_thread(self._record, prompt, result, time.perf_counter() - start)
+        return result
+
+    def __getattr__(self, name):
+        model = self.__dict__.get("_model")
+        if model is None:
+            raise AttributeError(name)
+        return getattr(model, name)
@@ -0,0 +1,100 @@
+"""
+Node-level checkpoints for the workflow.
+
+When the graph is compiled with a checkpointer, LangGraph saves the state
+after every node under the run's thread id. A run that fails or is
+interrupted - in door_planner or rendering, say - resumes from the last
+completed node, so the allocation and layout that were already paid for are
+not requested from the LLM again. Checkpoints live in a local SQLite file;
+the thread of a run that reaches the end is deleted, so only failed or
+interrupted runs are kept.
+"""
+
+import os
+import sqlite3
+
+
+DEFAULT_CHECKPOINT_PATH = os.path.join(".whiteprint_cache", "checkpoints.sqlite")
+
+
+def _model_types() -> list:
+    """The pydantic models of the workflow state (FloorPlan, LayoutPlan, ...)."""
+    from pydantic import BaseModel
+    import models
+
+    return [
+        value for value in vars(models).values()
+        if isinstance(value, type) and issubclass(value, BaseModel) and value.__module__ == models.__name__
+    ]
+
+
+def checkpoint_serde():
+    """Checkpoint serializer with the workflow models registered for msgpack.
+
+    Registered types are restored without the "unregistered type" warning,
+    and nothing outside the models and LangGraph's safe types is revived.
+    """
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+    try:
+        return JsonPlusSerializer(allowed_msgpack_modules=_model_types())
+    except TypeError:
+        # Releases without an allowlist restore every type silently
+        return JsonPlusSerializer()
+
+
+def open_checkpointer(path: str = DEFAULT_CHECKPOINT_PATH):
+    """Create a SQLite checkpointer that can be shared between threads."""
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return SqliteSaver(sqlite3.connect(path, check_same_thread=False), serde=checkpoint_serde())
+
+
+def checkpointer_from_env():
+    """Create the checkpointer configured by CHECKPOINT_* environment variables, or None if disabled."""
+    if os.getenv("CHECKPOINTS", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    return open_checkpointer(os.getenv("CHECKPOINT_PATH", DEFAULT_CHECKPOINT_PATH))
+
+
+def thread_config(thread_id: str, events=None) -> dict:
+    """Run config selecting a checkpoint thread, optionally with an EventBus."""
+    configurable = {"thread_id": thread_id}
+    if events is not None:
+        configurable["events"] = events
+    return {"configurable": configurable}
+
+
+def is_resumable(graph, config: dict) -> bool:
+    """Whether the config's thread holds a run that stopped before reaching the end."""
+    if graph.checkpointer is None:
+        return False
+    return bool(graph.get_state(config).next)
+
+
+def discard_finished(graph, config: dict) -> None:
+    """Delete the config's thread unless it holds a run that can be resumed."""
+    if graph.checkpointer is not None and not is_resumable(graph, config):
+        graph.checkpointer.delete_thread(config["configurable"]["thread_id"])
+
+
+def run_or_resume(graph, state: dict, config: dict) -> dict:
+    """Resume the thread's unfinished run, or start a new run with `state`.
+
+    A thread whose previous run finished is cleared first, so no value of
+    the old run leaks into the new one, and again once this run finishes.
+    A run that raises keeps its checkpoints for the next attempt. Without a
+    checkpointer this is a plain graph.invoke().
+    """
+    if graph.checkpointer is None:
+        return graph.invoke(state, config=config)
+    if is_resumable(graph, config):
+        result = graph.invoke(None, config=config)
+    else:
+        graph.checkpointer.delete_thread(config["configurable"]["thread_id"])
+        result = graph.invoke(state, config=config)
+    discard_finished(graph, config)
+    return result
@@ -0,0 +1,142 @@
+"""
+Deterministic door placement from room geometry.
+
+Implements the connection rules of DOOR_PLANNER_TEMPLATE without an LLM:
+doors are only placed on walls shared by the two rooms they connect,
+ensuite bathrooms open only onto their bedroom, guest bathrooms onto a
+hallway, and the Living Room gets the front door. Any room still
+unreachable from the Living Room is connected through its best neighbour.
+"""
+
+import heapq
+
+from geometry import Wall, shared_walls, exterior_walls
+from models import LayoutPlan, DoorLayout, DoorPlan
+from validators import OUTSIDE, room_type, ensuite_pairs
+
+
+DOOR_LENGTH = 0.9     # m along the wall
+DOOR_DEPTH = 0.3      # m across the wall
+
+# Cost of connecting a room through a neighbour when no rule requires the door
+PREFERRED_COST = 1    # via a hallway
+FALLBACK_COST = 2     # via any other allowed room
+
+
+def door_on_wall(from_room: str, to_room: str, wall: Wall) -> DoorLayout:
+    """Centre a door on a wall, shrinking it if the wall is shorter than a door."""
+    length = min(DOOR_LENGTH, wall.length)
+    start = wall.midpoint - length / 2
+    if wall.orientation == "vertical":
+        return DoorLayout(
+            from_room=from_room, to_room=to_room,
+            x=wall.position - DOOR_DEPTH / 2, y=start,
+            width=DOOR_DEPTH, height=length,
+            orientation="vertical",
+        )
+    return DoorLayout(
+        from_room=from_room, to_room=to_room,
+        x=start, y=wall.position - DOOR_DEPTH / 2,
+        width=length, height=DOOR_DEPTH,
+        orientation="horizontal",
+    )
+
+
+def _entrance_room(rooms) -> int:
+    for i, room in enumerate(rooms):
+        if room_type(room.name) == "Living Room":
+            return i
+    # No living room: enter through the largest room
+    return max(range(len(rooms)), key=lambda i: rooms[i].width * rooms[i].height)
+
+
+def plan_doors(layout: LayoutPlan) -> DoorPlan:
+    """Place doors for a room layout following the door planner rules."""
+    rooms = layout.rooms
+    if not rooms:
+        return DoorPlan(doors=[])
+
+    walls = shared_walls(rooms)
+    adjacency = {i: {} for i in range(len(rooms))}
+    for (i, j), wall in walls.items():
+        adjacency[i][j] = wall
+        adjacency[j][i] = wall
+
+    types = [room_type(room.name) for room in rooms]
+    ensuites = ensuite_pairs(rooms)
+    guest_baths = {i for i, t in enumerate(types) if t == "Bathroom" and i not in ensuites}
+
+    doors = []
+    connected = set()
+
+    def connect(i, j):
+        pair = (i, j) if i < j else (j, i)
+        if pair in connected:
+            return
+        connected.add(pair)
+        doors.append(door_on_wall(rooms[i].name, rooms[j].name, adjacency[i][j]))
+
+    # Front door, on the first exterior wall long enough for it (front wall preferred)
+    entrance = _entrance_room(rooms)
+    outside_walls = exterior_walls(rooms[entrance], layout.width, layout.height)
+    if outside_walls:
+        wall = next((w for w in outside_walls if w.length >= DOOR_LENGTH), None)
+        doors.append(door_on_wall(
+            rooms[entrance].name, OUTSIDE, wall or max(outside_walls, key=lambda w: w.length)
+        ))
+
+    # Doors required by the template
+    for i, neighbours in adjacency.items():
+        for j in neighbours:
+            if i > j:
+                continue
+            a, b = types[i], types[j]
+            if ensuites.get(i) == j or ensuites.get(j) == i:
+                connect(i, j)
+            elif i in ensuites or j in ensuites:
+                continue
+            elif {a, b} == {"Living Room", "Kitchen"} or {a, b} == {"Living Room", "Hallway"}:
+                connect(i, j)
+            elif "Hallway" in (a, b) and not {a, b} & {"Kitchen", "Bathroom"}:
+                connect(i, j)
+            elif "Hallway" in (a, b) and (i in guest_baths or j in guest_baths):
+                connect(i, j)
+
+    # Make every room reachable from the entrance: grow the reachable set
+    # Prim-style, always taking existing doors (cost 0) before new ones
+    door_graph = {i: set() for i in range(len(rooms))}
+    for i, j in connected:
+        door_graph[i].add(j)
+        door_graph[j].add(i)
+
+    def connection_cost(via, room):
+        """Cost of opening `room` through the already reachable room `via`, or None if not allowed."""
+        if types[via] == "Bathroom":
+            return None  # never pass through a bathroom
+        if room in ensuites:
+            return FALLBACK_COST if ensuites[room] == via else None
+        if room in guest_baths and types[via] == "Bedroom":
+            return None
+        return PREFERRED_COST if types[via] == "Hallway" else FALLBACK_COST
+
+    reached = set()
+    queue = [(0, entrance, -1)]
+    while queue:
+        cost, room, via = heapq.heappop(queue)
+        if room in reached:
+            continue
+        reached.add(room)
+        if via >= 0:
+            connect(via, room)
+        if types[room] == "Bathroom" and room != entrance:
+            continue  # never pass through a bathroom, like validate_doors
+        for neighbour in door_graph[room]:
+            if neighbour not in reached:
+                heapq.heappush(queue, (0, neighbour, -1))
+        for neighbour in adjacency[room]:
+            if neighbour not in reached and neighbour not in door_graph[room]:
+                extra = connection_cost(room, neighbour)
+                if extra is not None:
+                    heapq.heappush(queue, (extra, neighbour, room))
+
+    return DoorPlan(doors=doors)
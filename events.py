@@ -0,0 +1,210 @@
+"""
+Workflow events - a small publish/subscribe interface for pipeline progress.
+
+Graph nodes never write to the terminal directly. They emit events on the
+EventBus passed in the run config (``config["configurable"]["events"]``) and
+subscribers decide what to do with them: the ConsoleSubscriber renders the
+Rich terminal UI, while a bus without subscribers makes a run headless at
+practically zero cost.
+"""
+
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+import threading
+import time
+import uuid
+
+
+# Event kinds
+STAGE_STARTED = "stage_started"
+LLM_CALL_SENT = "llm_call_sent"
+LLM_CALL_RETURNED = "llm_call_returned"
+STAGE_FINISHED = "stage_finished"
+MESSAGE = "message"
+
+
+@dataclass(frozen=True)
+class Event:
+    kind: str
+    run_id: str
+    stage: str | None
+    timestamp: float
+    data: dict = field(default_factory=dict)
+
+
+class EventBus:
+    """Dispatch workflow events of a single run to its subscribers."""
+
+    def __init__(self, subscribers=None, run_id: str | None = None):
+        self.run_id = run_id or uuid.uuid4().hex[:8]
+        self._subscribers = list(subscribers or [])
+
+    def subscribe(self, subscriber):
+        """Register a callable that receives every Event."""
+        self._subscribers.append(subscriber)
+        return subscriber
+
+    def find(self, subscriber_type):
+        """Return the first subscriber of the given type, or None."""
+        return next((s for s in self._subscribers if isinstance(s, subscriber_type)), None)
+
+    def emit(self, kind: str, stage: str | None = None, **data):
+        if not self._subscribers:
+            return
+        event = Event(kind=kind, run_id=self.run_id, stage=stage, timestamp=time.time(), data=data)
+        for subscriber in self._subscribers:
+            subscriber(event)
+
+    @contextmanager
+    def stage(self, name: str, title: str, emoji: str = "🔄"):
+        """Emit STAGE_STARTED on entry and STAGE_FINISHED (with duration and status) on exit."""
+        start = time.perf_counter()
+        self.emit(STAGE_STARTED, name, title=title, emoji=emoji)
+        status = "error"
+        try:
+            yield self
+            status = "ok"
+        finally:
+            self.emit(STAGE_FINISHED, name, status=status, duration=time.perf_counter() - start)
+
+    def message(self, level: str, text: str, stage: str | None = None, **data):
+        self.emit(MESSAGE, stage, level=level, text=text, **data)
+
+    def info(self, text: str, stage: str | None = None):
+        self.message("info", text, stage)
+
+    def success(self, text: str, stage: str | None = None):
+        self.message("success", text, stage)
+
+    def warning(self, text: str, stage: str | None = None):
+        self.message("warning", text, stage)
+
+    def error(self, text: str, stage: str | None = None):
+        self.message("error", text, stage)
+
+    def result(self, title: str, text: str, stage: str | None = None):
+        self.message("result", text, stage, title=title)
+
+
+def headless(run_id: str | None = None) -> EventBus:
+    """Create a bus with no subscribers, for batch and server runs."""
+    return EventBus(run_id=run_id)
+
+
+def get_events(config=None) -> EventBus:
+    """Return the EventBus from a run config.
+
+    Graph runs always carry one (see console_run()); a node called on its
+    own without a bus reports to a terminal UI bus of its own.
+    """
+    if config:
+        events = config.get("configurable", {}).get("events")
+        if events is not None:
+            return events
+    return EventBus([ConsoleSubscriber()])
+
+
+# Serialises terminal output across concurrently running subscribers
+_console_lock = threading.Lock()
+# Number of console runs in progress, see console_run()
+_console_runs = 0
+_console_runs_lock = threading.Lock()
+
+
+@contextmanager
+def console_run(config=None):
+    """Yield the run config, with a terminal UI EventBus for the whole run if it has none.
+
+    The bus is created once per run, so every node reports under the same
+    run id. A run that starts while another console run is in progress is
+    buffered and printed in one block when it finishes, so concurrent runs
+    never interleave their output.
+    """
+    global _console_runs
+    configurable = (config or {}).get("configurable", {})
+    if configurable.get("events") is not None:
+        yield config
+        return
+
+    with _console_runs_lock:
+        subscriber = ConsoleSubscriber(buffered=_console_runs > 0)
+        _console_runs += 1
+    try:
+        yield {**(config or {}), "configurable": {**configurable, "events": EventBus([subscriber])}}
+    finally:
+        with _console_runs_lock:
+            _console_runs -= 1
+        subscriber.flush()
+
+
+@contextmanager
+def console_runs(configs: list):
+    """console_run() for every config of a batch: one terminal UI bus per run.
+
+    Buffered runs are printed in input order once the batch finishes.
+    """
+    with ExitStack() as stack:
+        # Contexts exit last-in first-out, so enter them in reverse input order
+        entered = [stack.enter_context(console_run(config)) for config in reversed(configs)]
+        yield entered[::-1]
+
+
+class ConsoleSubscriber:
+    """Render workflow events with the Rich terminal UI.
+
+    With buffered=True nothing is printed until flush(), which writes the
+    whole run in one block so concurrent runs never interleave their output.
+    """
+
+    def __init__(self, buffered: bool = False):
+        import niceterminalui
+        self._ui = niceterminalui
+        self.buffered = buffered
+        self._pending = []
+        self._status = None
+        self._calls_in_flight = 0
+
+    def __call__(self, event: Event):
+        # Buffered runs take the lock too: their nodes may emit from several threads
+        with _console_lock:
+            if self.buffered:
+                self._pending.append(event)
+            else:
+                self._render(event)
+
+    def flush(self):
+        """Print every buffered event in one uninterrupted block."""
+        with _console_lock:
+            pending, self._pending = self._pending, []
+            for event in pending:
+                self._render(event)
+
+    def _render(self, event: Event):
+        ui = self._ui
+        data = event.data
+
+        if event.kind == STAGE_STARTED:
+            ui.print_step(data["title"], data.get("emoji", "🔄"))
+        elif event.kind == LLM_CALL_SENT:
+            # Concurrent calls share one spinner, which stops when the last one returns
+            self._calls_in_flight += 1
+            if not self.buffered and self._status is None:
+                self._status = ui.console.status(f"[cyan]{data.get('description', 'Waiting for AI response...')}")
+                self._status.start()
+        elif event.kind == LLM_CALL_RETURNED:
+            self._calls_in_flight = max(self._calls_in_flight - 1, 0)
+            if self._status is not None and not self._calls_in_flight:
+                self._status.stop()
+                self._status = None
+        elif event.kind == MESSAGE:
+            level = data.get("level", "info")
+            if level == "result":
+                ui.print_result_box(data["title"], data["text"])
+            else:
+                printer = {
+                    "info": ui.print_info,
+                    "success": ui.print_success,
+                    "warning": ui.print_warning,
+                    "error": ui.print_error,
+                }.get(level, ui.print_info)
+                printer(data["text"])
@@ -0,0 +1,306 @@
+"""
+Computational geometry helpers for axis-aligned room rectangles.
+
+Rooms are rectangles given by their bottom-left corner (x, y), width and
+height. Coordinates produced by the LLM are rarely exact, so every
+comparison uses a small tolerance (EPSILON, in metres).
+"""
+
+from dataclasses import dataclass
+import bisect
+import heapq
+
+
+EPSILON = 0.05
+
+
+@dataclass(frozen=True)
+class Wall:
+    """A straight wall segment.
+
+    A "vertical" wall runs along the y axis at x=position, a "horizontal"
+    wall runs along the x axis at y=position.
+    """
+    orientation: str
+    position: float
+    start: float
+    end: float
+
+    @property
+    def length(self) -> float:
+        return self.end - self.start
+
+    @property
+    def midpoint(self) -> float:
+        return (self.start + self.end) / 2
+
+
+def _bucket(value: float) -> int:
+    return round(value / EPSILON)
+
+
+def _edge_index(rooms, position_of):
+    """Group room indices by the (bucketed) coordinate of one of their edges."""
+    index = {}
+    for i, room in enumerate(rooms):
+        index.setdefault(_bucket(position_of(room)), []).append(i)
+    return index
+
+
+def _match_edges(rooms, far_edge, near_edge, span_of, orientation, walls):
+    """Pair rooms whose far edge (right/top) meets another room's near edge (left/bottom).
+
+    Adds a Wall to `walls` for every pair whose spans overlap by more than EPSILON.
+    """
+    far_index = _edge_index(rooms, far_edge)
+    near_index = _edge_index(rooms, near_edge)
+
+    for key, far_rooms in far_index.items():
+        candidates = []
+        for neighbour in (key - 1, key, key + 1):
+            candidates.extend(near_index.get(neighbour, ()))
+        if not candidates:
+            continue
+
+        candidates.sort(key=lambda j: span_of(rooms[j])[0])
+        for i in far_rooms:
+            position = far_edge(rooms[i])
+            start_i, end_i = span_of(rooms[i])
+            for j in candidates:
+                start_j, end_j = span_of(rooms[j])
+                if start_j >= end_i - EPSILON:
+                    break
+                if i == j or abs(position - near_edge(rooms[j])) > EPSILON:
+                    continue
+                start, end = max(start_i, start_j), min(end_i, end_j)
+                if end - start > EPSILON:
+                    pair = (i, j) if i < j else (j, i)
+                    walls[pair] = Wall(orientation, position, start, end)
+
+
+def shared_walls(rooms) -> dict:
+    """Find every pair of rooms that share a wall segment.
+
+    Edges are bucketed by coordinate so only rooms whose edges line up are
+    compared, which keeps this close to linear for real floor plans.
+
+    Returns:
+        dict: {(i, j): Wall} keyed by room indices with i < j
+    """
+    walls = {}
+    _match_edges(
+        rooms,
+        far_edge=lambda r: r.x + r.width,
+        near_edge=lambda r: r.x,
+        span_of=lambda r: (r.y, r.y + r.height),
+        orientation="vertical",
+        walls=walls,
+    )
+    _match_edges(
+        rooms,
+        far_edge=lambda r: r.y + r.height,
+        near_edge=lambda r: r.y,
+        span_of=lambda r: (r.x, r.x + r.width),
+        orientation="horizontal",
+        walls=walls,
+    )
+    return walls
+
+
+def room_boxes(rooms) -> list:
+    """(x0, y0, x1, y1) of every room, so hot loops read the room attributes only once."""
+    return [(room.x, room.y, room.x + room.width, room.y + room.height) for room in rooms]
+
+
+def _box_segment(a, b):
+    """(orientation, position, start, end) of the wall two (x0, y0, x1, y1) boxes share, or None."""
+    ax, ay, ax1, ay1 = a
+    bx, by, bx1, by1 = b
+    for position, other in ((ax1, bx), (bx1, ax)):
+        if -EPSILON <= position - other <= EPSILON:
+            start = ay if ay > by else by
+            end = ay1 if ay1 < by1 else by1
+            if end - start > EPSILON:
+                return "vertical", position, start, end
+    for position, other in ((ay1, by), (by1, ay)):
+        if -EPSILON <= position - other <= EPSILON:
+            start = ax if ax > bx else bx
+            end = ax1 if ax1 < bx1 else bx1
+            if end - start > EPSILON:
+                return "horizontal", position, start, end
+    return None
+
+
+def _shared_segment(a, b):
+    """(orientation, position, start, end) of the wall two rooms share, or None."""
+    return _box_segment(
+        (a.x, a.y, a.x + a.width, a.y + a.height), (b.x, b.y, b.x + b.width, b.y + b.height)
+    )
+
+
+def wall_between(a, b) -> Wall | None:
+    """The wall shared by two rooms, or None when they don't touch along a segment.
+
+    Same tolerance as shared_walls, for checking a known pair of rooms
+    without indexing the whole layout.
+    """
+    segment = _shared_segment(a, b)
+    return Wall(*segment) if segment is not None else None
+
+
+def shares_wall(a, b) -> bool:
+    """Whether two rooms share a wall segment (wall_between without building the Wall)."""
+    return _shared_segment(a, b) is not None
+
+
+def boxes_share_wall(a, b) -> bool:
+    """shares_wall for two boxes from room_boxes()."""
+    return _box_segment(a, b) is not None
+
+
+def exterior_walls(room, house_width: float, house_height: float) -> list:
+    """Return the walls of a room that lie on the house boundary, front (y=0) first."""
+    walls = []
+    if abs(room.y) <= EPSILON:
+        walls.append(Wall("horizontal", 0.0, room.x, room.x + room.width))
+    if abs(room.x) <= EPSILON:
+        walls.append(Wall("vertical", 0.0, room.y, room.y + room.height))
+    if abs(room.x + room.width - house_width) <= EPSILON:
+        walls.append(Wall("vertical", float(house_width), room.y, room.y + room.height))
+    if abs(room.y + room.height - house_height) <= EPSILON:
+        walls.append(Wall("horizontal", float(house_height), room.x, room.x + room.width))
+    return walls
+
+
+def find_overlaps(rooms) -> list:
+    """Find overlapping room pairs with a sweep line along x.
+
+    Rooms are visited in order of their left edge. The rooms still crossing
+    the sweep line are kept sorted by their bottom edge (expired through a
+    heap on their right edge), so each new room only looks at its y
+    neighbours. While no overlap has been found the active rooms are
+    disjoint, which lets the scan stop at the first room below the new one;
+    after that every active room is checked.
+
+    Returns:
+        list: (i, j, overlap_area) tuples with i < j
+    """
+    return find_box_overlaps(room_boxes(rooms))
+
+
+def find_box_overlaps(boxes) -> list:
+    """find_overlaps for boxes from room_boxes()."""
+    boxes = sorted([(x0, x1, y0, y1, i) for i, (x0, y0, x1, y1) in enumerate(boxes)])
+    # Hot loop: bind the helpers locally
+    heappush, heappop = heapq.heappush, heapq.heappop
+    bisect_left, insort = bisect.bisect_left, bisect.insort
+    active = []     # (y0, y1, x1, index) sorted by bottom edge
+    expiry = []     # heap of (x1, y0, y1, index)
+    overlaps = []
+    for x0, x1, y0, y1, i in boxes:
+        sweep = x0 + EPSILON
+        while expiry and expiry[0][0] <= sweep:
+            ex1, ey0, ey1, j = heappop(expiry)
+            del active[bisect_left(active, (ey0, ey1, ex1, j))]
+
+        exhaustive = bool(overlaps)
+        for k in range(bisect_left(active, (y1 - EPSILON,)) - 1, -1, -1):
+            ay0, ay1, ax1, j = active[k]
+            dy = (y1 if y1 < ay1 else ay1) - (y0 if y0 > ay0 else ay0)
+            if dy > EPSILON:
+                dx = (x1 if x1 < ax1 else ax1) - x0
+                if dx > EPSILON:
+                    overlaps.append((i, j, dx * dy) if i < j else (j, i, dx * dy))
+            if ay0 <= y0 and not exhaustive:
+                break
+
+        insort(active, (y0, y1, x1, i))
+        heappush(expiry, (x1, y0, y1, i))
+    return overlaps
+
+
+def clip_area(room, width: float, height: float) -> float:
+    """Area of the part of a room that lies inside the house footprint."""
+    dx = min(room.x + room.width, width) - max(room.x, 0.0)
+    dy = min(room.y + room.height, height) - max(room.y, 0.0)
+    return max(dx, 0.0) * max(dy, 0.0)
+
+
+def union_area(rooms, width: float, height: float) -> float:
+    """Area covered by the union of rooms inside the footprint.
+
+    Sweeps vertical slabs between consecutive x edges and merges the y
+    intervals of the rooms spanning each slab.
+    """
+    boxes = []
+    for room in rooms:
+        x0, x1 = max(room.x, 0.0), min(room.x + room.width, width)
+        y0, y1 = max(room.y, 0.0), min(room.y + room.height, height)
+        if x1 > x0 and y1 > y0:
+            boxes.append((x0, x1, y0, y1))
+
+    xs = sorted({x for box in boxes for x in box[:2]})
+    total = 0.0
+    for left, right in zip(xs, xs[1:]):
+        intervals = sorted((y0, y1) for x0, x1, y0, y1 in boxes if x0 <= left and x1 >= right)
+        covered, current_start, current_end = 0.0, None, None
+        for y0, y1 in intervals:
+            if current_end is None or y0 > current_end:
+                if current_end is not None:
+                    covered += current_end - current_start
+                current_start, current_end = y0, y1
+            else:
+                current_end = max(current_end, y1)
+        if current_end is not None:
+            covered += current_end - current_start
+        total += covered * (right - left)
+    return total
+
+
+def free_rectangles(rooms, width: float, height: float) -> list:
+    """Decompose the part of the footprint not covered by rooms into rectangles.
+
+    The footprint is cut into horizontal bands at every room's top and bottom
+    edge; the uncovered x intervals of each band are merged with identical
+    intervals of the band below.
+
+    Returns:
+        list: (x, y, width, height) tuples, bottom-to-top then left-to-right
+    """
+    boxes = []
+    for room in rooms:
+        x0, x1 = max(room.x, 0.0), min(room.x + room.width, width)
+        y0, y1 = max(room.y, 0.0), min(room.y + room.height, height)
+        if x1 - x0 > EPSILON and y1 - y0 > EPSILON:
+            boxes.append((x0, x1, y0, y1))
+
+    ys = sorted({0.0, float(height)} | {y for box in boxes for y in box[2:]})
+    finished = []
+    open_runs = {}  # bucketed (x0, x1) -> (x0, x1, bottom of the run)
+    for bottom, top in zip(ys, ys[1:]):
+        middle = (bottom + top) / 2
+        covered = sorted((x0, x1) for x0, x1, y0, y1 in boxes if y0 < middle < y1)
+        runs, cursor = {}, 0.0
+        for x0, x1 in covered + [(float(width), float(width))]:
+            if x0 - cursor > EPSILON:
+                runs[(_bucket(cursor), _bucket(x0))] = (cursor, x0)
+            cursor = max(cursor, x1)
+
+        for key, (x0, x1, start) in open_runs.items():
+            if key not in runs:
+                finished.append((x0, start, x1 - x0, bottom - start))
+        open_runs = {
+            key: open_runs[key] if key in open_runs else (x0, x1, bottom)
+            for key, (x0, x1) in runs.items()
+        }
+    for x0, x1, start in open_runs.values():
+        finished.append((x0, start, x1 - x0, ys[-1] - start))
+    return sorted(finished, key=lambda rect: (rect[1], rect[0]))
+
+
+def is_out_of_bounds(room, width: float, height: float) -> bool:
+    return (
+        room.x < -EPSILON or room.y < -EPSILON
+        or room.x + room.width > width + EPSILON
+        or room.y + room.height > height + EPSILON
+    )
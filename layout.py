@@ -0,0 +1,213 @@
+"""
+Algorithmic room layout following the three-row strategy of ROOM_PLANNER_TEMPLATE.
+
+    TOP ROW     bedroom + ensuite bathroom pairs, guest bathrooms, storage, ...
+    MIDDLE ROW  full-width hallway strip
+    BOTTOM ROW  Living Room and Kitchen (plus other day rooms)
+
+Row heights are proportional to the area allocated to the rooms in the row,
+and rooms split their row proportionally to their own area, so the result
+tiles the whole footprint with no overlaps or gaps. Rows holding too many
+rooms for a single strip are split into bays around secondary corridors
+('Hallway N') that run from the hallway strip across the row, so every
+room still opens onto circulation.
+"""
+
+import itertools
+
+from models import LayoutPlan, RoomLayout
+from validators import room_type, room_number
+
+
+BOTTOM_ROW_TYPES = ("Living Room", "Dining Room", "Kitchen", "Utility", "Garage")
+MIDDLE_ROW_TYPES = ("Hallway",)
+MAX_STRIP_ASPECT = 8.0     # split a row into corridor bays above this room aspect ratio
+CORRIDOR_WIDTH = 1.2       # m, width of a secondary corridor
+PRECISION = 2              # decimals kept in the output coordinates
+
+
+def _attr(room, name, default=0):
+    return room.get(name, default) if isinstance(room, dict) else getattr(room, name, default)
+
+
+def _aspect(width: float, height: float) -> float:
+    if width <= 0 or height <= 0:
+        return float("inf")
+    return max(width / height, height / width)
+
+
+def _group_rooms(rooms):
+    """Split rooms into bottom, middle and top rows of groups.
+
+    A group is a list of (name, weight) kept next to each other; ensuite pairs
+    ('Bedroom N' + 'Bathroom N') form one group so they always share a wall.
+    """
+    bottom, middle, top = [], [], []
+    bedrooms = {}
+    for name, weight in rooms:
+        if room_type(name) == "Bedroom" and room_number(name):
+            bedrooms.setdefault(room_number(name), [(name, weight)])
+
+    for name, weight in rooms:
+        base = room_type(name)
+        if base in BOTTOM_ROW_TYPES:
+            order = BOTTOM_ROW_TYPES.index(base)
+            bottom.append((order, [(name, weight)]))
+        elif base in MIDDLE_ROW_TYPES:
+            middle.append([(name, weight)])
+        elif base == "Bedroom" and bedrooms.get(room_number(name), [("",)])[0][0] == name:
+            top.append(bedrooms[room_number(name)])
+        elif base == "Bathroom" and room_number(name) in bedrooms:
+            bedrooms[room_number(name)].append((name, weight))
+        else:
+            top.append([(name, weight)])
+
+    bottom = [group for _, group in sorted(bottom, key=lambda item: item[0])]
+    return [row for row in (bottom, middle, top) if row]
+
+
+def _split(rect, items, horizontal: bool):
+    """Slice rect into strips proportional to item weights, left-to-right or bottom-to-top."""
+    x, y, w, h = rect
+    total = sum(weight for _, weight in items) or 1.0
+    placed = []
+    offset = 0.0
+    for index, (item, weight) in enumerate(items):
+        share = weight / total
+        if horizontal:
+            size = w - offset if index == len(items) - 1 else w * share
+            placed.append((item, (x + offset, y, size, h)))
+        else:
+            size = h - offset if index == len(items) - 1 else h * share
+            placed.append((item, (x, y + offset, w, size)))
+        offset += size
+    return placed
+
+
+def _worst_aspect(placed) -> float:
+    """Worst aspect ratio of the placed rooms, ignoring hallways (they may be as narrow as they like)."""
+    return max(
+        (_aspect(w, h) for name, (_, _, w, h) in placed if room_type(name) != "Hallway"),
+        default=1.0,
+    )
+
+
+def _strip(rect, group_items):
+    """One column per group across the row; every group borders both long edges of the row."""
+    placed = []
+    for group, (gx, gy, gw, gh) in _split(rect, group_items, horizontal=True):
+        # Split pairs along their longer side so both rooms keep a usable shape
+        placed.extend(_split((gx, gy, gw, gh), group, horizontal=gw >= gh))
+    return placed
+
+
+def _columns(group_items, count: int) -> list:
+    """Partition groups, in order, into `count` non-empty columns of roughly equal weight."""
+    total = sum(weight for _, weight in group_items)
+    columns = [[] for _ in range(count)]
+    column, cumulative = 0, 0.0
+    for index, (group, weight) in enumerate(group_items):
+        remaining = len(group_items) - index
+        if columns[column] and column < count - 1 and (
+            cumulative + weight / 2 > total * (column + 1) / count or remaining <= count - 1 - column
+        ):
+            column += 1
+        columns[column].append((group, weight))
+        cumulative += weight
+    return columns
+
+
+def _bays(rect, group_items, bays: int, corridor_names):
+    """Split the row into bays of two room columns around a full-height corridor.
+
+    Each corridor spans the whole row, so it meets the hallway strip, and
+    every room in the flanking columns spans its column's width, so it
+    opens onto the corridor. Column widths follow the weight they hold.
+    """
+    x, y, w, h = rect
+    corridor = min(CORRIDOR_WIDTH, w / (4 * bays))
+    room_width = w - bays * corridor
+    total = sum(weight for _, weight in group_items) or 1.0
+
+    placed = []
+    cursor = x
+    for index, column in enumerate(_columns(group_items, 2 * bays)):
+        column_width = room_width * sum(weight for _, weight in column) / total
+        if index == 2 * bays - 1:
+            column_width = x + w - cursor
+        rooms = [(name, weight) for group, _ in column for name, weight in group]
+        placed.extend(_split((cursor, y, column_width, h), rooms, horizontal=False))
+        cursor += column_width
+        if index % 2 == 0:
+            placed.append((next(corridor_names), (cursor, y, corridor, h)))
+            cursor += corridor
+    return placed
+
+
+def _layout_row(rect, groups, corridor_names):
+    """Place the groups of one row inside rect so every room can be reached from the hallway strip.
+
+    Rows lay their groups out as a single strip. When that makes rooms too
+    elongated, the row is split into bays served by secondary corridors
+    instead, choosing the number of bays that keeps rooms best shaped.
+    """
+    group_items = [(group, sum(weight for _, weight in group)) for group in groups]
+    placed = _strip(rect, group_items)
+    hallways_only = all(room_type(name) == "Hallway" for group in groups for name, _ in group)
+    if hallways_only or _worst_aspect(placed) <= MAX_STRIP_ASPECT:
+        return placed
+
+    # At least two groups per column, and corridors taking at most half the row width
+    max_bays = min(len(groups) // 4, int(rect[2] // (2 * CORRIDOR_WIDTH)))
+    best_bays, best_aspect = 0, _worst_aspect(placed)
+    for bays in range(1, max_bays + 1):
+        # Corridor names are only drawn for the layout that is kept
+        aspect = _worst_aspect(_bays(rect, group_items, bays, itertools.repeat("Hallway")))
+        if aspect < best_aspect:
+            best_bays, best_aspect = bays, aspect
+    if not best_bays:
+        return placed
+    return _bays(rect, group_items, best_bays, corridor_names)
+
+
+def _corridor_names(names):
+    """Names 'Hallway N' for secondary corridors, numbered after the hallways already allocated."""
+    used = [int(room_number(name)) for name in names if room_type(name) == "Hallway" and room_number(name)]
+    return (f"Hallway {number}" for number in itertools.count(max(used, default=1) + 1))
+
+
+def plan_layout(width: float, height: float, rooms) -> LayoutPlan:
+    """Place allocated rooms in a non-overlapping layout that exactly tiles the footprint.
+
+    Args:
+        width (float): House width in m
+        height (float): House height in m
+        rooms (list): Allocated rooms (Room models or dicts with name/area/proportion)
+
+    Returns:
+        LayoutPlan: Rooms positioned with the three-row strategy
+    """
+    weighted = [(_attr(room, "name", ""), float(_attr(room, "area") or 0)) for room in rooms]
+    if not any(weight > 0 for _, weight in weighted):
+        weighted = [(_attr(room, "name", ""), float(_attr(room, "proportion") or 0)) for room in rooms]
+    if not any(weight > 0 for _, weight in weighted):
+        weighted = [(name, 1.0) for name, _ in weighted]
+
+    rows = _group_rooms([(name, max(weight, 0.0)) for name, weight in weighted])
+    row_items = [(row, sum(weight for group in row for _, weight in group)) for row in rows]
+
+    corridor_names = _corridor_names(name for name, _ in weighted)
+    layout = []
+    for row, (rx, ry, rw, rh) in _split((0.0, 0.0, float(width), float(height)), row_items, horizontal=False):
+        for name, (x, y, w, h) in _layout_row((rx, ry, rw, rh), row, corridor_names):
+            x0, y0 = round(x, PRECISION), round(y, PRECISION)
+            x1, y1 = round(x + w, PRECISION), round(y + h, PRECISION)
+            layout.append(RoomLayout(
+                name=name,
+                area=round((x1 - x0) * (y1 - y0), PRECISION),
+                x=x0, y=y0,
+                width=round(x1 - x0, PRECISION),
+                height=round(y1 - y0, PRECISION),
+            ))
+
+    return LayoutPlan(width=width, height=height, rooms=layout)
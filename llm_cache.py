@@ -0,0 +1,245 @@
+"""
+Persistent, content-addressed cache for LLM calls.
+
+Every prompt sent by the workflow is hashed together with the model settings
+and the structured output schema. Responses are stored in a small SQLite
+database so repeated requests skip the network round trip entirely.
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from ratelimit import answered_by_fallback
+
+
+DEFAULT_CACHE_PATH = os.path.join(".whiteprint_cache", "llm_cache.sqlite")
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+@functools.cache
+def schema_digest(schema) -> str | None:
+    """Hash of a structured output schema's JSON schema.
+
+    Keying by the full schema rather than the class name means a changed
+    field or description never serves entries parsed for the old model.
+    """
+    if schema is None:
+        return None
+    definition = json.dumps(schema.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(definition.encode("utf-8")).hexdigest()
+
+
+def make_cache_key(prompt: str, model: str, provider: str, temperature: float, schema=None) -> str:
+    """Build a stable cache key from the formatted prompt, model settings and output schema."""
+    payload = json.dumps(
+        {
+            "prompt": prompt,
+            "model": model,
+            "provider": provider,
+            "temperature": temperature,
+            "schema": schema_digest(schema),
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Disk-backed LRU cache with a TTL, safe to share between threads."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache (accessed_at)")
+        self._conn.commit()
+
+    @classmethod
+    def from_env(cls):
+        """Create the cache configured by LLM_CACHE_* environment variables, or None if disabled."""
+        if os.getenv("LLM_CACHE", "1").lower() in ("0", "false", "no", "off"):
+            return None
+        return cls(
+            path=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+            max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES))),
+            ttl=float(os.getenv("LLM_CACHE_TTL", str(DEFAULT_TTL_SECONDS))),
+        )
+
+    def get(self, key: str):
+        """Return the cached value for key, or None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: str):
+        """Store value under key, evicting the least recently used entries when full."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY accessed_at ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self.evictions += overflow
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every cached entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """Return hit/miss statistics for this process."""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": size,
+            "max_entries": self.max_entries,
+        }
+
+
+def _report_cache_hit(args, kwargs):
+    """Tell the callbacks of an invoke() call that it was answered from the cache.
+
+    No model runs on a hit, so the callbacks would otherwise see nothing;
+    handlers with an on_cache_hit() method (like metrics' CallRecorder)
+    count the hit explicitly.
+    """
+    config = kwargs.get("config") or (args[0] if args else None) or {}
+    callbacks = config.get("callbacks") if isinstance(config, dict) else None
+    for handler in getattr(callbacks, "handlers", callbacks) or []:
+        on_cache_hit = getattr(handler, "on_cache_hit", None)
+        if on_cache_hit is not None:
+            on_cache_hit()
+
+
+class CachedChatModel:
+    """Wrap a chat model so invoke() and structured invoke() go through an LLMCache.
+
+    Anything not related to invocation is delegated to the wrapped model.
+    """
+
+    def __init__(self, model, cache: LLMCache, provider: str, model_name: str, temperature: float, schema=None):
+        self._model = model
+        self._cache = cache
+        self._provider = provider
+        self._model_name = model_name
+        self._temperature = temperature
+        self._schema = schema
+        self._runnable = model.with_structured_output(schema) if schema is not None else model
+
+    def with_structured_output(self, schema):
+        return CachedChatModel(
+            self._model, self._cache, self._provider, self._model_name, self._temperature, schema=schema
+        )
+
+    def with_temperature(self, temperature: float):
+        return CachedChatModel(
+            self._model.with_temperature(temperature), self._cache, self._provider, self._model_name, temperature,
+            schema=self._schema
+        )
+
+    def _key(self, prompt) -> str:
+        return make_cache_key(str(prompt), self._model_name, self._provider, self._temperature, self._schema)
+
+    def _encode(self, result) -> str:
+        if self._schema is not None:
+            return result.model_dump_json()
+        return json.dumps({"content": result.content})
+
+    def _decode(self, value: str):
+        if self._schema is not None:
+            return self._schema.model_validate_json(value)
+        from langchain_core.messages import AIMessage
+        return AIMessage(content=json.loads(value)["content"])
+
+    def _cacheable(self, result) -> bool:
+        """Fallback answers are not stored: the key names the configured model, which is asked again."""
+        return result is not None and not answered_by_fallback()
+
+    def invoke(self, prompt, *args, **kwargs):
+        key = self._key(prompt)
+        cached = self._cache.get(key)
+        if cached is not None:
+            _report_cache_hit(args, kwargs)
+            return self._decode(cached)
+
+        result = self._runnable.invoke(prompt, *args, **kwargs)
+        if self._cacheable(result):
+            self._cache.set(key, self._encode(result))
+        return result
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        # SQLite blocks, so cache lookups and writes run off the event loop
+        key = self._key(prompt)
+        cached = await asyncio.to_thread(self._cache.get, key)
+        if cached is not None:
+            _report_cache_hit(args, kwargs)
+            return self._decode(cached)
+
+        result = await self._runnable.ainvoke(prompt, *args, **kwargs)
+        if self._cacheable(result):
+            await asyncio.to_thread(self._cache.set, key, self._encode(result))
+        return result
+
+    def cache_stats(self) -> dict:
+        return self._cache.stats()
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
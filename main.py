@@ -1,307 +1,880 @@
-from langgraph.graph import StateGraph, END
-from dotenv import load_dotenv
-from langchain.chat_models import init_chat_model
-
-from niceterminalui import (
-    print_banner,
-    print_step,
-    print_success,
-    print_warning,
-    print_error,
-    print_info,
-    print_result_box,
-    print_completion_message,
-    create_progress_bar
-)
-from utils import draw_plan, generate_mermaid_diagram
-from prompts import (
-    INPUT_VALIDATION_TEMPLATE,
-    ALLOCATION_VALIDATION_TEMPLATE,
-    ROOM_ALLOCATION_TEMPLATE,
-    ROOM_PLANNER_TEMPLATE,
-    DOOR_PLANNER_TEMPLATE
-)
+"""
+WhitePrint AI floor plan generator.
+
+Importing this module is cheap: LangGraph, LangChain, matplotlib and the
+terminal UI are imported on first use, the LLM is built by get_llm() and the
+workflow by build_graph(). `main.graph` and `main.llm` are still available
+and are created the first time they are accessed.
+"""
+
+from __future__ import annotations
+
 from models import (
     FloorPlan,
     LayoutPlan,
     DoorPlan,
     FloorPlanState
 )
+from llm_cache import LLMCache, CachedChatModel
+from cassette import Cassette, CassetteChatModel, REPLAY
+from ratelimit import ResilientChatModel, Route, get_limiter
+from routing import LLM_STAGES, stage_route
+from validators import (
+    prevalidate_request,
+    validate_floor_plan,
+    validate_layout as validate_layout_geometry,
+    validate_doors,
+    score_layout
+)
+from doors import plan_doors
+from layout import plan_layout
+from repair import repair_locally, conflicting_rooms, repair_context, merge_repair
+from events import EventBus, ConsoleSubscriber, console_run, console_runs, get_events, LLM_CALL_SENT, LLM_CALL_RETURNED
+from batch import run_batch, DEFAULT_CONCURRENCY
+from prompt_format import rooms_table, layout_table, estimate_tokens, format_number
+from metrics import MetricsSubscriber, call_recorder, format_breakdown
+from server import serve, DEFAULT_WORKERS, DEFAULT_QUEUE_SIZE
+from checkpoints import checkpointer_from_env, thread_config, is_resumable, run_or_resume, discard_finished
+from artifacts import (
+    ARTIFACT_SUFFIX,
+    artifact_path,
+    build_artifact,
+    save_artifact,
+    load_artifact,
+    iter_artifact_paths,
+    render_artifact
+)
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import asyncio
+import functools
+import json
 import os
 import time
 
-load_dotenv()
 
+@functools.cache
+def load_env():
+    """Load .env once, before the first LLM or graph is built."""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
+def _llm_temperature() -> float:
+    load_env()
+    return float(os.getenv("LLM_TEMPERATURE", "0.1"))
 
-def create_llm():
-    provider = os.getenv("LLM_PROVIDER", "google_genai")
-    model = os.getenv("LLM_MODEL", "gemini-2.5-flash")
-    temperature = float(os.getenv("LLM_TEMPERATURE", "0.1"))
+@functools.cache
+def get_cassette():
+    """The record/replay cassette configured by LLM_CASSETTE, shared by every model."""
+    load_env()
+    return Cassette.from_env()
 
-    return init_chat_model(
+@functools.cache
+def get_llm_cache():
+    """The response cache configured by LLM_CACHE, shared by every model."""
+    load_env()
+    return LLMCache.from_env()
+
+def _llm_model(provider: str | None = None, model: str | None = None) -> tuple:
+    """(provider, model) with LLM_PROVIDER/LLM_MODEL filled in for missing values."""
+    load_env()
+    return provider or os.getenv("LLM_PROVIDER", "google_genai"), model or os.getenv("LLM_MODEL", "gemini-2.5-flash")
+
+def create_llm(temperature: float | None = None, provider: str | None = None, model: str | None = None):
+    """Build a new chat model with its own clients; with_temperature() rebinds it without new ones."""
+    provider, model = _llm_model(provider, model)
+    if temperature is None:
+        temperature = _llm_temperature()
+
+    # Replay recorded responses without building a model or touching the network
+    cassette = get_cassette()
+    if cassette is not None and cassette.mode == REPLAY:
+        return CassetteChatModel(None, cassette, temperature=temperature)
+
+    from langchain.chat_models import init_chat_model
+    routes = [Route(f"{provider}:{model}", init_chat_model(
         model=model,
         model_provider=provider,
         temperature=temperature
+    ), get_limiter(provider, model))]
+
+    # Fail over to a second provider/model once retries on the first are used up
+    fallback_provider = os.getenv("LLM_FALLBACK_PROVIDER")
+    fallback_model = os.getenv("LLM_FALLBACK_MODEL")
+    if fallback_provider or fallback_model:
+        fallback_provider, fallback_model = fallback_provider or provider, fallback_model or model
+        routes.append(Route(f"{fallback_provider}:{fallback_model}", init_chat_model(
+            model=fallback_model,
+            model_provider=fallback_provider,
+            temperature=temperature
+        ), get_limiter(fallback_provider, fallback_model, "LLM_FALLBACK")))
+
+    # Rate limiting and retries sit below the cache, so cache hits cost no quota
+    chat_model = ResilientChatModel.from_env(routes).with_temperature(temperature)
+
+    # Serve repeated prompts from the local cache (disable with LLM_CACHE=0)
+    cache = get_llm_cache()
+    if cache is not None:
+        chat_model = CachedChatModel(
+            chat_model,
+            cache,
+            provider=provider,
+            model_name=model,
+            temperature=temperature
+        )
+    if cassette is not None:
+        return CassetteChatModel(chat_model, cassette, temperature=temperature)
+    return chat_model
+
+@functools.cache
+def get_shared_llm(provider: str, model: str):
+    """The chat model for one provider/model, created on first use and shared by every temperature."""
+    return create_llm(None, provider, model)
+
+def get_llm(temperature: float | None = None, provider: str | None = None, model: str | None = None):
+    """The shared chat model for provider/model, sampling at `temperature`.
+
+    Defaults are resolved first, and the temperature is applied per call, so
+    every stage and temperature routed to the same model shares one client
+    and its HTTP connections.
+    """
+    provider, model = _llm_model(provider, model)
+    if temperature is None:
+        temperature = _llm_temperature()
+    return get_shared_llm(provider, model).with_temperature(temperature)
+
+@functools.cache
+def get_stage_llm(stage: str, schema=None, temperature: float | None = None):
+    """The runnable for one stage, built once: its routed model, with structured output for schema."""
+    load_env()
+    route = stage_route(stage)
+    if temperature is None:
+        temperature = route.temperature
+    llm = get_llm(temperature, route.provider, route.model)
+    return llm.with_structured_output(schema) if schema is not None else llm
+
+
+def _invoke_llm(events: EventBus, stage: str, runnable, prompt: str, description: str):
+    """Invoke the LLM, announcing the call and its timings and token usage on the event bus."""
+    events.emit(
+        LLM_CALL_SENT, stage, description=description,
+        prompt_chars=len(prompt), prompt_tokens=estimate_tokens(prompt)
     )
+    recorder = call_recorder()
+    error = None
+    try:
+        return runnable.invoke(prompt, config={"callbacks": [recorder]})
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        duration = time.perf_counter() - recorder.created_at
+        events.emit(LLM_CALL_RETURNED, stage, error=error, duration=duration, **recorder.stats())
 
-# Initialize 
-llm = create_llm()
+async def _ainvoke_llm(events: EventBus, stage: str, runnable, prompt: str, description: str):
+    """Async version of _invoke_llm."""
+    events.emit(
+        LLM_CALL_SENT, stage, description=description,
+        prompt_chars=len(prompt), prompt_tokens=estimate_tokens(prompt)
+    )
+    recorder = call_recorder()
+    error = None
+    try:
+        return await runnable.ainvoke(prompt, config={"callbacks": [recorder]})
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        duration = time.perf_counter() - recorder.created_at
+        events.emit(LLM_CALL_RETURNED, stage, error=error, duration=duration, **recorder.stats())
+
+
+def _used_llm(state: FloorPlanState, stage: str):
+    """Note that a node called the LLM, so the artifact records the route it used."""
+    stages = state.get("llm_stages") or []
+    if stage not in stages:
+        state["llm_stages"] = stages + [stage]
 
 
-def verify_request(state: FloorPlanState) -> FloorPlanState:
+def verify_request(state: FloorPlanState, config=None) -> FloorPlanState:
     """Initial input validation before processing."""
-    print_step("Input Validation", "🔍")
-    print_info(f"Analyzing request: '{state.get('input', '')}'")
+    events = get_events(config)
+    with events.stage("verify_request", "Input Validation", "🔍"):
+        events.info(f"Analyzing request: '{state.get('input', '')}'", "verify_request")
     return state
 
-def should_continue_after_verification(state: FloorPlanState) -> str:
-    """Use LLM to validate if initial request is reasonable."""
-    try:
-        input_text = state.get("input", "")
-        
-        prompt = INPUT_VALIDATION_TEMPLATE.format(input_text=input_text)
-        response = llm.invoke(prompt).content.strip().upper()
-        
-        if "UNREASONABLE" in response:
-            print_error("Request deemed unreasonable - contains clearly impossible requirements")
-            return "END"
-        elif "REASONABLE" in response:
-            print_success("Input validation passed - proceeding to room allocation")
-            return "CONTINUE"
-        else:
-            print_warning("Unclear validation response, assuming reasonable")
-            return "CONTINUE"  # Default to continue for unclear responses
-        
-    except Exception as e:
-        print_error(f"Input validation failed: {e}")
+def _input_validation_prompt(state: FloorPlanState) -> str:
+    from prompts import INPUT_VALIDATION_TEMPLATE
+    return INPUT_VALIDATION_TEMPLATE.format(input_text=state.get("input", ""))
+
+def _route_input_validation(events: EventBus, response: str) -> str:
+    stage = "verify_request"
+    response = response.strip().upper()
+    if "UNREASONABLE" in response:
+        events.error("Request deemed unreasonable - contains clearly impossible requirements", stage)
         return "END"
+    elif "REASONABLE" in response:
+        events.success("Input validation passed - proceeding to room allocation", stage)
+        return "CONTINUE"
+    else:
+        events.warning("Unclear validation response, assuming reasonable", stage)
+        return "CONTINUE"  # Default to continue for unclear responses
 
-def validate_allocation(state: FloorPlanState) -> FloorPlanState:
-    """Validate the room allocation results."""
-    print_step("Allocation Validation", "🏗️")
-    print_info("Checking room allocation integrity and feasibility...")
-    state["_validation_passed"] = False
-    return state
+def _prevalidate_input(events: EventBus, state: FloorPlanState) -> str | None:
+    """Apply the rule-based validator; returns a route, or None to fall back to the LLM."""
+    verdict, reason = prevalidate_request(state.get("input", ""))
+    if verdict is None:
+        events.info(f"Rule-based validation inconclusive ({reason}) - asking AI validator", "verify_request")
+        return None
+    events.info(f"Rule-based validation: {reason}", "verify_request")
+    return _route_input_validation(events, verdict)
 
-def should_continue_after_allocation(state: FloorPlanState) -> str:
-    """Use LLM to validate room allocation output integrity and reasonableness."""
+# Malformed state or LLM verdicts end the run as a rejection; anything else
+# (provider and transport errors) propagates so the run can be resumed
+_VALIDATION_ERRORS = (AttributeError, KeyError, TypeError, ValueError)
+
+def should_continue_after_verification(state: FloorPlanState, config=None) -> str:
+    """Validate if initial request is reasonable, asking the LLM only when the local rules are unsure."""
+    events = get_events(config)
+    verdict = _prevalidate_input(events, state)
+    if verdict is not None:
+        return verdict
+    response = _invoke_llm(
+        events, "verify_request", get_stage_llm("verify_request"), _input_validation_prompt(state), "AI validating request..."
+    )
     try:
-        # First check basic structure integrity (these are hard requirements)
-        if not state.get("rooms"):
-            print_error("Missing 'rooms' in allocation output")
-            return "END"
-            
-        if not state.get("width") or not state.get("height"):
-            print_error("Missing dimensions in allocation output") 
-            return "END"
-            
-        if not state.get("total_area"):
-            print_error("Missing 'total_area' in allocation output")
-            return "END"
-
-        # Check room data structure integrity
-        for i, room in enumerate(state["rooms"]):
-            if isinstance(room, dict):
-                if not room.get("name") or not room.get("area"):
-                    print_error(f"Room {i+1} missing required fields")
-                    return "END"
-            else:
-                if not hasattr(room, 'name') or not hasattr(room, 'area'):
-                    print_error(f"Room {i+1} missing required attributes")
-                    return "END"
+        return _route_input_validation(events, response.content)
+    except _VALIDATION_ERRORS as e:
+        events.error(f"Input validation failed: {e}", "verify_request")
+        return "END"
 
-        # Now use LLM to validate reasonableness
-        room_summary = []
-        total_room_area = 0
-        
-        for room in state["rooms"]:
-            name = room.get("name", "") if isinstance(room, dict) else room.name
-            area = room.get("area", 0) if isinstance(room, dict) else room.area
-            proportion = room.get("proportion", 0) if isinstance(room, dict) else room.proportion
-            
-            room_summary.append(f"- {name}: {area}m² ({proportion*100:.1f}%)")
-            total_room_area += area
+async def ashould_continue_after_verification(state: FloorPlanState, config=None) -> str:
+    """Async version of should_continue_after_verification."""
+    events = get_events(config)
+    verdict = _prevalidate_input(events, state)
+    if verdict is not None:
+        return verdict
+    response = await _ainvoke_llm(
+        events, "verify_request", get_stage_llm("verify_request"), _input_validation_prompt(state), "AI validating request..."
+    )
+    try:
+        return _route_input_validation(events, response.content)
+    except _VALIDATION_ERRORS as e:
+        events.error(f"Input validation failed: {e}", "verify_request")
+        return "END"
 
-        rooms_text = "\n".join(room_summary)
-        
-        prompt = ALLOCATION_VALIDATION_TEMPLATE.format(
-            total_area=state['total_area'],
-            width=state['width'],
-            height=state['height'],
-            rooms_text=rooms_text,
-            total_room_area=total_room_area
-        )
+def validate_allocation(state: FloorPlanState, config=None) -> FloorPlanState:
+    """Validate the room allocation results."""
+    events = get_events(config)
+    with events.stage("validate_allocation", "Allocation Validation", "🏗️"):
+        events.info("Checking room allocation integrity and feasibility...", "validate_allocation")
+        state["_validation_passed"] = False
+        try:
+            state["allocation_report"] = validate_floor_plan(FloorPlan(
+                total_area=state["total_area"],
+                width=state["width"],
+                height=state["height"],
+                rooms=state["rooms"]
+            ))
+        except (KeyError, TypeError, ValueError):
+            # Malformed allocations are reported by the structure check in the router
+            state["allocation_report"] = None
+    return state
+
+def _check_allocation_structure(events: EventBus, state: FloorPlanState) -> bool:
+    """Check the hard structural requirements of the allocation output."""
+    stage = "validate_allocation"
+    if not state.get("rooms"):
+        events.error("Missing 'rooms' in allocation output", stage)
+        return False
         
-        response = llm.invoke(prompt).content.strip().upper()
+    if not state.get("width") or not state.get("height"):
+        events.error("Missing dimensions in allocation output", stage)
+        return False
         
-        if "INVALID" in response:
-            print_error("Room allocation has critical structural issues")
-            return "END"
-        elif "VALID" in response:
-            print_success("Allocation validation passed - proceeding to room planning")
-            state["_validation_passed"] = True
-            return "CONTINUE"
+    if not state.get("total_area"):
+        events.error("Missing 'total_area' in allocation output", stage)
+        return False
+
+    # Check room data structure integrity
+    for i, room in enumerate(state["rooms"]):
+        if isinstance(room, dict):
+            if not room.get("name") or not room.get("area"):
+                events.error(f"Room {i+1} missing required fields", stage)
+                return False
         else:
-            print_warning("Unclear validation response, assuming valid")
-            state["_validation_passed"] = True
-            return "CONTINUE"  # Default to continue for unclear responses
+            if not hasattr(room, 'name') or not hasattr(room, 'area'):
+                events.error(f"Room {i+1} missing required attributes", stage)
+                return False
 
-    except Exception as e:
-        print_error(f"❌ Allocation validation failed: {e}")
-        return "END"
+    return True
 
-def room_allocator(state: FloorPlanState) -> FloorPlanState:
-    print_step("Room Allocation", "🏠")
+def _allocation_validation_prompt(state: FloorPlanState) -> str:
+    from prompts import ALLOCATION_VALIDATION_TEMPLATE
+    room_summary = []
+    total_room_area = 0
     
-    with create_progress_bar() as progress:
-        task = progress.add_task("[cyan]Analyzing space requirements...", total=100)
-        
-        # Step 1: Initialize structured LLM
-        progress.update(task, advance=20, description="[cyan]Setting up AI room allocator...")
-        time.sleep(0.3)
-        structured_llm = llm.with_structured_output(FloorPlan)
-        
-        # Step 2: Prepare prompt
-        progress.update(task, advance=20, description="[cyan]Preparing allocation prompt...")
-        time.sleep(0.3)
-        prompt = ROOM_ALLOCATION_TEMPLATE.format(input=state['input'])
-        
-        # Step 3: Invoke LLM (main processing)
-        progress.update(task, advance=30, description="[cyan]AI analyzing room requirements...")
-        plan: FloorPlan = structured_llm.invoke(prompt)
-        
-        # Step 4: Update state
-        progress.update(task, advance=20, description="[cyan]Updating floor plan state...")
-        time.sleep(0.3)
-        state['height'] = plan.height
-        state['width'] = plan.width
-        state['total_area'] = plan.total_area
-        state['rooms'] = plan.rooms
+    for room in state["rooms"]:
+        name = room.get("name", "") if isinstance(room, dict) else room.name
+        area = room.get("area", 0) if isinstance(room, dict) else room.area
+        proportion = room.get("proportion", 0) if isinstance(room, dict) else room.proportion
         
-        # Step 5: Complete
-        progress.update(task, advance=10, description="[cyan]Room allocation completed!")
-        time.sleep(0.3)
+        room_summary.append(f"- {name}: {area}m² ({proportion*100:.1f}%)")
+        total_room_area += area
+
+    rooms_text = "\n".join(room_summary)
     
-    print_success(f"Room allocation complete: {len(plan.rooms)} rooms in {plan.total_area}m²")
+    return ALLOCATION_VALIDATION_TEMPLATE.format(
+        total_area=state['total_area'],
+        width=state['width'],
+        height=state['height'],
+        rooms_text=rooms_text,
+        total_room_area=total_room_area
+    )
+
+def _allocation_llm_check() -> bool:
+    """Whether a locally valid allocation also goes to the LLM for a second opinion."""
+    return os.getenv("ALLOCATION_LLM_CHECK", "0").lower() in ("1", "true", "yes", "on")
+
+def _route_allocation_report(events: EventBus, state: FloorPlanState) -> str | None:
+    """Route on the local allocation report; returns None when the LLM check should run."""
+    stage = "validate_allocation"
+    report = state.get("allocation_report")
+    if report is None:
+        events.error("Allocation could not be validated", stage)
+        return "END"
+
+    for issue in report.issues:
+        if issue.severity == "error":
+            events.error(issue.message, stage)
+        else:
+            events.warning(issue.message, stage)
+
+    if not report.valid:
+        events.error("Room allocation has critical structural issues", stage)
+        return "END"
+    if _allocation_llm_check():
+        return None
+
+    events.success("Allocation validation passed - proceeding to room planning", stage)
+    state["_validation_passed"] = True
+    return "CONTINUE"
+
+def _route_allocation_validation(events: EventBus, state: FloorPlanState, response: str) -> str:
+    stage = "validate_allocation"
+    response = response.strip().upper()
+    if "INVALID" in response:
+        events.error("Room allocation has critical structural issues", stage)
+        return "END"
+    elif "VALID" in response:
+        events.success("Allocation validation passed - proceeding to room planning", stage)
+        state["_validation_passed"] = True
+        return "CONTINUE"
+    else:
+        events.warning("Unclear validation response, assuming valid", stage)
+        state["_validation_passed"] = True
+        return "CONTINUE"  # Default to continue for unclear responses
+
+def _check_allocation_locally(events: EventBus, state: FloorPlanState) -> tuple:
+    """(route, None) from the local checks, or (None, prompt) when the LLM check should run."""
+    try:
+        # First check basic structure integrity (these are hard requirements)
+        if not _check_allocation_structure(events, state):
+            return "END", None
+
+        # Then apply the numeric allocation rules locally
+        route = _route_allocation_report(events, state)
+        if route is not None:
+            return route, None
+        return None, _allocation_validation_prompt(state)
+    except _VALIDATION_ERRORS as e:
+        events.error(f"Allocation validation failed: {e}", "validate_allocation")
+        return "END", None
+
+def _route_allocation_response(events: EventBus, state: FloorPlanState, response) -> str:
+    try:
+        return _route_allocation_validation(events, state, response.content)
+    except _VALIDATION_ERRORS as e:
+        events.error(f"Allocation validation failed: {e}", "validate_allocation")
+        return "END"
+
+def should_continue_after_allocation(state: FloorPlanState, config=None) -> str:
+    """Validate room allocation integrity and reasonableness, with an opt-in LLM check."""
+    events = get_events(config)
+    route, prompt = _check_allocation_locally(events, state)
+    if route is not None:
+        return route
+
+    # Optionally ask the LLM for a second opinion
+    response = _invoke_llm(
+        events, "validate_allocation", get_stage_llm("validate_allocation"), prompt, "AI reviewing room allocation..."
+    )
+    return _route_allocation_response(events, state, response)
+
+async def ashould_continue_after_allocation(state: FloorPlanState, config=None) -> str:
+    """Async version of should_continue_after_allocation."""
+    events = get_events(config)
+    route, prompt = _check_allocation_locally(events, state)
+    if route is not None:
+        return route
+
+    response = await _ainvoke_llm(
+        events, "validate_allocation", get_stage_llm("validate_allocation"), prompt, "AI reviewing room allocation..."
+    )
+    return _route_allocation_response(events, state, response)
+
+def _apply_allocation(state: FloorPlanState, plan: FloorPlan) -> FloorPlanState:
+    state['height'] = plan.height
+    state['width'] = plan.width
+    state['total_area'] = plan.total_area
+    state['rooms'] = plan.rooms
     return state
-    
-def room_planner(state: FloorPlanState) -> FloorPlanState:
-    print_step("Room Layout Planning", "📐")
-    
-    with create_progress_bar() as progress:
-        task = progress.add_task("[yellow]Planning room positions...", total=100)
-        
-        # Step 1: Initialize layout planner
-        progress.update(task, advance=25, description="[yellow]Setting up AI layout planner...")
-        time.sleep(0.3)
-        structured_planner = llm.with_structured_output(LayoutPlan)
-        
-        # Step 2: Prepare layout prompt
-        progress.update(task, advance=25, description="[yellow]Analyzing room dimensions and constraints...")
-        time.sleep(0.3)
-        prompt = ROOM_PLANNER_TEMPLATE.format(
-            width=state["width"],
-            height=state["height"], 
-            total_area=state['total_area'],
-            rooms=state['rooms']
+
+def _room_allocation_prompt(state: FloorPlanState) -> str:
+    from prompts import ROOM_ALLOCATION_TEMPLATE
+    return ROOM_ALLOCATION_TEMPLATE.format(input=state['input'])
+
+def room_allocator(state: FloorPlanState, config=None) -> FloorPlanState:
+    events = get_events(config)
+    with events.stage("room_allocator", "Room Allocation", "🏠"):
+        prompt = _room_allocation_prompt(state)
+        plan: FloorPlan = _invoke_llm(
+            events, "room_allocator", get_stage_llm("room_allocator", FloorPlan), prompt, "AI analyzing room requirements..."
         )
-        
-        # Step 3: Generate layout (main processing)
-        progress.update(task, advance=40, description="[yellow]AI optimizing room positioning...")
-        state["plan"] = structured_planner.invoke(prompt)
-        
-        # Step 4: Complete
-        progress.update(task, advance=10, description="[yellow]Room layout optimization completed!")
-        time.sleep(0.3)
-    
-    print_success(f"Room layout complete: {len(state['plan'].rooms)} rooms positioned")
+        _apply_allocation(state, plan)
+        _used_llm(state, "room_allocator")
+        events.success(f"Room allocation complete: {len(plan.rooms)} rooms in {plan.total_area}m²", "room_allocator")
     return state
 
-def door_planner(state: FloorPlanState) -> FloorPlanState:
-    print_step("Door Planning", "🚪")
-    
-    with create_progress_bar() as progress:
-        task = progress.add_task("[green]Planning door connections...", total=100)
-        
-        # Step 1: Initialize door planner
-        progress.update(task, advance=25, description="[green]Setting up AI door planner...")
-        time.sleep(0.3)
-        structured_planner = llm.with_structured_output(DoorPlan)
-        
-        # Step 2: Analyze room adjacencies
-        progress.update(task, advance=25, description="[green]Analyzing room adjacencies and accessibility...")
-        time.sleep(0.3)
-        prompt = DOOR_PLANNER_TEMPLATE.format(
-            width=state['width'],
-            height=state['height'],
-            plan=state['plan']
+async def aroom_allocator(state: FloorPlanState, config=None) -> FloorPlanState:
+    """Async version of room_allocator."""
+    events = get_events(config)
+    with events.stage("room_allocator", "Room Allocation", "🏠"):
+        prompt = _room_allocation_prompt(state)
+        plan: FloorPlan = await _ainvoke_llm(
+            events, "room_allocator", get_stage_llm("room_allocator", FloorPlan), prompt, "AI analyzing room requirements..."
         )
-        
-        # Step 3: Generate door plan (main processing)
-        progress.update(task, advance=40, description="[green]AI designing door connections...")
-        state["door_plan"] = structured_planner.invoke(prompt)
-        
-        # Step 4: Complete
-        progress.update(task, advance=10, description="[green]Door connectivity planning completed!")
-        time.sleep(0.3)
-    
-    print_success(f"Door planning complete: {len(state['door_plan'].doors)} doors designed")
+        _apply_allocation(state, plan)
+        _used_llm(state, "room_allocator")
+        events.success(f"Room allocation complete: {len(plan.rooms)} rooms in {plan.total_area}m²", "room_allocator")
     return state
 
-def plan_renderer(state: FloorPlanState) -> FloorPlanState:
-    print_step("Plan Rendering", "🎨")
+def _room_planner_prompt(state: FloorPlanState) -> str:
+    from prompts import ROOM_PLANNER_TEMPLATE
+    return ROOM_PLANNER_TEMPLATE.format(
+        width=state["width"],
+        height=state["height"],
+        total_area=format_number(state['total_area']),
+        rooms=rooms_table(state['rooms'])
+    )
     
-    with create_progress_bar() as progress:
-        task = progress.add_task("[magenta]Rendering floor plan...", total=100)
+def _room_planner_mode() -> str:
+    """Layout strategy: 'llm' (default) or 'algorithmic' (local three-row engine, no LLM call)."""
+    return os.getenv("ROOM_PLANNER", "llm").lower()
+
+# Candidate layouts are sampled at temperatures spread up to this value,
+# over at least CANDIDATE_MIN_SPREAD so no two candidates share a temperature
+CANDIDATE_MAX_TEMPERATURE = 1.0
+CANDIDATE_MIN_SPREAD = 0.5
+
+def _layout_candidates() -> int:
+    """Number of layouts requested concurrently in LLM mode; the best scoring one is kept."""
+    return max(1, int(os.getenv("LAYOUT_CANDIDATES", "1")))
+
+def _candidate_temperatures(count: int) -> list:
+    """Spread candidate temperatures evenly from the room planner's temperature to CANDIDATE_MAX_TEMPERATURE.
+
+    A temperature at or near the cap is spread below instead, so the
+    candidates (and their cache keys) still differ.
+    """
+    base = _llm_temperature()
+    route = stage_route("room_planner")
+    if route.temperature is not None:
+        base = route.temperature
+    if count == 1:
+        return [base]
+    low, top = base, max(base, CANDIDATE_MAX_TEMPERATURE)
+    if top - low < CANDIDATE_MIN_SPREAD:
+        low = max(0.0, top - CANDIDATE_MIN_SPREAD)
+    return [round(low + (top - low) * i / (count - 1), 3) for i in range(count)]
+
+def _plan_candidate(events: EventBus, prompt: str, temperature: float):
+    return _invoke_llm(
+        events, "room_planner", get_stage_llm("room_planner", LayoutPlan, temperature), prompt,
+        "AI drafting layout candidates..."
+    )
+
+async def _aplan_candidate(events: EventBus, prompt: str, temperature: float):
+    return await _ainvoke_llm(
+        events, "room_planner", get_stage_llm("room_planner", LayoutPlan, temperature), prompt,
+        "AI drafting layout candidates..."
+    )
+
+def _select_layout(events: EventBus, temperatures: list, outcomes: list) -> LayoutPlan:
+    """Keep the best candidate: valid layouts first, then the highest score."""
+    stage = "room_planner"
+    scored = []
+    for temperature, outcome in zip(temperatures, outcomes):
+        if isinstance(outcome, BaseException):
+            events.warning(f"Layout candidate at temperature {temperature} failed: {outcome}", stage)
+            continue
+        if outcome is None:
+            events.warning(f"Layout candidate at temperature {temperature} returned no layout", stage)
+            continue
+        report = validate_layout_geometry(outcome)
+        scored.append((report.valid, score_layout(outcome, report), temperature, outcome))
+    if not scored:
+        error = next((outcome for outcome in outcomes if isinstance(outcome, BaseException)), None)
+        raise RuntimeError("Every layout candidate failed") from error
+
+    valid, score, temperature, layout = max(scored, key=lambda candidate: candidate[:2])
+    events.info(
+        f"Kept the candidate at temperature {temperature} out of {len(scored)} "
+        f"(score {score:.2f}{'' if valid else ', still invalid'})", stage
+    )
+    return layout
+
+def _plan_room_candidates(events: EventBus, state: FloorPlanState) -> FloorPlanState:
+    temperatures = _candidate_temperatures(_layout_candidates())
+    prompt = _room_planner_prompt(state)
+    events.info(f"Requesting {len(temperatures)} layout candidates in parallel...", "room_planner")
+    with ThreadPoolExecutor(max_workers=len(temperatures)) as pool:
+        futures = [pool.submit(_plan_candidate, events, prompt, t) for t in temperatures]
+    outcomes = [future.exception() or future.result() for future in futures]
+    state["plan"] = _select_layout(events, temperatures, outcomes)
+    return state
+
+async def _aplan_room_candidates(events: EventBus, state: FloorPlanState) -> FloorPlanState:
+    temperatures = _candidate_temperatures(_layout_candidates())
+    prompt = _room_planner_prompt(state)
+    events.info(f"Requesting {len(temperatures)} layout candidates in parallel...", "room_planner")
+    outcomes = await asyncio.gather(
+        *[_aplan_candidate(events, prompt, t) for t in temperatures], return_exceptions=True
+    )
+    state["plan"] = _select_layout(events, temperatures, outcomes)
+    return state
+
+def _plan_rooms_algorithmically(events: EventBus, state: FloorPlanState) -> FloorPlanState:
+    events.info("Placing rooms with the three-row layout engine...", "room_planner")
+    state["plan"] = plan_layout(state["width"], state["height"], state["rooms"])
+    return state
+
+def room_planner(state: FloorPlanState, config=None) -> FloorPlanState:
+    events = get_events(config)
+    with events.stage("room_planner", "Room Layout Planning", "📐"):
+        if _room_planner_mode() == "algorithmic":
+            _plan_rooms_algorithmically(events, state)
+        else:
+            if _layout_candidates() > 1:
+                _plan_room_candidates(events, state)
+            else:
+                state["plan"] = _invoke_llm(
+                    events, "room_planner", get_stage_llm("room_planner", LayoutPlan), _room_planner_prompt(state),
+                    "AI optimizing room positioning..."
+                )
+            _used_llm(state, "room_planner")
+        events.success(f"Room layout complete: {len(state['plan'].rooms)} rooms positioned", "room_planner")
+    return state
+
+async def aroom_planner(state: FloorPlanState, config=None) -> FloorPlanState:
+    """Async version of room_planner."""
+    events = get_events(config)
+    with events.stage("room_planner", "Room Layout Planning", "📐"):
+        if _room_planner_mode() == "algorithmic":
+            _plan_rooms_algorithmically(events, state)
+        else:
+            if _layout_candidates() > 1:
+                await _aplan_room_candidates(events, state)
+            else:
+                state["plan"] = await _ainvoke_llm(
+                    events, "room_planner", get_stage_llm("room_planner", LayoutPlan), _room_planner_prompt(state),
+                    "AI optimizing room positioning..."
+                )
+            _used_llm(state, "room_planner")
+        events.success(f"Room layout complete: {len(state['plan'].rooms)} rooms positioned", "room_planner")
+    return state
+
+def validate_layout(state: FloorPlanState, config=None) -> FloorPlanState:
+    """Check the room layout geometry: overlaps, bounds, coverage and area consistency."""
+    events = get_events(config)
+    with events.stage("validate_layout", "Layout Validation", "📏"):
+        report = validate_layout_geometry(state["plan"])
+        state["layout_report"] = report
+        for issue in report.issues:
+            if issue.severity == "error":
+                events.error(issue.message, "validate_layout")
+            else:
+                events.warning(issue.message, "validate_layout")
+        if report.valid:
+            events.success(f"Layout geometry valid - {report.coverage:.0%} of the footprint used", "validate_layout")
+    return state
+
+def _layout_repair_attempts() -> int:
+    """Number of repair_layout passes allowed before an invalid layout moves on as is."""
+    return int(os.getenv("LAYOUT_REPAIR_ATTEMPTS", "2"))
+
+def should_repair_layout(state: FloorPlanState, config=None) -> str:
+    """Send an invalid layout to repair_layout while the repair budget lasts."""
+    report = state.get("layout_report")
+    if report is None or report.valid:
+        return "CONTINUE"
+    attempts = state.get("layout_repairs", 0)
+    if attempts < _layout_repair_attempts():
+        return "REPAIR"
+    if attempts:
+        get_events(config).warning(f"Layout still invalid after {attempts} repair attempt(s)", "validate_layout")
+    return "CONTINUE"
+
+def _repair_layout_locally(events: EventBus, state: FloorPlanState) -> list:
+    """Apply the local fixes and return the rooms that still need re-planning."""
+    state["layout_repairs"] = state.get("layout_repairs", 0) + 1
+    state["plan"] = repair_locally(state["plan"])
+    state["layout_report"] = validate_layout_geometry(state["plan"])
+    conflicting = conflicting_rooms(state["plan"], state["layout_report"])
+    if conflicting:
+        events.info(f"Re-planning {len(conflicting)} conflicting room(s): {', '.join(conflicting)}", "repair_layout")
+    else:
+        events.success("All layout errors fixed locally", "repair_layout")
+    return conflicting
+
+def _room_repair_prompt(state: FloorPlanState, conflicting: list) -> str:
+    from prompts import ROOM_REPAIR_TEMPLATE
+    layout = state["plan"]
+    neighbours, free_space = repair_context(layout, conflicting)
+    describe = lambda room: f"- {room.name}: x={room.x}, y={room.y}, width={room.width}, height={room.height}"
+    # Aim for the allocated areas, since local fixes may have resized the rooms
+    targets = {}
+    for room in state.get("rooms", []):
+        name = room.name if hasattr(room, 'name') else room['name']
+        targets[name] = room.area if hasattr(room, 'area') else room['area']
+    rooms = [
+        f"{describe(room)} (target area {targets.get(room.name, room.area)}m²)"
+        for room in layout.rooms if room.name in conflicting
+    ]
+    issues = [
+        f"- {issue.message}" for issue in state["layout_report"].issues
+        if issue.severity == "error"
+    ]
+    return ROOM_REPAIR_TEMPLATE.format(
+        width=layout.width,
+        height=layout.height,
+        issues="\n".join(issues),
+        fixed_rooms="\n".join(describe(room) for room in neighbours) or "- none",
+        free_space="\n".join(f"- ({x:g}, {y:g}, {w:g}, {h:g})" for x, y, w, h in free_space) or "- none",
+        rooms="\n".join(rooms)
+    )
+
+def repair_layout(state: FloorPlanState, config=None) -> FloorPlanState:
+    """Fix layout errors locally, then re-plan only the rooms that still conflict."""
+    events = get_events(config)
+    with events.stage("repair_layout", "Layout Repair", "🔧"):
+        conflicting = _repair_layout_locally(events, state)
+        if conflicting:
+            repaired = _invoke_llm(
+                events, "repair_layout", get_stage_llm("repair_layout", LayoutPlan),
+                _room_repair_prompt(state, conflicting), f"AI re-planning {len(conflicting)} room(s)..."
+            )
+            state["plan"] = merge_repair(state["plan"], repaired, conflicting)
+            _used_llm(state, "repair_layout")
+    return state
+
+async def arepair_layout(state: FloorPlanState, config=None) -> FloorPlanState:
+    """Async version of repair_layout."""
+    events = get_events(config)
+    with events.stage("repair_layout", "Layout Repair", "🔧"):
+        conflicting = _repair_layout_locally(events, state)
+        if conflicting:
+            repaired = await _ainvoke_llm(
+                events, "repair_layout", get_stage_llm("repair_layout", LayoutPlan),
+                _room_repair_prompt(state, conflicting), f"AI re-planning {len(conflicting)} room(s)..."
+            )
+            state["plan"] = merge_repair(state["plan"], repaired, conflicting)
+            _used_llm(state, "repair_layout")
+    return state
+
+def _door_planner_prompt(state: FloorPlanState) -> str:
+    from prompts import DOOR_PLANNER_TEMPLATE
+    return DOOR_PLANNER_TEMPLATE.format(
+        width=state['width'],
+        height=state['height'],
+        plan=layout_table(state['plan'])
+    )
+
+def _door_planner_mode() -> str:
+    """Door placement strategy: 'geometric' (default, no LLM call) or 'llm'."""
+    return os.getenv("DOOR_PLANNER", "geometric").lower()
+
+def _plan_doors_geometrically(events: EventBus, state: FloorPlanState) -> FloorPlanState:
+    events.info("Deriving doors from shared walls...", "door_planner")
+    state["door_plan"] = plan_doors(state["plan"])
+    return state
+
+def door_planner(state: FloorPlanState, config=None) -> FloorPlanState:
+    events = get_events(config)
+    with events.stage("door_planner", "Door Planning", "🚪"):
+        if _door_planner_mode() == "geometric":
+            _plan_doors_geometrically(events, state)
+        else:
+            state["door_plan"] = _invoke_llm(
+                events, "door_planner", get_stage_llm("door_planner", DoorPlan), _door_planner_prompt(state),
+                "AI designing door connections..."
+            )
+            _used_llm(state, "door_planner")
+        events.success(f"Door planning complete: {len(state['door_plan'].doors)} doors designed", "door_planner")
+    return state
+
+async def adoor_planner(state: FloorPlanState, config=None) -> FloorPlanState:
+    """Async version of door_planner."""
+    events = get_events(config)
+    with events.stage("door_planner", "Door Planning", "🚪"):
+        if _door_planner_mode() == "geometric":
+            _plan_doors_geometrically(events, state)
+        else:
+            state["door_plan"] = await _ainvoke_llm(
+                events, "door_planner", get_stage_llm("door_planner", DoorPlan), _door_planner_prompt(state),
+                "AI designing door connections..."
+            )
+            _used_llm(state, "door_planner")
+        events.success(f"Door planning complete: {len(state['door_plan'].doors)} doors designed", "door_planner")
+    return state
+
+def _plan_renderer_mode() -> str:
+    """Renderer: 'matplotlib' (default) or 'svg' (lightweight SVG writer, no matplotlib import)."""
+    return os.getenv("PLAN_RENDERER", "matplotlib").lower()
+
+def _output_path(state: FloorPlanState) -> str:
+    filename = state.get('output_path') or 'floor_plan.png'
+    if _plan_renderer_mode() == "svg":
+        filename = os.path.splitext(filename)[0] + ".svg"
+    return filename
+
+def _render_plan(state: FloorPlanState) -> bytes:
+    """Render the plan to image bytes in the format implied by the output file extension."""
+    from utils import render_plan, draw_plan_svg
+
+    rooms = state["plan"].model_dump()
+    doors = state["door_plan"].model_dump()["doors"]
+    if _plan_renderer_mode() == "svg":
+        return draw_plan_svg(rooms, doors).encode("utf-8")
+    image_format = os.path.splitext(_output_path(state))[1].lstrip(".").lower() or "png"
+    return render_plan(rooms, doors, image_format)
+
+def plan_renderer(state: FloorPlanState, config=None) -> FloorPlanState:
+    events = get_events(config)
+    with events.stage("plan_renderer", "Plan Rendering", "🎨"):
+        state['rendered_plan'] = _render_plan(state)
+        events.success("Floor plan rendered successfully", "plan_renderer")
+    return state
+
+async def aplan_renderer(state: FloorPlanState, config=None) -> FloorPlanState:
+    """Async version of plan_renderer; drawing runs in a worker thread."""
+    events = get_events(config)
+    with events.stage("plan_renderer", "Plan Rendering", "🎨"):
+        state['rendered_plan'] = await asyncio.to_thread(_render_plan, state)
+        events.success("Floor plan rendered successfully", "plan_renderer")
+    return state
+
+def validate_plan(state: FloorPlanState, config=None) -> FloorPlanState:
+    events = get_events(config)
+    with events.stage("validate_plan", "Plan Validation", "✅"):
+        events.info("Removing duplicate doors and validating connections...", "validate_plan")
         
-        # Step 1: Extract plan data
-        progress.update(task, advance=30, description="[magenta]Extracting room and door data...")
-        time.sleep(0.3)
-        rooms = state["plan"].model_dump()
-        doors = state["door_plan"].model_dump()["doors"]
+        doors = state["door_plan"].doors
+        seen = set()
+        filtered = []
+        for d in doors:
+            key = tuple(sorted([d.from_room, d.to_room]))
+            if key not in seen:
+                seen.add(key)
+                filtered.append(d)
         
-        # Step 2: Generate visualization (main processing)
-        progress.update(task, advance=60, description="[magenta]Creating visual floor plan...")
-        fig = draw_plan(rooms, doors)
+        removed_count = len(doors) - len(filtered)
+        state["door_plan"].doors = filtered
         
-        # Step 3: Store rendered plan
-        progress.update(task, advance=10, description="[magenta]Finalizing rendered floor plan...")
-        time.sleep(0.3)
-        state['rendered_plan'] = fig
-    
-    print_success("Floor plan rendered successfully")
+        if removed_count > 0:
+            events.warning(f"Removed {removed_count} duplicate door connections", "validate_plan")
+
+        report = validate_doors(state["plan"], state["door_plan"])
+        state["plan_report"] = report
+        for issue in report.issues:
+            events.error(f"{issue.message}: {', '.join(issue.rooms)}", "validate_plan")
+        if report.valid:
+            events.success("Plan validation complete", "validate_plan")
     return state
 
-def validate_plan(state: FloorPlanState) -> FloorPlanState:
-    print_step("Plan Validation", "✅")
-    print_info("Removing duplicate doors and validating connections...")
-    
-    doors = state["door_plan"].doors
-    seen = set()
-    filtered = []
-    for d in doors:
-        key = tuple(sorted([d.from_room, d.to_room]))
-        if key not in seen:
-            seen.add(key)
-            filtered.append(d)
-    
-    removed_count = len(doors) - len(filtered)
-    state["door_plan"].doors = filtered
-    
-    if removed_count > 0:
-        print_warning(f"Removed {removed_count} duplicate door connections")
-    print_success("Plan validation complete")
+def should_render_plan(state: FloorPlanState, config=None) -> str:
+    """Reject plans with invalid geometry or doors before paying for rendering."""
+    events = get_events(config)
+    layout_report = state.get("layout_report")
+    plan_report = state.get("plan_report")
+    valid = (layout_report is None or layout_report.valid) and (plan_report is None or plan_report.valid)
+    if valid:
+        return "CONTINUE"
+
+    if os.getenv("REJECT_INVALID_PLANS", "1").lower() in ("0", "false", "no", "off"):
+        events.warning("Plan has validation errors - rendering anyway (REJECT_INVALID_PLANS=0)", "validate_plan")
+        return "CONTINUE"
+    events.error("Plan rejected - fix the validation errors above or set REJECT_INVALID_PLANS=0", "validate_plan")
+    return "END"
+
+def _save_plan(state: FloorPlanState) -> str:
+    filename = _output_path(state)
+    with open(filename, "wb") as f:
+        f.write(state['rendered_plan'])
+    return filename
+
+def _artifacts_enabled() -> bool:
+    return os.getenv("PLAN_ARTIFACTS", "1").lower() not in ("0", "false", "no", "off")
+
+def _llm_stages(state: FloorPlanState) -> list:
+    """The LLM stages this run went through, in pipeline order.
+
+    Nodes note their own LLM calls in the state; the validators run in
+    routers, which cannot write to it, so their use of the LLM is derived
+    from the same rules they apply.
+    """
+    used = set(state.get("llm_stages") or [])
+    if prevalidate_request(state.get("input", ""))[0] is None:
+        used.add("verify_request")
+    if _allocation_llm_check():
+        used.add("validate_allocation")
+    return [stage for stage in LLM_STAGES if stage in used]
+
+def _resolved_route(stage: str) -> dict:
+    """Provider, model and temperature a stage's calls went to, with the global defaults filled in."""
+    route = stage_route(stage)
+    return {
+        "provider": route.provider or os.getenv("LLM_PROVIDER", "google_genai"),
+        "model": route.model or os.getenv("LLM_MODEL", "gemini-2.5-flash"),
+        "temperature": route.temperature if route.temperature is not None else _llm_temperature(),
+    }
+
+def _generation_metadata(state: FloorPlanState) -> dict:
+    """How the plan was generated, recorded in its artifact."""
+    return {
+        "llm_routes": {stage: _resolved_route(stage) for stage in _llm_stages(state)},
+        "room_planner": _room_planner_mode(),
+        "layout_candidates": _layout_candidates(),
+        "door_planner": _door_planner_mode(),
+        "renderer": _plan_renderer_mode(),
+        "layout_repairs": state.get("layout_repairs", 0),
+        "output_path": state.get("output_path"),
+    }
+
+def _save_artifact(state: FloorPlanState) -> str:
+    """Write the plan artifact next to the image so it can be re-rendered without the LLM."""
+    artifact = build_artifact(state, _generation_metadata(state))
+    return save_artifact(artifact, artifact_path(state["output_path"]))
+
+def _save_outputs(state: FloorPlanState) -> FloorPlanState:
+    state['output_path'] = _save_plan(state)
+    if _artifacts_enabled():
+        state['artifact_path'] = _save_artifact(state)
     return state
 
-def plan_output(state: FloorPlanState) -> FloorPlanState:
-    print_step("Final Output", "💾")
-    print_info("Saving floor plan to file...")
-    
-    fig = state['rendered_plan']
-    filename = 'floor_plan.png'
-    fig.savefig(filename)
-    
-    print_success(f"Floor plan saved as '{filename}'")
+def _report_plan_summary(events: EventBus, state: FloorPlanState, filename: str):
+    events.success(f"Floor plan saved as '{filename}'", "plan_output")
     
     # Create a nice summary box
     room_summary = []
@@ -322,54 +895,187 @@ Room Breakdown:
 {chr(10).join(room_summary)}
 
 Output File: {filename}"""
+    if state.get("artifact_path"):
+        summary_content += f"\nPlan Artifact: {state['artifact_path']}"
+
+    metrics = events.find(MetricsSubscriber)
+    if metrics is not None and metrics.run(events.run_id):
+        summary_content += f"\n\nStage Breakdown:\n{format_breakdown(metrics.run(events.run_id))}"
     
-    print_result_box("FLOOR PLAN COMPLETE", summary_content)
+    events.result("FLOOR PLAN COMPLETE", summary_content, "plan_output")
+
+def plan_output(state: FloorPlanState, config=None) -> FloorPlanState:
+    events = get_events(config)
+    with events.stage("plan_output", "Final Output", "💾"):
+        events.info("Saving floor plan to file...", "plan_output")
+        _save_outputs(state)
+        _report_plan_summary(events, state, state['output_path'])
     return state
 
+async def aplan_output(state: FloorPlanState, config=None) -> FloorPlanState:
+    """Async version of plan_output; file saving runs in a worker thread."""
+    events = get_events(config)
+    with events.stage("plan_output", "Final Output", "💾"):
+        events.info("Saving floor plan to file...", "plan_output")
+        await asyncio.to_thread(_save_outputs, state)
+        _report_plan_summary(events, state, state['output_path'])
+    return state
 
-workflow = StateGraph(FloorPlanState)
 
-workflow.add_node("verify_request", verify_request)
-workflow.add_node("room_allocator", room_allocator)
-workflow.add_node("validate_allocation", validate_allocation)
-workflow.add_node("room_planner", room_planner)
-workflow.add_node("door_planner", door_planner)
-workflow.add_node("validate_plan", validate_plan)
-workflow.add_node("plan_renderer", plan_renderer)
-workflow.add_node("plan_output", plan_output)
+def _inline(func):
+    """Async wrapper that runs a cheap, non-blocking function directly on the event loop."""
+    @functools.wraps(func)
+    async def afunc(*args, **kwargs):
+        return func(*args, **kwargs)
+    return afunc
 
-workflow.set_entry_point("verify_request")
+def _node(func, afunc=None):
+    """Combine sync and async implementations so the graph supports invoke() and ainvoke()."""
+    from langchain_core.runnables import RunnableLambda
+    return RunnableLambda(func, afunc=afunc or _inline(func), name=func.__name__)
 
-# First validation checkpoint - check input
-workflow.add_conditional_edges(
-    "verify_request",
-    should_continue_after_verification,
-    {
-        "CONTINUE": "room_allocator",
-        "END": END
-    }
-)
 
-# Second validation checkpoint - check allocation results
-workflow.add_edge("room_allocator", "validate_allocation")
-workflow.add_conditional_edges(
-    "validate_allocation", 
-    should_continue_after_allocation,
-    {
-        "CONTINUE": "room_planner",
-        "END": END
-    }
-)
+def _batch_configs(inputs: list, config) -> list:
+    """One config per batch input, as Runnable.batch() accepts a single shared config or a list."""
+    if isinstance(config, list):
+        return config
+    return [config] * len(inputs)
+
+
+class Workflow:
+    """The compiled graph; runs started without an EventBus get one terminal UI bus each.
+
+    Anything other than invoking, batching and streaming is delegated to the graph.
+    """
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def invoke(self, input, config=None, **kwargs):
+        with console_run(config) as config:
+            return self._graph.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        with console_run(config) as config:
+            return await self._graph.ainvoke(input, config, **kwargs)
+
+    def stream(self, input, config=None, **kwargs):
+        with console_run(config) as config:
+            yield from self._graph.stream(input, config, **kwargs)
+
+    async def astream(self, input, config=None, **kwargs):
+        with console_run(config) as config:
+            async for chunk in self._graph.astream(input, config, **kwargs):
+                yield chunk
+
+    async def astream_events(self, input, config=None, **kwargs):
+        with console_run(config) as config:
+            async for event in self._graph.astream_events(input, config, **kwargs):
+                yield event
+
+    def batch(self, inputs, config=None, **kwargs):
+        with console_runs(_batch_configs(inputs, config)) as configs:
+            return self._graph.batch(inputs, configs, **kwargs)
+
+    async def abatch(self, inputs, config=None, **kwargs):
+        with console_runs(_batch_configs(inputs, config)) as configs:
+            return await self._graph.abatch(inputs, configs, **kwargs)
 
-workflow.add_edge("room_planner", "door_planner")
-workflow.add_edge("door_planner", "validate_plan")
-workflow.add_edge("validate_plan", "plan_renderer")
-workflow.add_edge("plan_renderer", "plan_output")
+    def __getattr__(self, name):
+        graph = self.__dict__.get("_graph")
+        if graph is None:
+            raise AttributeError(name)
+        return getattr(graph, name)
 
-graph = workflow.compile()
+
+def build_graph(checkpointer=None):
+    """Build and compile the floor plan workflow.
+
+    With a checkpointer (see checkpoints.py) the state is saved after every
+    node, and runs are keyed by config["configurable"]["thread_id"].
+    """
+    from langgraph.graph import StateGraph, END
+
+    load_env()
+    workflow = StateGraph(FloorPlanState)
+
+    workflow.add_node("verify_request", _node(verify_request))
+    workflow.add_node("room_allocator", _node(room_allocator, aroom_allocator))
+    workflow.add_node("validate_allocation", _node(validate_allocation))
+    workflow.add_node("room_planner", _node(room_planner, aroom_planner))
+    workflow.add_node("validate_layout", _node(validate_layout))
+    workflow.add_node("repair_layout", _node(repair_layout, arepair_layout))
+    workflow.add_node("door_planner", _node(door_planner, adoor_planner))
+    workflow.add_node("validate_plan", _node(validate_plan))
+    workflow.add_node("plan_renderer", _node(plan_renderer, aplan_renderer))
+    workflow.add_node("plan_output", _node(plan_output, aplan_output))
+
+    workflow.set_entry_point("verify_request")
+
+    # First validation checkpoint - check input
+    workflow.add_conditional_edges(
+        "verify_request",
+        _node(should_continue_after_verification, ashould_continue_after_verification),
+        {
+            "CONTINUE": "room_allocator",
+            "END": END
+        }
+    )
+
+    # Second validation checkpoint - check allocation results
+    workflow.add_edge("room_allocator", "validate_allocation")
+    workflow.add_conditional_edges(
+        "validate_allocation", 
+        _node(should_continue_after_allocation, ashould_continue_after_allocation),
+        {
+            "CONTINUE": "room_planner",
+            "END": END
+        }
+    )
+
+    workflow.add_edge("room_planner", "validate_layout")
+
+    # Repair loop - fix invalid layouts without re-running the whole graph
+    workflow.add_conditional_edges(
+        "validate_layout",
+        _node(should_repair_layout),
+        {
+            "REPAIR": "repair_layout",
+            "CONTINUE": "door_planner"
+        }
+    )
+    workflow.add_edge("repair_layout", "validate_layout")
+
+    workflow.add_edge("door_planner", "validate_plan")
+
+    # Third validation checkpoint - reject invalid plans before rendering
+    workflow.add_conditional_edges(
+        "validate_plan",
+        _node(should_render_plan),
+        {
+            "CONTINUE": "plan_renderer",
+            "END": END
+        }
+    )
+
+    workflow.add_edge("plan_renderer", "plan_output")
+
+    return Workflow(workflow.compile(checkpointer=checkpointer))
+
+
+def __getattr__(name):
+    # Lazily create the module-level `graph` and `llm` kept for existing callers
+    if name == "graph":
+        globals()["graph"] = build_graph()
+        return globals()["graph"]
+    if name == "llm":
+        return get_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_user_input():
     """Get floor plan request from user with examples and validation."""
+    from niceterminalui import print_info, print_warning
+
     print_info("🏠 Describe your ideal floor plan using natural language")
     print()
     
@@ -395,9 +1101,201 @@ def get_user_input():
         return user_input
 
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="WhitePrint AI floor plan generator")
+    subparsers = parser.add_subparsers(dest="command")
+
+    batch_parser = subparsers.add_parser("batch", help="Run floor plan requests from a JSONL file")
+    batch_parser.add_argument("input", help="JSONL file with one request per line")
+    batch_parser.add_argument("-o", "--results", default="results.jsonl", help="JSONL file to append results to")
+    batch_parser.add_argument("-d", "--output-dir", default="plans", help="Directory for generated floor plans")
+    batch_parser.add_argument(
+        "-c", "--concurrency", type=int,
+        default=int(os.getenv("BATCH_CONCURRENCY", str(DEFAULT_CONCURRENCY))),
+        help="Maximum number of requests in flight"
+    )
+    batch_parser.add_argument(
+        "--metrics-json", default=os.getenv("METRICS_JSON"), help="Write a JSON metrics summary to this file"
+    )
+    batch_parser.add_argument(
+        "--metrics-prom", default=os.getenv("METRICS_PROM"), help="Write metrics to this Prometheus textfile"
+    )
+
+    serve_parser = subparsers.add_parser("serve", help="Serve floor plan requests over HTTP")
+    serve_parser.add_argument("--host", default=os.getenv("SERVER_HOST", "127.0.0.1"), help="Interface to bind")
+    serve_parser.add_argument("--port", type=int, default=int(os.getenv("SERVER_PORT", "8000")), help="Port to listen on")
+    serve_parser.add_argument(
+        "-w", "--workers", type=int, default=int(os.getenv("SERVER_WORKERS", str(DEFAULT_WORKERS))),
+        help="Requests processed concurrently"
+    )
+    serve_parser.add_argument(
+        "-q", "--queue-size", type=int, default=int(os.getenv("SERVER_QUEUE_SIZE", str(DEFAULT_QUEUE_SIZE))),
+        help="Requests allowed to wait for a worker before answering 429"
+    )
+    serve_parser.add_argument("-d", "--output-dir", default="server_plans", help="Directory for generated floor plans")
+
+    resume_parser = subparsers.add_parser("resume", help="Resume a failed or interrupted run from its last checkpoint")
+    resume_parser.add_argument("thread_id", help="Run id printed when the run stopped")
+
+    render_parser = subparsers.add_parser("render", help="Re-render saved plan artifacts without any LLM calls")
+    render_parser.add_argument("artifacts", nargs="+", help="Artifact files, directories or glob patterns")
+    render_parser.add_argument("-d", "--output-dir", default="rendered", help="Directory for the rendered images")
+    render_parser.add_argument("-f", "--format", default="png", choices=("png", "svg", "pdf"), help="Image format")
+    render_parser.add_argument(
+        "-r", "--renderer", default=_plan_renderer_mode(), choices=("matplotlib", "svg"),
+        help="Renderer to use (svg implies --format svg)"
+    )
+    render_parser.add_argument("--dpi", type=float, help="Resolution of matplotlib output")
+    render_parser.add_argument("--colors", help="JSON file mapping room types to colors, e.g. {\"Kitchen\": \"#FFAA00\"}")
+
+    return parser.parse_args(argv)
+
+
+def export_metrics(metrics: MetricsSubscriber, json_path: str | None = None, prom_path: str | None = None) -> list:
+    """Write the metrics summary to the JSON and/or Prometheus files requested; returns the paths written."""
+    written = []
+    if json_path:
+        written.append(metrics.write_json(json_path))
+    if prom_path:
+        written.append(metrics.write_prometheus(prom_path))
+    return written
+
+
+def batch_main(args):
+    from niceterminalui import print_info, print_result_box
+
+    print_info(f"🚀 Running batch '{args.input}' with concurrency {args.concurrency}")
+    metrics = MetricsSubscriber()
+    start = time.perf_counter()
+    counts = run_batch(
+        build_graph(checkpointer_from_env()), args.input, args.results, args.output_dir, args.concurrency, metrics
+    )
+    elapsed = time.perf_counter() - start
+    written = export_metrics(metrics, args.metrics_json, args.metrics_prom)
+    print_result_box("BATCH COMPLETE", f"""Succeeded: {counts['ok']}
+Rejected: {counts['rejected']}
+Failed: {counts['error']}
+
+Elapsed: {elapsed:.1f}s
+Results File: {args.results}
+
+Stage Totals:
+{format_breakdown(metrics.stages())}""" + "".join(f"\nMetrics File: {path}" for path in written))
+
+
+def serve_main(args):
+    from niceterminalui import print_info
+
+    def ready(server):
+        host, port = server.server_address[:2]
+        print_info(
+            f"🌐 Serving on http://{host}:{port} with {args.workers} worker(s) and a queue of {args.queue_size}"
+        )
+
+    serve(
+        build_graph(), args.host, args.port, args.workers, args.queue_size, args.output_dir,
+        metrics=MetricsSubscriber(), ready=ready
+    )
+
+
+def render_main(args):
+    from niceterminalui import print_info, print_error, print_result_box
+
+    colors = None
+    if args.colors:
+        with open(args.colors, encoding="utf-8") as f:
+            colors = json.load(f)
+    image_format = "svg" if args.renderer == "svg" else args.format
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    print_info(f"🎨 Re-rendering plan artifacts into '{args.output_dir}'")
+    start = time.perf_counter()
+    rendered = failed = 0
+    for path in iter_artifact_paths(args.artifacts):
+        name = os.path.basename(path)
+        name = name.removesuffix(ARTIFACT_SUFFIX) if name.endswith(ARTIFACT_SUFFIX) else os.path.splitext(name)[0]
+        filename = os.path.join(args.output_dir, f"{name}.{image_format}")
+        try:
+            image = render_artifact(load_artifact(path), image_format, args.renderer, args.dpi, colors)
+            with open(filename, "wb") as f:
+                f.write(image)
+            rendered += 1
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print_error(f"Could not render '{path}': {e}")
+            failed += 1
+    elapsed = time.perf_counter() - start
+    print_result_box("RENDER COMPLETE", f"""Rendered: {rendered}
+Failed: {failed}
+
+Elapsed: {elapsed:.1f}s
+Output Directory: {args.output_dir}""")
+
+
+def _print_resume_hint(graph, config):
+    """Tell the user how to pick up a run that stopped with a saved checkpoint."""
+    from niceterminalui import print_info
+
+    if config is not None and is_resumable(graph, config):
+        thread_id = config["configurable"]["thread_id"]
+        print_info(f"Progress was saved - continue with: python main.py resume {thread_id}")
+
+
+def resume_main(args):
+    from niceterminalui import print_info, print_warning, print_error
+
+    checkpointer = checkpointer_from_env()
+    if checkpointer is None:
+        print_error("Checkpoints are disabled (CHECKPOINTS=0) - there is nothing to resume")
+        return
+    graph = build_graph(checkpointer)
+    metrics = MetricsSubscriber()
+    config = thread_config(args.thread_id, EventBus([ConsoleSubscriber(), metrics]))
+    if not is_resumable(graph, config):
+        print_warning(f"Run '{args.thread_id}' has no unfinished work to resume")
+        return
+
+    print_info(f"🔁 Resuming run '{args.thread_id}' from its last completed step")
+    try:
+        graph.invoke(None, config=config)
+        discard_finished(graph, config)
+    except KeyboardInterrupt:
+        print()
+        print_warning("Generation cancelled by user")
+        _print_resume_hint(graph, config)
+    except Exception as e:
+        print_error(f"Floor plan generation failed: {e}")
+        _print_resume_hint(graph, config)
+    export_metrics(metrics, os.getenv("METRICS_JSON"), os.getenv("METRICS_PROM"))
+
+
 def main():
+    args = parse_args()
+    if args.command == "batch":
+        batch_main(args)
+        return
+    if args.command == "render":
+        render_main(args)
+        return
+    if args.command == "resume":
+        resume_main(args)
+        return
+    if args.command == "serve":
+        serve_main(args)
+        return
+
+    from niceterminalui import (
+        print_banner,
+        print_warning,
+        print_error,
+        print_info,
+        print_completion_message
+    )
+    graph = build_graph(checkpointer_from_env())
+    metrics = MetricsSubscriber()
+    config = None
+
     # Uncomment to get the workflow diagram
-    # generate_mermaid_diagram(graph)
+    # from utils import generate_mermaid_diagram; generate_mermaid_diagram(graph)
     print_banner(
         title="WhitePrint AI", 
         subtitle="Intelligent Architectural Design Assistant", 
@@ -414,15 +1312,24 @@ def main():
         print()
         
         # Process the request
-        result = graph.invoke({"input": user_request})
+        events = EventBus([ConsoleSubscriber(), metrics])
+        config = thread_config(events.run_id, events)
+        result = run_or_resume(graph, {"input": user_request}, config)
+        cache = get_llm_cache()
+        if cache is not None and cache.hits + cache.misses:
+            stats = cache.stats()
+            print_info(f"LLM cache: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)")
         print_completion_message("AI Floor Plan Generator", "Beautiful Architecture Made Simple")
         
     except KeyboardInterrupt:
         print()
         print_warning("Generation cancelled by user")
+        _print_resume_hint(graph, config)
     except Exception as e:
         print_error(f"Floor plan generation failed: {e}")
         print_info("Please check your input and try again")
+        _print_resume_hint(graph, config)
+    export_metrics(metrics, os.getenv("METRICS_JSON"), os.getenv("METRICS_PROM"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,230 @@
+"""
+Per-stage latency and token accounting.
+
+MetricsSubscriber listens on one or more EventBuses and aggregates, for
+every workflow stage, the node wall time and each LLM call's duration,
+queue time, input/output tokens, retries and cache hits - per run and
+across runs. The totals can be exported as a JSON summary or as a
+Prometheus textfile (for node_exporter's textfile collector).
+
+Token counts come from the responses' usage metadata, collected by the
+LangChain callback returned by call_recorder().
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+
+from events import STAGE_FINISHED, LLM_CALL_RETURNED
+
+
+METRIC_PREFIX = "whiteprint"
+
+
+@functools.cache
+def _recorder_class():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class CallRecorder(BaseCallbackHandler):
+        """Record when a model call actually starts, its attempts and its token usage."""
+
+        run_inline = True
+
+        def __init__(self):
+            self.created_at = time.perf_counter()
+            self.started_at = None
+            self.attempts = 0
+            self.input_tokens = 0
+            self.output_tokens = 0
+            self.cache_hit = False
+
+        def _start(self):
+            if self.started_at is None:
+                self.started_at = time.perf_counter()
+            self.attempts += 1
+
+        def on_chat_model_start(self, serialized, messages, **kwargs):
+            self._start()
+
+        def on_llm_start(self, serialized, prompts, **kwargs):
+            self._start()
+
+        def on_llm_end(self, response, **kwargs):
+            for generations in response.generations:
+                for generation in generations:
+                    usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    self.input_tokens += usage.get("input_tokens", 0)
+                    self.output_tokens += usage.get("output_tokens", 0)
+
+        def on_cache_hit(self):
+            """Called by CachedChatModel when it answers from the LLM cache."""
+            self.cache_hit = True
+
+        def stats(self) -> dict:
+            """Queue time, retries, tokens and whether the call was served from the cache."""
+            return {
+                "queue_time": self.started_at - self.created_at if self.started_at is not None else 0.0,
+                "retries": max(self.attempts - 1, 0),
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "cached": self.cache_hit,
+            }
+
+    return CallRecorder
+
+
+def call_recorder():
+    """Create a callback handler to pass in the config of a single LLM call."""
+    return _recorder_class()()
+
+
+def _empty_stage() -> dict:
+    return {
+        "runs": 0,
+        "errors": 0,
+        "wall_s": 0.0,
+        "max_wall_s": 0.0,
+        "llm_calls": 0,
+        "llm_errors": 0,
+        "llm_s": 0.0,
+        "queue_s": 0.0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "retries": 0,
+        "cache_hits": 0,
+    }
+
+
+def _add(totals: dict, stage: dict):
+    for key, value in stage.items():
+        if key == "max_wall_s":
+            totals[key] = max(totals[key], value)
+        else:
+            totals[key] += value
+
+
+class MetricsSubscriber:
+    """Aggregate stage and LLM call metrics from workflow events, safe to share between runs."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs = {}
+
+    def __call__(self, event):
+        if event.kind not in (STAGE_FINISHED, LLM_CALL_RETURNED) or event.stage is None:
+            return
+        data = event.data
+        with self._lock:
+            stages = self._runs.setdefault(event.run_id, {})
+            stage = stages.setdefault(event.stage, _empty_stage())
+            if event.kind == STAGE_FINISHED:
+                duration = data.get("duration", 0.0)
+                stage["runs"] += 1
+                stage["errors"] += data.get("status") != "ok"
+                stage["wall_s"] += duration
+                stage["max_wall_s"] = max(stage["max_wall_s"], duration)
+            else:
+                stage["llm_calls"] += 1
+                stage["llm_errors"] += data.get("error") is not None
+                stage["llm_s"] += data.get("duration", 0.0)
+                stage["queue_s"] += data.get("queue_time", 0.0)
+                stage["input_tokens"] += data.get("input_tokens", 0)
+                stage["output_tokens"] += data.get("output_tokens", 0)
+                stage["retries"] += data.get("retries", 0)
+                stage["cache_hits"] += bool(data.get("cached")) and data.get("error") is None
+
+    def run(self, run_id: str) -> dict:
+        """Per-stage metrics of one run, in the order the stages finished."""
+        with self._lock:
+            return {name: dict(stage) for name, stage in self._runs.get(run_id, {}).items()}
+
+    def stages(self) -> dict:
+        """Per-stage metrics summed over every run."""
+        totals = {}
+        with self._lock:
+            for stages in self._runs.values():
+                for name, stage in stages.items():
+                    _add(totals.setdefault(name, _empty_stage()), stage)
+        return totals
+
+    def summary(self) -> dict:
+        """JSON-serializable summary: totals across runs, per stage and per run."""
+        stages = self.stages()
+        totals = _empty_stage()
+        for stage in stages.values():
+            _add(totals, stage)
+        with self._lock:
+            runs = {run_id: {name: dict(stage) for name, stage in run.items()} for run_id, run in self._runs.items()}
+        return {
+            "generated_at": time.time(),
+            "run_count": len(runs),
+            "totals": totals,
+            "stages": stages,
+            "runs": runs,
+        }
+
+    def write_json(self, path: str) -> str:
+        """Write summary() to path."""
+        _write_atomically(path, json.dumps(self.summary(), indent=2))
+        return path
+
+    def prometheus(self) -> str:
+        """Cross-run stage metrics in the Prometheus text exposition format."""
+        stages = self.stages()
+        with self._lock:
+            run_count = len(self._runs)
+        lines = [
+            f"# HELP {METRIC_PREFIX}_runs_total Workflow runs observed",
+            f"# TYPE {METRIC_PREFIX}_runs_total counter",
+            f"{METRIC_PREFIX}_runs_total {run_count}",
+        ]
+        metrics = (
+            ("stage_runs_total", "runs", "Executions of each workflow stage"),
+            ("stage_errors_total", "errors", "Failed executions of each workflow stage"),
+            ("stage_seconds_total", "wall_s", "Wall time spent in each workflow stage"),
+            ("llm_calls_total", "llm_calls", "LLM calls made by each stage"),
+            ("llm_errors_total", "llm_errors", "Failed LLM calls made by each stage"),
+            ("llm_seconds_total", "llm_s", "Wall time of the LLM calls made by each stage"),
+            ("llm_queue_seconds_total", "queue_s", "Time LLM calls waited before reaching the model"),
+            ("llm_input_tokens_total", "input_tokens", "Input tokens reported by the model"),
+            ("llm_output_tokens_total", "output_tokens", "Output tokens reported by the model"),
+            ("llm_retries_total", "retries", "LLM call retries"),
+            ("llm_cache_hits_total", "cache_hits", "LLM calls served from the local cache"),
+        )
+        for name, key, help_text in metrics:
+            lines.append(f"# HELP {METRIC_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} counter")
+            for stage, values in sorted(stages.items()):
+                lines.append(f'{METRIC_PREFIX}_{name}{{stage="{stage}"}} {values[key]:g}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> str:
+        """Write prometheus() to a textfile, replacing it atomically."""
+        _write_atomically(path, self.prometheus())
+        return path
+
+
+def _write_atomically(path: str, text: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(temp_path, path)
+
+
+def format_breakdown(stages: dict) -> str:
+    """One summary line per stage, for the terminal result box."""
+    lines = []
+    for name, stage in stages.items():
+        line = f"• {name}: {stage['wall_s']:.2f}s"
+        if stage["llm_calls"]:
+            line += f" ({stage['llm_calls']} LLM call(s) in {stage['llm_s']:.2f}s"
+            if stage["cache_hits"]:
+                line += f", {stage['cache_hits']} cached"
+            line += f", {stage['input_tokens']:,} in / {stage['output_tokens']:,} out tokens)"
+        lines.append(line)
+    return "\n".join(lines)
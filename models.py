@@ -1,7 +1,5 @@
-from typing import List, Dict, TypedDict, Any, Annotated, Literal
+from typing import List, Dict, TypedDict, Any, Literal
 from pydantic import BaseModel, Field
-from matplotlib.figure import Figure
-from langgraph.graph import add_messages
 
 
 class Room(BaseModel):
@@ -46,14 +44,64 @@ class DoorPlan(BaseModel):
     doors: List[DoorLayout]
 
 
+class ValidationIssue(BaseModel):
+    rule: str = Field(description="Identifier of the rule that was violated")
+    severity: Literal["error", "warning"]
+    message: str
+    rooms: List[str] = Field(default_factory=list, description="Rooms involved in the issue")
+
+
+class AllocationReport(BaseModel):
+    valid: bool
+    total_room_area: float
+    issues: List[ValidationIssue] = Field(default_factory=list)
+
+
+class RoomOverlap(BaseModel):
+    rooms: List[str] = Field(description="Names of the two overlapping rooms")
+    area: float = Field(description="Overlapping area in m²")
+
+
+class LayoutReport(BaseModel):
+    valid: bool
+    coverage: float = Field(description="Fraction of the house footprint covered by rooms")
+    overlaps: List[RoomOverlap] = Field(default_factory=list)
+    out_of_bounds: List[str] = Field(default_factory=list)
+    detached_ensuites: List[str] = Field(
+        default_factory=list, description="Ensuite bathrooms not sharing a wall with their bedroom"
+    )
+    area_mismatches: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Relative difference between each room's area and width*height"
+    )
+    issues: List[ValidationIssue] = Field(default_factory=list)
+
+
+class PlanReport(BaseModel):
+    valid: bool
+    invalid_doors: List[str] = Field(
+        default_factory=list,
+        description="Doors ('from_room -> to_room') not placed on a wall shared by their rooms"
+    )
+    unreachable_rooms: List[str] = Field(default_factory=list)
+    ensuite_violations: List[str] = Field(default_factory=list)
+    issues: List[ValidationIssue] = Field(default_factory=list)
+
+
 class FloorPlanState(TypedDict):
     input: str
     total_area: float
     width: int
     height: int
     rooms: List[Dict[str, Any]]
+    allocation_report: AllocationReport
     plan: LayoutPlan 
+    layout_report: LayoutReport
+    layout_repairs: int
+    llm_stages: List[str]
     door_plan: DoorPlan
-    rendered_plan: Figure
+    plan_report: PlanReport
+    rendered_plan: bytes
+    output_path: str
+    artifact_path: str
     _validation_passed: bool
-    messages: Annotated[list, add_messages]
\ No newline at end of file
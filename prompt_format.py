@@ -0,0 +1,56 @@
+"""
+Compact, deterministic serialization of prompt payloads.
+
+Rooms and layouts used to be interpolated into the prompts as the Python
+repr of pydantic objects, which repeats every field name for every room.
+Here they become small CSV tables with a single header row and rounded
+numbers, which carry the same information in a fraction of the tokens.
+"""
+
+import csv
+import io
+
+
+PRECISION = 2              # decimals kept for coordinates and areas
+CHARS_PER_TOKEN = 4        # rough average for English text and numbers
+
+
+def _attr(item, name):
+    return item.get(name) if isinstance(item, dict) else getattr(item, name)
+
+
+def format_number(value) -> str:
+    """Round to PRECISION decimals and drop trailing zeros, e.g. 12.500 -> '12.5'."""
+    return f"{round(float(value), PRECISION):g}"
+
+
+def _table(header, rows) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue().rstrip("\n")
+
+
+def rooms_table(rooms) -> str:
+    """Allocated rooms as 'name,area' CSV rows (rooms may be Room models or dicts)."""
+    return _table(
+        ("name", "area"),
+        ((_attr(room, "name"), format_number(_attr(room, "area"))) for room in rooms)
+    )
+
+
+def layout_table(layout) -> str:
+    """Placed rooms of a LayoutPlan as 'name,x,y,width,height' CSV rows."""
+    return _table(
+        ("name", "x", "y", "width", "height"),
+        (
+            (room.name, *(format_number(getattr(room, field)) for field in ("x", "y", "width", "height")))
+            for room in layout.rooms
+        )
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a prompt, without loading a tokenizer."""
+    return -(-len(text) // CHARS_PER_TOKEN)
@@ -108,7 +108,7 @@ You are a floor plan layout planner.
 HOUSE SIZE: {width}m x {height}m
 TOTAL AREA: {total_area} m²
 
-ROOMS TO PLACE:
+ROOMS TO PLACE (area in m²):
 {rooms}
 
 LAYOUT STRATEGY:
@@ -149,13 +149,42 @@ GENERAL RULES:
 """)
 
 
+# Room Repair Template
+ROOM_REPAIR_TEMPLATE = PromptTemplate.from_template("""
+You are repairing part of a floor plan layout. Most rooms are already placed
+and MUST NOT move; only re-place the rooms listed under ROOMS TO RE-PLACE.
+
+HOUSE SIZE: {width}m x {height}m
+
+PROBLEMS FOUND:
+{issues}
+
+FIXED ROOMS NEARBY (do not overlap these):
+{fixed_rooms}
+
+FREE SPACE AVAILABLE (x, y, width, height):
+{free_space}
+
+ROOMS TO RE-PLACE (keep close to the target area):
+{rooms}
+
+RULES:
+- Return ONLY the rooms listed under ROOMS TO RE-PLACE, with the same names
+- Place them inside the free space; rectangles must not overlap any other room
+- All rooms fit within house boundaries
+- Bathroom N must share a wall with Bedroom N (ensuite)
+- Each room gets x, y (bottom-left), width, height coordinates
+""")
+
+
 # Door Planner Template
 DOOR_PLANNER_TEMPLATE = PromptTemplate.from_template("""
 You are a floorplan door planner. 
 Generate a list of doors connecting rooms in the house.
 
 You are given the dimensions of a house: width={width}, height={height}.  
-You are also given a list of rooms, with names, x, y, width, and height:{plan}
+You are also given the rooms, with x, y (bottom-left corner), width and height in meters:
+{plan}
 
 ENSUITE BATHROOM CONNECTIVITY (HIGHEST PRIORITY):
 - Bathroom 1 connects ONLY to Bedroom 1 (ensuite)
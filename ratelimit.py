@@ -0,0 +1,264 @@
+"""
+Client-side rate limiting, retries and provider failover for LLM calls.
+
+Every provider/model pair gets one process-wide RateLimiter: a token bucket
+for requests per minute and one for (estimated prompt) tokens per minute,
+shared by all threads and event loops, so concurrent batch, server and
+candidate workers stay under the quota together instead of tripping 429s.
+
+ResilientChatModel wraps the chat model(s). Calls wait for the limiter,
+retry rate-limit, timeout and 5xx errors with jittered exponential backoff
+(honouring Retry-After when the provider sends one), and once the retries
+are used up fail over to the next configured provider/model. Whether the
+last call in the current thread or task was answered by a fallback is
+available from answered_by_fallback(), so callers such as the LLM cache
+can tell the answer apart from one by the configured model.
+"""
+
+from contextvars import ContextVar
+from dataclasses import dataclass
+import asyncio
+import functools
+import os
+import random
+import threading
+import time
+
+from prompt_format import estimate_tokens
+
+
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 1.0     # seconds before the first retry (before jitter)
+DEFAULT_BACKOFF_MAX = 30.0     # upper bound of a single backoff delay
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+# Exception class names used by the provider SDKs for transient failures
+RETRYABLE_ERRORS = {
+    "RateLimitError", "TooManyRequests", "ResourceExhausted", "ServiceUnavailable", "InternalServerError",
+    "ServerError", "APIConnectionError", "APITimeoutError", "DeadlineExceeded", "OverloadedError",
+}
+
+
+class TokenBucket:
+    """Refill `per_minute` units per minute, allowing bursts up to a minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Take `amount` units and return how many seconds to wait before using them.
+
+        Reservations are granted in order, so waiting callers are served
+        first come, first served.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # A single request bigger than the bucket would otherwise never fit
+            self._tokens -= min(amount, self.capacity)
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits for one provider/model (0 = unlimited)."""
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+
+    def reserve(self, tokens: int) -> float:
+        delays = [0.0]
+        if self.requests is not None:
+            delays.append(self.requests.reserve(1))
+        if self.tokens is not None:
+            delays.append(self.tokens.reserve(tokens))
+        return max(delays)
+
+    def acquire(self, tokens: int):
+        delay = self.reserve(tokens)
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self, tokens: int):
+        delay = self.reserve(tokens)
+        if delay:
+            await asyncio.sleep(delay)
+
+
+# Set by ResilientChatModel after each successful call; context-local, so
+# concurrent threads and tasks each see their own call
+_fallback_answer = ContextVar("fallback_answer", default=False)
+
+
+def answered_by_fallback() -> bool:
+    """Whether the last ResilientChatModel call in this context was answered by a fallback route."""
+    return _fallback_answer.get()
+
+
+@functools.cache
+def get_limiter(provider: str, model: str, prefix: str = "LLM") -> RateLimiter:
+    """The limiter shared by every call to provider/model, configured by {prefix}_RPM and {prefix}_TPM."""
+    return RateLimiter(float(os.getenv(f"{prefix}_RPM", "0")), float(os.getenv(f"{prefix}_TPM", "0")))
+
+
+def _status_code(error: BaseException) -> int | None:
+    for attr in ("status_code", "code", "http_status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def _causes(error: BaseException):
+    """The error and the exceptions it was raised from (wrappers often hide the SDK error)."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def is_retryable(error: BaseException) -> bool:
+    """True for rate limits, timeouts, connection errors and 5xx responses."""
+    for cause in _causes(error):
+        if _status_code(cause) in RETRYABLE_STATUS:
+            return True
+        if type(cause).__name__ in RETRYABLE_ERRORS or isinstance(cause, (TimeoutError, ConnectionError)):
+            return True
+    return False
+
+
+def retry_after(error: BaseException) -> float | None:
+    """Seconds from the Retry-After header of the provider response, if any."""
+    for cause in _causes(error):
+        headers = getattr(getattr(cause, "response", None), "headers", None)
+        if headers is None:
+            continue
+        try:
+            return float(headers.get("retry-after"))
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def backoff_delay(attempt: int, base: float = DEFAULT_BACKOFF_BASE, cap: float = DEFAULT_BACKOFF_MAX) -> float:
+    """Full-jitter exponential backoff: uniform between 0 and min(cap, base * 2**attempt)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+@dataclass
+class Route:
+    """One provider/model to try, with its shared limiter."""
+    name: str
+    model: object
+    limiter: RateLimiter
+
+
+class ResilientChatModel:
+    """Wrap one or more chat models with rate limiting, retries and failover, in the order given.
+
+    Non-retryable errors (bad requests, invalid structured output) are
+    raised straight away. Anything not related to invocation is delegated
+    to the first model.
+    """
+
+    def __init__(self, routes: list, max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE, backoff_max: float = DEFAULT_BACKOFF_MAX,
+                 schema=None, temperature: float | None = None):
+        self._routes = routes
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_max = backoff_max
+        self._schema = schema
+        self._temperature = temperature
+        self._runnables = [
+            route.model.with_structured_output(schema) if schema is not None else route.model for route in routes
+        ]
+
+    @classmethod
+    def from_env(cls, routes: list):
+        """Configure retries from LLM_MAX_RETRIES, LLM_BACKOFF_BASE and LLM_BACKOFF_MAX."""
+        return cls(
+            routes,
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", str(DEFAULT_MAX_RETRIES))),
+            backoff_base=float(os.getenv("LLM_BACKOFF_BASE", str(DEFAULT_BACKOFF_BASE))),
+            backoff_max=float(os.getenv("LLM_BACKOFF_MAX", str(DEFAULT_BACKOFF_MAX))),
+        )
+
+    def with_structured_output(self, schema):
+        return ResilientChatModel(
+            self._routes, self._max_retries, self._backoff_base, self._backoff_max, schema, self._temperature
+        )
+
+    def with_temperature(self, temperature: float):
+        """The same routes and clients, sampling every call at `temperature`."""
+        return ResilientChatModel(
+            self._routes, self._max_retries, self._backoff_base, self._backoff_max, self._schema, temperature
+        )
+
+    def _call_kwargs(self, kwargs: dict) -> dict:
+        if self._temperature is None:
+            return kwargs
+        return {"temperature": self._temperature, **kwargs}
+
+    def _delay(self, error: BaseException, attempt: int) -> float:
+        delay = backoff_delay(attempt, self._backoff_base, self._backoff_max)
+        hint = retry_after(error)
+        return max(delay, min(hint, self._backoff_max)) if hint is not None else delay
+
+    def _attempts(self):
+        """(route, runnable, attempt) in the order they should be tried."""
+        for route, runnable in zip(self._routes, self._runnables):
+            for attempt in range(self._max_retries + 1):
+                yield route, runnable, attempt
+
+    def invoke(self, prompt, *args, **kwargs):
+        tokens = estimate_tokens(str(prompt))
+        kwargs = self._call_kwargs(kwargs)
+        last_error = None
+        for route, runnable, attempt in self._attempts():
+            if last_error is not None and attempt > 0:
+                time.sleep(self._delay(last_error, attempt - 1))
+            route.limiter.acquire(tokens)
+            try:
+                result = runnable.invoke(prompt, *args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                last_error = e
+                continue
+            _fallback_answer.set(route is not self._routes[0])
+            return result
+        raise last_error
+
+    async def ainvoke(self, prompt, *args, **kwargs):
+        tokens = estimate_tokens(str(prompt))
+        kwargs = self._call_kwargs(kwargs)
+        last_error = None
+        for route, runnable, attempt in self._attempts():
+            if last_error is not None and attempt > 0:
+                await asyncio.sleep(self._delay(last_error, attempt - 1))
+            await route.limiter.aacquire(tokens)
+            try:
+                result = await runnable.ainvoke(prompt, *args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                last_error = e
+                continue
+            _fallback_answer.set(route is not self._routes[0])
+            return result
+        raise last_error
+
+    def __getattr__(self, name):
+        routes = self.__dict__.get("_routes")
+        if not routes:
+            raise AttributeError(name)
+        return getattr(routes[0].model, name)
@@ -0,0 +1,154 @@
+"""
+Targeted repair of invalid room layouts.
+
+Violations with an obvious local fix are fixed in place: rooms are clamped
+back inside the house, small overlaps are trimmed off one of the two rooms
+and stated areas are synced with the rectangles. Whatever still conflicts is
+isolated so that only those rooms need to be re-planned by the LLM, inside
+the free space the rest of the layout leaves around them.
+"""
+
+from geometry import EPSILON, find_overlaps, free_rectangles, is_out_of_bounds
+from models import LayoutPlan, LayoutReport, RoomLayout
+from validators import AREA_MISMATCH_TOLERANCE, room_type, room_number
+
+
+MAX_TRIM = 0.25            # largest fraction of a room's area an overlap trim may remove
+NEIGHBOUR_MARGIN = 1.0     # m around a conflicting room that counts as its surroundings
+PRECISION = 2              # decimals kept in repaired coordinates
+
+
+def _rect(room):
+    return room.x, room.y, room.x + room.width, room.y + room.height
+
+
+def _with_rect(room: RoomLayout, x0: float, y0: float, x1: float, y1: float) -> RoomLayout:
+    x0, y0 = round(x0, PRECISION), round(y0, PRECISION)
+    x1, y1 = round(x1, PRECISION), round(y1, PRECISION)
+    return room.model_copy(update={
+        "x": x0, "y": y0,
+        "width": round(x1 - x0, PRECISION),
+        "height": round(y1 - y0, PRECISION),
+        "area": round((x1 - x0) * (y1 - y0), PRECISION),
+    })
+
+
+def _gap(a, b) -> float:
+    """Distance between two (x0, y0, x1, y1) rectangles, 0 when they touch or overlap."""
+    dx = max(a[0] - b[2], b[0] - a[2], 0.0)
+    dy = max(a[1] - b[3], b[1] - a[3], 0.0)
+    return max(dx, dy)
+
+
+def clamp_to_bounds(room: RoomLayout, width: float, height: float) -> RoomLayout:
+    """Move a room back inside the footprint, shrinking it only if it is larger than the house."""
+    w, h = min(room.width, width), min(room.height, height)
+    x = min(max(room.x, 0.0), width - w)
+    y = min(max(room.y, 0.0), height - h)
+    return _with_rect(room, x, y, x + w, y + h)
+
+
+def _trim_options(keep: RoomLayout, cut: RoomLayout):
+    """Rectangles for `cut` with one edge moved so it no longer overlaps `keep`."""
+    kx0, ky0, kx1, ky1 = _rect(keep)
+    cx0, cy0, cx1, cy1 = _rect(cut)
+    if cx1 > kx1:
+        yield kx1, cy0, cx1, cy1     # left edge to keep's right wall
+    if cx0 < kx0:
+        yield cx0, cy0, kx0, cy1     # right edge to keep's left wall
+    if cy1 > ky1:
+        yield cx0, ky1, cx1, cy1     # bottom edge to keep's top wall
+    if cy0 < ky0:
+        yield cx0, cy0, cx1, ky0     # top edge to keep's bottom wall
+
+
+def _best_trim(rooms, i: int, j: int):
+    """Cheapest (index, rectangle) trim resolving the overlap of rooms i and j, or None."""
+    best = None
+    for keep, cut in ((i, j), (j, i)):
+        area = rooms[cut].width * rooms[cut].height
+        for x0, y0, x1, y1 in _trim_options(rooms[keep], rooms[cut]):
+            loss = 1 - (x1 - x0) * (y1 - y0) / area if area > 0 else 1.0
+            if loss <= MAX_TRIM and (best is None or loss < best[0]):
+                best = (loss, cut, (x0, y0, x1, y1))
+    return best and best[1:]
+
+
+def repair_locally(layout: LayoutPlan) -> LayoutPlan:
+    """Apply the local fixes: clamp out-of-bounds rooms, trim small overlaps, sync areas.
+
+    Overlaps are trimmed one at a time and recomputed after each trim, since
+    moving a wall can resolve (or expose) other overlaps. Overlaps that would
+    cost a room more than MAX_TRIM of its area are left for re-planning.
+    """
+    width, height = layout.width, layout.height
+    rooms = [
+        clamp_to_bounds(room, width, height) if is_out_of_bounds(room, width, height) else room
+        for room in layout.rooms
+    ]
+
+    for _ in range(len(rooms)):
+        trim = None
+        for i, j, _area in find_overlaps(rooms):
+            trim = _best_trim(rooms, i, j)
+            if trim:
+                break
+        if not trim:
+            break
+        index, rect = trim
+        rooms[index] = _with_rect(rooms[index], *rect)
+
+    for index, room in enumerate(rooms):
+        rect_area = room.width * room.height
+        if rect_area > 0 and abs(room.area - rect_area) / rect_area > AREA_MISMATCH_TOLERANCE:
+            rooms[index] = room.model_copy(update={"area": round(rect_area, PRECISION)})
+
+    return layout.model_copy(update={"rooms": rooms})
+
+
+def conflicting_rooms(layout: LayoutPlan, report: LayoutReport) -> list:
+    """Names of the rooms involved in a layout error, in layout order."""
+    names = set(report.out_of_bounds) | set(report.detached_ensuites)
+    for overlap in report.overlaps:
+        names.update(overlap.rooms)
+    return [room.name for room in layout.rooms if room.name in names]
+
+
+def repair_context(layout: LayoutPlan, conflicting) -> tuple:
+    """Rooms that stay fixed around the conflicting ones, and the free space they can use.
+
+    Returns:
+        tuple: (neighbouring RoomLayouts, free (x, y, width, height) rectangles)
+    """
+    conflicting = set(conflicting)
+    moving = [_rect(room) for room in layout.rooms if room.name in conflicting]
+    fixed = [room for room in layout.rooms if room.name not in conflicting]
+    # Ensuite bathrooms have to end up next to their bedroom, wherever it is
+    partners = {
+        f"Bedroom {room_number(name)}" for name in conflicting
+        if room_type(name) == "Bathroom" and room_number(name)
+    }
+
+    neighbours = [
+        room for room in fixed
+        if room.name in partners or any(_gap(_rect(room), rect) <= NEIGHBOUR_MARGIN for rect in moving)
+    ]
+    free_space = [
+        (x, y, w, h) for x, y, w, h in free_rectangles(fixed, layout.width, layout.height)
+        if w > EPSILON and h > EPSILON
+        and any(_gap((x, y, x + w, y + h), rect) <= NEIGHBOUR_MARGIN for rect in moving)
+    ]
+    return neighbours, free_space
+
+
+def merge_repair(layout: LayoutPlan, repaired: LayoutPlan, conflicting) -> LayoutPlan:
+    """Replace the conflicting rooms with their re-planned versions, ignoring any other room."""
+    replacements = {room.name: room for room in repaired.rooms if room.name in set(conflicting)}
+    rooms = []
+    for room in layout.rooms:
+        new = replacements.get(room.name)
+        if new is not None:
+            x0, y0, x1, y1 = _rect(clamp_to_bounds(new, layout.width, layout.height))
+            room = _with_rect(room, x0, y0, x1, y1)
+        rooms.append(room)
+    return layout.model_copy(update={"rooms": rooms})
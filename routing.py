@@ -0,0 +1,78 @@
+"""
+Per-stage model routing.
+
+Each LLM-calling stage can run on its own provider, model and temperature,
+so the one-word validators can use a small, fast model while layout
+planning uses a stronger one. Routes are read from a JSON file named by
+LLM_ROUTES, keyed by stage (or by the "validators"/"planners" groups):
+
+    {"validators": {"model": "gemini-2.5-flash-lite"},
+     "room_planner": {"provider": "openai", "model": "gpt-4.1", "temperature": 0.2}}
+
+LLM_PROVIDER_<STAGE>, LLM_MODEL_<STAGE> and LLM_TEMPERATURE_<STAGE>
+(e.g. LLM_MODEL_VERIFY_REQUEST) override the file. Anything left unset
+falls back to LLM_PROVIDER, LLM_MODEL and LLM_TEMPERATURE.
+"""
+
+from dataclasses import dataclass, fields, replace
+import json
+import os
+
+
+LLM_STAGES = ("verify_request", "validate_allocation", "room_allocator", "room_planner", "repair_layout", "door_planner")
+STAGE_GROUPS = {
+    "validators": ("verify_request", "validate_allocation"),
+    "planners": ("room_allocator", "room_planner", "repair_layout", "door_planner"),
+}
+
+
+@dataclass(frozen=True)
+class StageRoute:
+    provider: str | None = None
+    model: str | None = None
+    temperature: float | None = None
+
+
+def _route(settings: dict, source: str) -> StageRoute:
+    known = {f.name for f in fields(StageRoute)}
+    unknown = set(settings) - known
+    if unknown:
+        raise ValueError(f"Unknown route setting(s) {sorted(unknown)} in {source} (expected {sorted(known)})")
+    temperature = settings.get("temperature")
+    return StageRoute(
+        provider=settings.get("provider"),
+        model=settings.get("model"),
+        temperature=float(temperature) if temperature is not None else None,
+    )
+
+
+def load_routes(path: str | None = None) -> dict:
+    """Routes per stage from a JSON file; group entries apply to every stage in the group."""
+    if not path:
+        return {}
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+
+    routes = {}
+    # Groups first, so a stage's own entry overrides its group
+    for name in sorted(config, key=lambda name: name not in STAGE_GROUPS):
+        if name not in STAGE_GROUPS and name not in LLM_STAGES:
+            raise ValueError(f"Unknown stage '{name}' in {path} (expected one of {LLM_STAGES + tuple(STAGE_GROUPS)})")
+        route = _route(config[name], path)
+        for stage in STAGE_GROUPS.get(name, (name,)):
+            current = routes.get(stage, StageRoute())
+            routes[stage] = replace(current, **{k: v for k, v in vars(route).items() if v is not None})
+    return routes
+
+
+def stage_route(stage: str) -> StageRoute:
+    """The route for one stage from LLM_ROUTES and the per-stage environment variables."""
+    route = load_routes(os.getenv("LLM_ROUTES")).get(stage, StageRoute())
+    suffix = stage.upper()
+    temperature = os.getenv(f"LLM_TEMPERATURE_{suffix}")
+    return replace(
+        route,
+        provider=os.getenv(f"LLM_PROVIDER_{suffix}") or route.provider,
+        model=os.getenv(f"LLM_MODEL_{suffix}") or route.model,
+        temperature=float(temperature) if temperature else route.temperature,
+    )
@@ -0,0 +1,402 @@
+"""
+HTTP service mode - serve floor plan requests from a single box.
+
+Built on the standard library's ThreadingHTTPServer. Accepted requests
+go on a bounded in-process queue and run on the compiled graph in a fixed
+pool of worker threads, so no external broker is needed. When the queue is
+full, new requests get 429 with a Retry-After header rather than piling up.
+
+Endpoints:
+    POST /plans             {"input": "..."}; waits up to ?wait= seconds (default and maximum 300) for the plan,
+                            ?wait=0 answers 202 with the job id straight away
+    POST /plans/stream      {"input": "..."}; runs straight away and streams each stage's result as
+                            newline-delimited JSON (see streaming.py); disconnecting cancels the run
+    GET  /plans/<id>        job status, plus the plan artifact and base64 image once finished
+    GET  /plans/<id>/image  the rendered image bytes
+    GET  /health            liveness, worker count and queue depth
+    GET  /metrics           stage metrics and queue gauges in the Prometheus text format
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import base64
+import itertools
+import json
+import math
+import os
+import queue
+import threading
+import time
+import uuid
+
+from artifacts import load_artifact
+from checkpoints import discard_finished, run_or_resume, thread_config
+from events import headless
+from metrics import METRIC_PREFIX
+from streaming import stream_plan
+
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_WAIT = 300.0           # seconds POST /plans waits for a result before answering 202
+JOB_HISTORY = 256              # finished jobs kept in memory for GET /plans/<id>
+MAX_BODY_BYTES = 64 * 1024
+RETRY_AFTER = 5                # seconds suggested to clients turned away with 429
+
+IMAGE_TYPES = {"png": "image/png", "svg": "image/svg+xml", "pdf": "application/pdf"}
+HTTP_STATUS = {"ok": HTTPStatus.OK, "rejected": HTTPStatus.UNPROCESSABLE_ENTITY, "error": HTTPStatus.INTERNAL_SERVER_ERROR}
+
+
+class QueueFull(Exception):
+    """Raised by PlanService.submit when every queue slot is taken."""
+
+
+@dataclass
+class Job:
+    id: str
+    input: str
+    submitted_at: float
+    status: str = "queued"
+    started_at: float | None = None
+    finished_at: float | None = None
+    artifact: dict | None = None
+    image: bytes | None = None
+    image_format: str | None = None
+    error: str | None = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def to_dict(self, include_image: bool = True) -> dict:
+        record = {"id": self.id, "status": self.status, "input": self.input}
+        if self.started_at is not None:
+            record["queue_s"] = round(self.started_at - self.submitted_at, 3)
+        if self.finished_at is not None:
+            record["duration_s"] = round(self.finished_at - self.started_at, 3)
+        if self.error:
+            record["error"] = self.error
+        if self.artifact is not None:
+            record["artifact"] = self.artifact
+        if self.image is not None:
+            record["image_format"] = self.image_format
+            if include_image:
+                record["image_base64"] = base64.b64encode(self.image).decode("ascii")
+        return record
+
+
+class PlanService:
+    """Run floor plan requests from a bounded queue on a pool of worker threads."""
+
+    def __init__(self, graph, workers: int = DEFAULT_WORKERS, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 output_dir: str = "server_plans", metrics=None):
+        self.graph = graph
+        self.workers = workers
+        self.output_dir = output_dir
+        self.metrics = metrics
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._running = 0
+        self._streaming = 0
+        # Streamed runs execute on the request thread, so they get their own slots
+        self._stream_slots = threading.BoundedSemaphore(workers)
+        self._counts = {"ok": 0, "rejected": 0, "error": 0, "throttled": 0, "cancelled": 0}
+        self._threads = []
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"plan-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float | None = None):
+        """Let the workers finish the jobs already queued, then stop them."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def submit(self, input_text: str) -> Job:
+        """Queue a request, raising QueueFull instead of waiting for a free slot."""
+        job = Job(id=uuid.uuid4().hex[:12], input=input_text, submitted_at=time.perf_counter())
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+                self._counts["throttled"] += 1
+            raise QueueFull(f"All {self._queue.maxsize} queue slots are taken") from None
+        with self._lock:
+            # Forget the oldest finished jobs beyond the history size
+            while len(self._jobs) > JOB_HISTORY + self._queue.maxsize + self.workers:
+                oldest = next(iter(self._jobs.values()))
+                if not oldest.done.is_set():
+                    break
+                self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queued": self._queue.qsize(),
+                "queue_size": self._queue.maxsize,
+                "running": self._running,
+                "streaming": self._streaming,
+                "jobs": dict(self._counts),
+            }
+
+    def stream(self, input_text: str):
+        """Run a request on the calling thread and yield its stream_plan updates.
+
+        Raises QueueFull when every stream slot is taken. Closing the
+        generator early cancels the run and counts it as cancelled.
+        """
+        if not self._stream_slots.acquire(blocking=False):
+            with self._lock:
+                self._counts["throttled"] += 1
+            raise QueueFull(f"All {self.workers} stream slots are taken")
+        job_id = uuid.uuid4().hex[:12]
+        events = headless(job_id)
+        if self.metrics is not None:
+            events.subscribe(self.metrics)
+        status = "cancelled"
+        with self._lock:
+            self._streaming += 1
+        try:
+            state = {"input": input_text, "output_path": os.path.join(self.output_dir, f"{job_id}.png")}
+            yield {"kind": "accepted", "stage": None, "data": {"id": job_id}}
+            config = thread_config(job_id, events)
+            for update in stream_plan(self.graph, state, config):
+                if update["kind"] == "done":
+                    status = update["data"]["status"]
+                yield update
+            discard_finished(self.graph, config)
+        except Exception as e:
+            status = "error"
+            yield {"kind": "error", "stage": None, "data": {"error": f"{type(e).__name__}: {e}"}}
+        finally:
+            with self._lock:
+                self._streaming -= 1
+                self._counts[status] += 1
+            self._stream_slots.release()
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            with self._lock:
+                self._running += 1
+            try:
+                self._run(job)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._counts[job.status] += 1
+                job.done.set()
+
+    def _run(self, job: Job):
+        job.status = "running"
+        job.started_at = time.perf_counter()
+        events = headless(job.id)
+        if self.metrics is not None:
+            events.subscribe(self.metrics)
+        try:
+            result = run_or_resume(
+                self.graph,
+                {"input": job.input, "output_path": os.path.join(self.output_dir, f"{job.id}.png")},
+                thread_config(job.id, events)
+            )
+            if result.get("rendered_plan") is None:
+                job.status = "rejected"
+                job.error = "Request rejected by validation"
+            else:
+                job.image = result["rendered_plan"]
+                job.image_format = os.path.splitext(result["output_path"])[1].lstrip(".") or "png"
+                if result.get("artifact_path"):
+                    job.artifact = load_artifact(result["artifact_path"])
+                job.status = "ok"
+        except Exception as e:
+            job.status = "error"
+            job.error = f"{type(e).__name__}: {e}"
+        finally:
+            job.finished_at = time.perf_counter()
+
+    def prometheus(self) -> str:
+        """Queue gauges and job counters, followed by the stage metrics."""
+        stats = self.stats()
+        lines = [
+            f"# HELP {METRIC_PREFIX}_queue_depth Requests waiting for a worker",
+            f"# TYPE {METRIC_PREFIX}_queue_depth gauge",
+            f"{METRIC_PREFIX}_queue_depth {stats['queued']}",
+            f"# HELP {METRIC_PREFIX}_queue_capacity Maximum number of waiting requests",
+            f"# TYPE {METRIC_PREFIX}_queue_capacity gauge",
+            f"{METRIC_PREFIX}_queue_capacity {stats['queue_size']}",
+            f"# HELP {METRIC_PREFIX}_jobs_running Requests being processed",
+            f"# TYPE {METRIC_PREFIX}_jobs_running gauge",
+            f"{METRIC_PREFIX}_jobs_running {stats['running']}",
+            f"# HELP {METRIC_PREFIX}_jobs_total Requests by outcome (throttled = answered with 429, cancelled = stream closed early)",
+            f"# TYPE {METRIC_PREFIX}_jobs_total counter",
+        ]
+        lines += [f'{METRIC_PREFIX}_jobs_total{{status="{status}"}} {count}' for status, count in stats["jobs"].items()]
+        text = "\n".join(lines) + "\n"
+        if self.metrics is not None:
+            text += self.metrics.prometheus()
+        return text
+
+
+class PlanRequestHandler(BaseHTTPRequestHandler):
+    server_version = "WhitePrintAI/0.1"
+
+    @property
+    def service(self) -> PlanService:
+        return self.server.service
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict | None = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: dict, headers: dict | None = None):
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json", headers)
+
+    def _send_error(self, status: int, message: str, headers: dict | None = None):
+        self._send_json(status, {"error": message}, headers)
+
+    def _send_job(self, job: Job):
+        if not job.done.is_set():
+            self._send_json(HTTPStatus.ACCEPTED, job.to_dict(), {"Location": f"/plans/{job.id}"})
+        else:
+            self._send_json(HTTP_STATUS[job.status], job.to_dict())
+
+    def do_GET(self):
+        path = urlparse(self.path).path.rstrip("/")
+        parts = path.split("/")[1:]
+        if path == "/health":
+            self._send_json(HTTPStatus.OK, {"status": "ok", **self.service.stats()})
+        elif path == "/metrics":
+            self._send(HTTPStatus.OK, self.service.prometheus().encode("utf-8"), "text/plain; version=0.0.4")
+        elif len(parts) in (2, 3) and parts[0] == "plans":
+            job = self.service.get(parts[1])
+            if job is None:
+                self._send_error(HTTPStatus.NOT_FOUND, f"Unknown job '{parts[1]}'")
+            elif len(parts) == 2:
+                self._send_job(job)
+            elif parts[2] != "image":
+                self._send_error(HTTPStatus.NOT_FOUND, f"Unknown path '{path}'")
+            elif job.image is None:
+                self._send_error(HTTPStatus.NOT_FOUND, f"Job '{job.id}' has no image ({job.status})")
+            else:
+                self._send(HTTPStatus.OK, job.image, IMAGE_TYPES.get(job.image_format, "application/octet-stream"))
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown path '{path}'")
+
+    def _read_input(self, url) -> tuple | None:
+        """Parse the request body into (input text, wait), or send an error and return None."""
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self._send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Request body over {MAX_BODY_BYTES} bytes")
+            return None
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+            input_text = body["input"] if isinstance(body, dict) else body
+        except (ValueError, KeyError, TypeError):
+            self._send_error(HTTPStatus.BAD_REQUEST, 'Expected a JSON body like {"input": "House 500m² with 3 bedrooms"}')
+            return None
+        if not isinstance(input_text, str) or not input_text.strip():
+            self._send_error(HTTPStatus.BAD_REQUEST, "'input' must be a non-empty string")
+            return None
+        try:
+            wait = float(parse_qs(url.query).get("wait", [DEFAULT_WAIT])[0])
+        except ValueError:
+            wait = math.nan
+        if not math.isfinite(wait) or wait < 0:
+            self._send_error(HTTPStatus.BAD_REQUEST, "'wait' must be a finite number of seconds, 0 or more")
+            return None
+        # Longer waits are cut to the default so a request cannot hold a handler thread indefinitely
+        return input_text.strip(), min(wait, DEFAULT_WAIT)
+
+    def _stream(self, input_text: str):
+        """Write each update as one JSON line as soon as it is ready (HTTP/1.0, so the body ends on close)."""
+        updates = self.service.stream(input_text)
+        try:
+            first = next(updates)
+        except QueueFull as e:
+            self._send_error(HTTPStatus.TOO_MANY_REQUESTS, str(e), {"Retry-After": str(RETRY_AFTER)})
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        try:
+            for update in itertools.chain([first], updates):
+                self.wfile.write(json.dumps(update, ensure_ascii=False).encode("utf-8") + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client went away: closing the generator below cancels the run
+        finally:
+            updates.close()
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        path = url.path.rstrip("/")
+        if path not in ("/plans", "/plans/stream"):
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown path '{url.path}'")
+            return
+        parsed = self._read_input(url)
+        if parsed is None:
+            return
+        input_text, wait = parsed
+        if path == "/plans/stream":
+            self._stream(input_text)
+            return
+
+        try:
+            job = self.service.submit(input_text)
+        except QueueFull as e:
+            self._send_error(HTTPStatus.TOO_MANY_REQUESTS, str(e), {"Retry-After": str(RETRY_AFTER)})
+            return
+        if wait > 0:
+            job.done.wait(wait)
+        self._send_job(job)
+
+
+class PlanServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service: PlanService):
+        super().__init__(address, PlanRequestHandler)
+        self.service = service
+
+
+def serve(graph, host: str = "127.0.0.1", port: int = 8000, workers: int = DEFAULT_WORKERS,
+          queue_size: int = DEFAULT_QUEUE_SIZE, output_dir: str = "server_plans", metrics=None, ready=None):
+    """Serve the graph over HTTP until interrupted.
+
+    `ready`, if given, is called with the bound server once it is listening.
+    """
+    service = PlanService(graph, workers, queue_size, output_dir, metrics)
+    service.start()
+    server = PlanServer((host, port), service)
+    if ready is not None:
+        ready(server)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
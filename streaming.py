@@ -0,0 +1,174 @@
+"""
+Stream intermediate results of a run as each node finishes.
+
+stream_plan() and astream_plan() wrap graph.stream/astream and turn node
+updates into small JSON-serializable updates: the validation verdicts, the
+room allocation table, a preview SVG of the layout before doors exist, the
+doors and finally the rendered plan. Callers see the first useful result
+long before the image is written, and can cancel a run early by closing
+the generator (the graph stops at the next node boundary).
+
+Every update is a dict with "kind", "stage" and "data". Verdicts of the
+validation checks come from the reports the validate_* nodes return, so a
+layout that moves on after its repair budget is used up, or a plan rendered
+with REJECT_INVALID_PLANS=0, is still reported as failing.
+"""
+
+import base64
+
+from events import MESSAGE
+from prompt_format import rooms_table
+
+
+# Checks without a report of their own (the LLM has the last word): reaching
+# the next node means the check passed
+VERDICTS = {
+    "room_allocator": ("verify_request", "Input validation passed"),
+    "room_planner": ("validate_allocation", "Allocation validation passed"),
+}
+# Reason given for a check that ended the run when it left no error message
+REJECTIONS = {
+    "verify_request": "Request rejected by input validation",
+    "validate_allocation": "Allocation rejected",
+    "validate_layout": "Layout rejected",
+    "validate_plan": "Plan rejected",
+}
+
+
+def _dump(value):
+    return value.model_dump() if hasattr(value, "model_dump") else value
+
+
+def _update(kind: str, stage: str, **data) -> dict:
+    return {"kind": kind, "stage": stage, "data": data}
+
+
+def _errors(report) -> list:
+    return [issue.message for issue in report.issues if issue.severity == "error"]
+
+
+def _verdict(node: str, state: dict):
+    """Verdict of a validation node from the report it returned, or None if it has none yet."""
+    if node == "validate_allocation":
+        report = state.get("allocation_report")
+        if report is None:
+            return _update("verdict", node, passed=False, message="Allocation could not be validated", issues=[])
+        if not report.valid:
+            return _update("verdict", node, passed=False, message="Allocation has critical issues", issues=_errors(report))
+        # A valid report can still be vetoed by the optional LLM check
+        return None
+    if node == "validate_layout":
+        report = state["layout_report"]
+        message = "Layout accepted" if report.valid else "Layout has geometry errors"
+        return _update("verdict", node, passed=report.valid, message=message, issues=_errors(report))
+    if node == "validate_plan":
+        layout_report, plan_report = state.get("layout_report"), state["plan_report"]
+        issues = _errors(plan_report) + (_errors(layout_report) if layout_report is not None else [])
+        passed = plan_report.valid and (layout_report is None or layout_report.valid)
+        message = "Plan accepted for rendering" if passed else "Plan has validation errors"
+        return _update("verdict", node, passed=passed, message=message, issues=issues)
+    return None
+
+
+def _node_updates(node: str, state: dict):
+    """Client updates for the state a node just returned."""
+    if node == "room_allocator":
+        rooms = [_dump(room) for room in state["rooms"]]
+        yield _update(
+            "allocation", node,
+            total_area=state["total_area"], width=state["width"], height=state["height"],
+            rooms=rooms, table=rooms_table(rooms)
+        )
+    elif node == "validate_allocation" and state.get("allocation_report") is not None:
+        yield _update("allocation_report", node, **_dump(state["allocation_report"]))
+    elif node in ("room_planner", "repair_layout"):
+        from utils import draw_plan_svg
+        layout = _dump(state["plan"])
+        yield _update("layout", node, layout=layout, preview_svg=draw_plan_svg(layout, []))
+    elif node == "validate_layout":
+        yield _update("layout_report", node, **_dump(state["layout_report"]))
+    elif node == "door_planner":
+        yield _update("doors", node, doors=_dump(state["door_plan"])["doors"])
+    elif node == "validate_plan":
+        yield _update("plan_report", node, **_dump(state["plan_report"]))
+    elif node == "plan_output":
+        output_path = state["output_path"]
+        yield _update(
+            "plan", node,
+            output_path=output_path,
+            artifact_path=state.get("artifact_path"),
+            image_format=output_path.rsplit(".", 1)[-1],
+            image_base64=base64.b64encode(state["rendered_plan"]).decode("ascii")
+        )
+
+
+class _Tracker:
+    """Turn (mode, chunk) stream items into client updates and remember how the run ended.
+
+    The routers that end a run report why on the run's EventBus, so the
+    tracker listens to its error messages to give the rejection a reason.
+    """
+
+    def __init__(self, config: dict | None = None):
+        self.last_stage = None
+        self.finished = False
+        self._errors = {}
+        events = (config or {}).get("configurable", {}).get("events")
+        if events is not None:
+            events.subscribe(self._on_event)
+
+    def _on_event(self, event):
+        if event.kind == MESSAGE and event.data.get("level") == "error" and event.stage:
+            self._errors[event.stage] = event.data["text"]
+
+    def updates(self, mode: str, chunk: dict):
+        if mode == "tasks":
+            # Task start events carry the node's input; finish events carry its result
+            if "input" in chunk and chunk.get("name") in VERDICTS:
+                stage, message = VERDICTS[chunk["name"]]
+                yield _update("verdict", stage, passed=True, message=message, issues=[])
+            if "input" in chunk:
+                yield _update("stage_started", chunk.get("name"))
+            return
+        for node, state in chunk.items():
+            if not isinstance(state, dict):
+                continue
+            self.last_stage = node
+            self.finished = self.finished or node == "plan_output"
+            yield from _node_updates(node, state)
+            verdict = _verdict(node, state)
+            if verdict is not None:
+                yield verdict
+
+    def done(self):
+        """The closing updates: a failing verdict for the check that ended the run, then "done"."""
+        stage = self.last_stage
+        if not self.finished and stage in REJECTIONS:
+            reason = self._errors.get(stage, REJECTIONS[stage])
+            yield _update("verdict", stage, passed=False, message=reason, issues=[])
+        status = "ok" if self.finished else "rejected"
+        yield _update("done", stage, status=status)
+
+
+def stream_plan(graph, state: dict, config: dict | None = None):
+    """Run the graph and yield an update as soon as each node has a result.
+
+    The last update has kind "done" and status "ok" or "rejected" (the run
+    stopped at a validation checkpoint, given as its stage); a rejection is
+    preceded by a failing verdict for that check. Exceptions from
+    the graph propagate to the caller.
+    """
+    tracker = _Tracker(config)
+    for mode, chunk in graph.stream(state, config=config, stream_mode=["updates", "tasks"]):
+        yield from tracker.updates(mode, chunk)
+    yield from tracker.done()
+
+
+async def astream_plan(graph, state: dict, config: dict | None = None):
+    """Async version of stream_plan."""
+    tracker = _Tracker(config)
+    async for mode, chunk in graph.astream(state, config=config, stream_mode=["updates", "tasks"]):
+        for update in tracker.updates(mode, chunk):
+            yield update
+    for update in tracker.done():
+        yield update
@@ -1,8 +1,5 @@
-from langgraph.types import Command
-from niceterminalui import create_interactive_prompt, print_warning, print_info
-import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle, Polygon
-import numpy as np
+from xml.sax.saxutils import escape
+import io
 
 ROOM_COLORS = {
     "Living Room": "#F5F0E8",
@@ -17,24 +14,45 @@ ROOM_COLORS = {
     "Backyard": "#90C695",
 }
 
-def get_room_color(name: str):
+def get_room_color(name: str, colors: dict | None = None):
     """
     Pick color based on the base room type.
     E.g., 'Bathroom 1' and 'Bathroom 2' -> 'Bathroom'.
+    `colors` overrides entries of ROOM_COLORS.
     """
     base_name = "".join([c for c in name if not c.isdigit()]).strip()
+    if colors and base_name in colors:
+        return colors[base_name]
     return ROOM_COLORS.get(base_name, "#FFFFFF")  # fallback = white
 
-def draw_plan(plan: dict, door_plan: list):
-    """Render floor plan visualization"""
-    fig, ax = plt.subplots(figsize=(12, 10))
+# Canvas of the SVG renderer, matching the 12x10in / 100dpi matplotlib figure
+SVG_WIDTH = 1200
+SVG_HEIGHT = 1000
+SVG_TITLE_HEIGHT = 50
+SVG_FONT_SIZE = 11
+
+def draw_plan(plan: dict, door_plan: list, colors: dict | None = None):
+    """Render floor plan visualization.
+
+    Uses a standalone Agg Figure rather than pyplot, so the figure is never
+    registered with pyplot's global figure manager and is freed as soon as
+    the caller drops it. matplotlib is imported on first use.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from matplotlib.patches import Rectangle, Polygon
+    import numpy as np
+
+    fig = Figure(figsize=(12, 10))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
     house_w, house_h = plan["width"], plan["height"]
 
     # Draw bounding box
     ax.add_patch(Rectangle((0, 0), house_w, house_h, fill=False, edgecolor='black', lw=2))
 
     for room in plan["rooms"]:
-        color = get_room_color(room["name"])
+        color = get_room_color(room["name"], colors)
         if "polygon" in room:
             poly = Polygon(room["polygon"], facecolor=color, edgecolor='black')
             ax.add_patch(poly)
@@ -70,6 +88,93 @@ def draw_plan(plan: dict, door_plan: list):
     fig.tight_layout()
     return fig
 
+def render_plan(plan: dict, door_plan: list, format: str = "png",
+                dpi: float | None = None, colors: dict | None = None) -> bytes:
+    """Render the floor plan straight to image bytes (png, svg or pdf), releasing the figure."""
+    fig = draw_plan(plan, door_plan, colors)
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=format, dpi=dpi)
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+def iter_plan_svg(plan: dict, door_plan: list, colors: dict | None = None):
+    """Stream a floor plan as SVG text, without matplotlib.
+
+    Takes the same plan/door_plan dicts as draw_plan and draws the same
+    picture: a 1m grid, the house outline, colored rooms labelled with name,
+    W x H and area, brown door markers and the title.
+
+    Yields:
+        str: Consecutive chunks of the SVG document
+    """
+    house_w, house_h = plan["width"], plan["height"]
+    # Fit the house plus a 1m margin on every side, like the matplotlib axes limits
+    scale = min(SVG_WIDTH / (house_w + 2), (SVG_HEIGHT - SVG_TITLE_HEIGHT) / (house_h + 2))
+    left = (SVG_WIDTH - house_w * scale) / 2
+    bottom = SVG_TITLE_HEIGHT + (SVG_HEIGHT - SVG_TITLE_HEIGHT + house_h * scale) / 2
+
+    def px(x, y):
+        return left + x * scale, bottom - y * scale
+
+    def rect(x, y, w, h, style):
+        x0, y1 = px(x, y + h)
+        return f'<rect x="{x0:.1f}" y="{y1:.1f}" width="{w * scale:.1f}" height="{h * scale:.1f}" {style}/>\n'
+
+    yield (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}" height="{SVG_HEIGHT}" '
+        f'viewBox="0 0 {SVG_WIDTH} {SVG_HEIGHT}" font-family="DejaVu Sans, Arial, sans-serif">\n'
+        f'<rect width="100%" height="100%" fill="white"/>\n'
+        f'<text x="{SVG_WIDTH / 2:.1f}" y="{SVG_TITLE_HEIGHT * 0.6:.1f}" font-size="19" text-anchor="middle">'
+        f'Floor Plan {house_w}x{house_h} ({house_w * house_h} m²)</text>\n'
+    )
+
+    labels = []
+    for room in plan["rooms"]:
+        color = get_room_color(room["name"], colors)
+        if "polygon" in room:
+            points = " ".join("{:.1f},{:.1f}".format(*px(x, y)) for x, y in room["polygon"])
+            yield f'<polygon points="{points}" fill="{color}" stroke="black"/>\n'
+            cx = sum([p[0] for p in room["polygon"]]) / len(room["polygon"])
+            cy = sum([p[1] for p in room["polygon"]]) / len(room["polygon"])
+        else:
+            yield rect(room["x"], room["y"], room["width"], room["height"], f'fill="{color}" stroke="black"')
+            cx = room["x"] + room["width"]/2
+            cy = room["y"] + room["height"]/2
+
+        # Label with name, WxH, and Area
+        tx, ty = px(cx, cy)
+        lines = (escape(room["name"]), f"{room['width']:.1f} x {room['height']:.1f} m", f"{room['area']:.1f} m²")
+        labels.append(
+            f'<text x="{tx:.1f}" y="{ty - SVG_FONT_SIZE * 1.2:.1f}" font-size="{SVG_FONT_SIZE}" '
+            f'font-weight="bold" text-anchor="middle" dominant-baseline="middle">'
+            + "".join(f'<tspan x="{tx:.1f}" dy="{0 if i == 0 else SVG_FONT_SIZE * 1.2:.1f}">{line}</tspan>'
+                      for i, line in enumerate(lines))
+            + "</text>\n"
+        )
+
+    for door in door_plan:
+        yield rect(door["x"], door["y"], door["width"], door["height"], 'fill="brown" stroke="black" stroke-width="1.5"')
+
+    # Like matplotlib, the grid goes over the rooms and the labels over the grid
+    grid = ['<g stroke="#b0b0b0" stroke-width="0.8" stroke-dasharray="1,2">\n']
+    for i in range(int(house_w) + 1):
+        (x, y0), (_, y1) = px(i, 0), px(i, house_h)
+        grid.append(f'<line x1="{x:.1f}" y1="{y0:.1f}" x2="{x:.1f}" y2="{y1:.1f}"/>\n')
+    for j in range(int(house_h) + 1):
+        (x0, y), (x1, _) = px(0, j), px(house_w, j)
+        grid.append(f'<line x1="{x0:.1f}" y1="{y:.1f}" x2="{x1:.1f}" y2="{y:.1f}"/>\n')
+    grid.append('</g>\n')
+    yield "".join(grid)
+    yield rect(0, 0, house_w, house_h, 'fill="none" stroke="black" stroke-width="2"')
+    yield "".join(labels)
+    yield "</svg>\n"
+
+def draw_plan_svg(plan: dict, door_plan: list, colors: dict | None = None) -> str:
+    """Render the floor plan as an SVG document string (see iter_plan_svg)."""
+    return "".join(iter_plan_svg(plan, door_plan, colors))
+
 def generate_mermaid_diagram(graph):
     """Generate horizontal Mermaid diagram for the workflow"""
     print(graph.get_graph().draw_mermaid())
\ No newline at end of file
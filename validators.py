@@ -0,0 +1,561 @@
+"""
+Deterministic validators that stand in for the validation LLM calls.
+
+The criteria in the validation prompts are simple numeric rules, so they are
+applied locally. The input validator only consults the LLM when a request
+can't be parsed with confidence, and the allocation validator only when
+ALLOCATION_LLM_CHECK is enabled.
+"""
+
+import re
+
+from collections import deque
+
+from geometry import (
+    EPSILON,
+    room_boxes,
+    find_box_overlaps,
+    union_area,
+    clip_area,
+    shared_walls,
+    shares_wall,
+    boxes_share_wall,
+    exterior_walls
+)
+from models import (
+    FloorPlan,
+    LayoutPlan,
+    DoorPlan,
+    AllocationReport,
+    LayoutReport,
+    PlanReport,
+    RoomOverlap,
+    ValidationIssue
+)
+
+
+OUTSIDE = "Outside"
+
+REASONABLE = "REASONABLE"
+UNREASONABLE = "UNREASONABLE"
+
+# Thresholds mirroring INPUT_VALIDATION_TEMPLATE
+MAX_ROOMS_PER_TYPE = 100          # "100+ of any room type" is impossible
+TYPICAL_ROOMS_PER_TYPE = 20       # above this we let the LLM decide
+MIN_AREA_PER_ROOM = 2.0           # m² per room below which the request is absurd
+COMFORTABLE_AREA_PER_ROOM = 5.0   # m² per room above which the request is clearly fine
+
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "single": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12,
+    "thirteen": 13, "fourteen": 14, "fifteen": 15, "sixteen": 16, "seventeen": 17,
+    "eighteen": 18, "nineteen": 19, "twenty": 20,
+}
+
+ROOM_TYPES = {
+    "bedroom": "Bedroom",
+    "bathroom": "Bathroom",
+    "kitchen": "Kitchen",
+    "living room": "Living Room",
+    "hallway": "Hallway",
+    "storage": "Storage",
+    "dining room": "Dining Room",
+    "utility": "Utility",
+    "garage": "Garage",
+    "office": "Office",
+    "study": "Study",
+    "balcony": "Balcony",
+}
+
+RESIDENTIAL_KEYWORDS = (
+    "house", "home", "apartment", "flat", "bungalow", "villa", "cottage", "cabin",
+    "condo", "townhouse", "duplex", "studio", "residence", "bedroom", "bathroom",
+    "kitchen", "living room",
+)
+
+NON_RESIDENTIAL_KEYWORDS = (
+    "factory", "warehouse", "hospital", "stadium", "airport", "shopping mall", "mall",
+    "office building", "office block", "school", "prison", "power plant", "parking garage",
+    "supermarket", "hotel", "data center", "data centre",
+)
+
+# "1,500" and "1,500.5" use a thousands separator; any other comma is a decimal comma ("12,5")
+_NUMBER = r"(\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:[.,]\d+)?)"
+_THOUSANDS_RE = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?")
+_AREA_RE = re.compile(
+    _NUMBER + r"\s*(?:m²|m\^2|m2|sqm|sq\.?\s*m(?:eters?|etres?)?|square\s+met(?:er|re)s?)",
+    re.IGNORECASE,
+)
+_DIMENSIONS_RE = re.compile(
+    _NUMBER + r"\s*(?:m\s*)?(?:x|×|by)\s*" + _NUMBER + r"\s*m\b(?!²|2)",
+    re.IGNORECASE,
+)
+_ROOM_COUNT_RE = re.compile(
+    r"\b(\d+|" + "|".join(NUMBER_WORDS) + r")\s+(?:[a-z-]+\s+)?("
+    + "|".join(ROOM_TYPES) + r")(?:s|es)?\b",
+    re.IGNORECASE,
+)
+
+
+def _to_float(value: str) -> float:
+    if _THOUSANDS_RE.fullmatch(value):
+        return float(value.replace(",", ""))
+    return float(value.replace(",", "."))
+
+
+def _contains_keyword(text: str, keywords) -> bool:
+    return any(re.search(r"\b" + re.escape(keyword) + r"s?\b", text) for keyword in keywords)
+
+
+def parse_request(text: str) -> dict:
+    """Extract area, dimensions and room counts from a natural language request.
+
+    Returns a dict with "area" (m² or None), "areas" (every area mentioned),
+    "dimensions" ((width, height) or None), "room_counts" ({room type: count})
+    and keyword flags. "area" is None when several areas are mentioned, since
+    it isn't clear which one is the house (e.g. "a 10m² kitchen in a 500m² house").
+    """
+    lowered = text.lower()
+
+    dimensions = None
+    match = _DIMENSIONS_RE.search(lowered)
+    if match:
+        dimensions = (_to_float(match.group(1)), _to_float(match.group(2)))
+
+    areas = [_to_float(value) for value in _AREA_RE.findall(lowered)]
+    area = None
+    if len(areas) == 1:
+        area = areas[0]
+    elif not areas and dimensions:
+        area = dimensions[0] * dimensions[1]
+
+    room_counts = {}
+    for count, room_type in _ROOM_COUNT_RE.findall(lowered):
+        count = int(count) if count.isdigit() else NUMBER_WORDS[count.lower()]
+        name = ROOM_TYPES[room_type.lower()]
+        room_counts[name] = room_counts.get(name, 0) + count
+
+    return {
+        "area": area,
+        "areas": areas,
+        "dimensions": dimensions,
+        "room_counts": room_counts,
+        "residential": _contains_keyword(lowered, RESIDENTIAL_KEYWORDS),
+        "non_residential": _contains_keyword(lowered, NON_RESIDENTIAL_KEYWORDS),
+    }
+
+
+def prevalidate_request(text: str):
+    """Decide whether a request is REASONABLE or UNREASONABLE without an LLM.
+
+    Returns a (verdict, reason) tuple. The verdict is None when the request
+    can't be classified confidently and should go to the LLM validator.
+    """
+    parsed = parse_request(text)
+    area = parsed["area"]
+    room_counts = parsed["room_counts"]
+    total_rooms = sum(room_counts.values())
+
+    if parsed["non_residential"]:
+        if not parsed["residential"]:
+            return UNREASONABLE, "non-residential building requested"
+        return None, "mixes residential and non-residential keywords"
+
+    for name, count in room_counts.items():
+        if count >= MAX_ROOMS_PER_TYPE:
+            return UNREASONABLE, f"{count} × {name} is an impossible quantity"
+
+    if len(parsed["areas"]) > 1:
+        return None, "several areas mentioned"
+
+    if area is not None and area <= 0:
+        return UNREASONABLE, "house area must be positive"
+
+    if area is not None and total_rooms:
+        area_per_room = area / total_rooms
+        if area_per_room < MIN_AREA_PER_ROOM:
+            return UNREASONABLE, f"{total_rooms} rooms in {area:g}m² leaves {area_per_room:.1f}m² per room"
+        if area_per_room < COMFORTABLE_AREA_PER_ROOM:
+            return None, f"tight density of {area_per_room:.1f}m² per room"
+
+    if any(count > TYPICAL_ROOMS_PER_TYPE for count in room_counts.values()):
+        return None, "unusually high room count"
+
+    if area is None and not room_counts and not parsed["residential"]:
+        return None, "no size, rooms or residential keywords found"
+
+    return REASONABLE, "normal residential request"
+
+
+# Thresholds mirroring ALLOCATION_VALIDATION_TEMPLATE and ROOM_ALLOCATION_TEMPLATE
+MIN_ROOM_AREA = 1.0               # m², anything smaller is impossible
+MAX_ROOMS_OF_ONE_TYPE = 10
+MAX_AREA_RATIO = 2.0              # total room area vs house area
+MAX_SERVICE_TYPE_SHARE = 0.9      # one service type, e.g. "90% bathrooms"
+SERVICE_SHARE_WARNING = 0.5       # bathrooms, hallways and storage combined
+PROPORTION_TOLERANCE = 0.01
+MIN_PREFERRED_ROOM_AREA = 5.0     # hallways are exempt
+SERVICE_ROOM_TYPES = ("Bathroom", "Hallway", "Storage", "Utility")
+
+
+_DIGITS = str.maketrans("", "", "0123456789")
+_ROOM_NUMBER_RE = re.compile(r"(\d+)\s*$")
+
+
+def room_type(name: str) -> str:
+    """Base room type of a numbered room, e.g. 'Bathroom 2' -> 'Bathroom'."""
+    return name.translate(_DIGITS).strip()
+
+
+def room_number(name: str) -> str | None:
+    """Trailing number of a room name, e.g. 'Bedroom 2' -> '2'."""
+    match = _ROOM_NUMBER_RE.search(name)
+    return match.group(1) if match else None
+
+
+def validate_floor_plan(plan: FloorPlan) -> AllocationReport:
+    """Check a room allocation against the allocation validation rules.
+
+    Critical problems from ALLOCATION_VALIDATION_TEMPLATE are reported as
+    errors; violations of the allocation prompt's own softer rules
+    (proportions summing to 1, 5 m² minimum) and service rooms taking over
+    half the floor area are reported as warnings.
+    """
+    issues = []
+    total_room_area = sum(room.area for room in plan.rooms)
+
+    tiny = [room.name for room in plan.rooms if room.area < MIN_ROOM_AREA]
+    if tiny:
+        issues.append(ValidationIssue(
+            rule="min_room_area", severity="error", rooms=tiny,
+            message=f"{len(tiny)} room(s) smaller than {MIN_ROOM_AREA:g}m²",
+        ))
+
+    rooms_by_type = {}
+    area_by_type = {}
+    for room in plan.rooms:
+        base = room_type(room.name)
+        rooms_by_type.setdefault(base, []).append(room.name)
+        area_by_type[base] = area_by_type.get(base, 0) + room.area
+
+    for base, names in rooms_by_type.items():
+        if len(names) > MAX_ROOMS_OF_ONE_TYPE:
+            issues.append(ValidationIssue(
+                rule="max_rooms_per_type", severity="error", rooms=names,
+                message=f"{len(names)} rooms of type '{base}' (max {MAX_ROOMS_OF_ONE_TYPE})",
+            ))
+
+    if plan.total_area > 0 and total_room_area > 0:
+        ratio = total_room_area / plan.total_area
+        if ratio >= MAX_AREA_RATIO or ratio <= 1 / MAX_AREA_RATIO:
+            issues.append(ValidationIssue(
+                rule="total_area_mismatch", severity="error",
+                message=f"Total room area {total_room_area:.1f}m² vs house area {plan.total_area:g}m²",
+            ))
+
+        for base in SERVICE_ROOM_TYPES:
+            share = area_by_type.get(base, 0) / total_room_area
+            if share >= MAX_SERVICE_TYPE_SHARE:
+                issues.append(ValidationIssue(
+                    rule="distribution_skew", severity="error", rooms=rooms_by_type[base],
+                    message=f"Rooms of type '{base}' take {share:.0%} of the floor area",
+                ))
+
+        service_area = sum(area_by_type.get(base, 0) for base in SERVICE_ROOM_TYPES)
+        if service_area / total_room_area > SERVICE_SHARE_WARNING:
+            issues.append(ValidationIssue(
+                rule="service_share", severity="warning",
+                rooms=[name for base in SERVICE_ROOM_TYPES for name in rooms_by_type.get(base, [])],
+                message=f"Bathrooms, hallways and storage take {service_area / total_room_area:.0%} of the floor area",
+            ))
+
+    proportion_sum = sum(room.proportion for room in plan.rooms)
+    if abs(proportion_sum - 1.0) > PROPORTION_TOLERANCE:
+        issues.append(ValidationIssue(
+            rule="proportion_sum", severity="warning",
+            message=f"Room proportions sum to {proportion_sum:.3f} instead of 1.0",
+        ))
+
+    small = [
+        room.name for room in plan.rooms
+        if MIN_ROOM_AREA <= room.area < MIN_PREFERRED_ROOM_AREA and room_type(room.name) != "Hallway"
+    ]
+    if small:
+        issues.append(ValidationIssue(
+            rule="min_preferred_room_area", severity="warning", rooms=small,
+            message=f"{len(small)} room(s) below the {MIN_PREFERRED_ROOM_AREA:g}m² minimum",
+        ))
+
+    return AllocationReport(
+        valid=not any(issue.severity == "error" for issue in issues),
+        total_room_area=total_room_area,
+        issues=issues,
+    )
+
+
+# Tolerances for layout validation
+MIN_COVERAGE = 0.95               # below this the layout leaves noticeable unused area
+AREA_MISMATCH_TOLERANCE = 0.05    # relative difference between area and width*height
+
+
+_PAIR_ROOM_RE = re.compile(r"\s*(Bedroom|Bathroom)\s*(\d+)\s*$")
+
+
+def bathroom_bedroom_pairs(rooms) -> list:
+    """(bathroom index, bedroom index) for every 'Bathroom N' with a 'Bedroom N', in one pass over the names."""
+    bedrooms, bathrooms = {}, []
+    pair_match = _PAIR_ROOM_RE.match
+    for i, room in enumerate(rooms):
+        match = pair_match(room.name)
+        if match is None:
+            continue
+        kind, number = match.groups()
+        if kind == "Bedroom":
+            bedrooms[number] = i
+        else:
+            bathrooms.append((i, number))
+    return [(i, bedrooms[number]) for i, number in bathrooms if number in bedrooms]
+
+
+def ensuite_pairs(rooms) -> dict:
+    """Map each ensuite bathroom index to its bedroom index.
+
+    'Bathroom N' is the ensuite of 'Bedroom N' when the two share a wall;
+    any other bathroom is a guest bathroom. The door planner and the plan
+    validator both use this definition.
+    """
+    return {i: bedroom for i, bedroom in bathroom_bedroom_pairs(rooms) if shares_wall(rooms[i], rooms[bedroom])}
+
+
+def detached_ensuite_bathrooms(rooms, boxes=None) -> list:
+    """Names of ensuite bathrooms ('Bathroom N' with a 'Bedroom N') not sharing a wall with their bedroom.
+
+    Only the numbered pairs are checked, so no wall index of the whole layout
+    is built. boxes are the rooms' room_boxes(), when the caller has them.
+    """
+    if boxes is None:
+        boxes = room_boxes(rooms)
+    return [
+        rooms[i].name for i, bedroom in bathroom_bedroom_pairs(rooms)
+        if not boxes_share_wall(boxes[i], boxes[bedroom])
+    ]
+
+
+def validate_layout(layout: LayoutPlan) -> LayoutReport:
+    """Check a room layout for overlaps, rooms outside the house and unused area.
+
+    Overlaps, out-of-bounds rooms and ensuite bathrooms that don't share a
+    wall with their bedroom are errors; low coverage and rooms whose stated
+    area doesn't match their rectangle are warnings.
+    """
+    rooms = layout.rooms
+    width, height = layout.width, layout.height
+    footprint = width * height
+    issues = []
+    # Coordinates are read from the models once and shared by every check
+    boxes = room_boxes(rooms)
+
+    overlaps = [
+        RoomOverlap(rooms=[rooms[i].name, rooms[j].name], area=round(area, 2))
+        for i, j, area in find_box_overlaps(boxes)
+    ]
+    for overlap in overlaps:
+        issues.append(ValidationIssue(
+            rule="overlap", severity="error", rooms=overlap.rooms,
+            message=f"{overlap.rooms[0]} overlaps {overlap.rooms[1]} by {overlap.area:g}m²",
+        ))
+
+    # One pass over the rooms for the per-room checks
+    out_of_bounds, area_mismatches = [], {}
+    rect_total = 0.0
+    min_edge, max_x, max_y = -EPSILON, width + EPSILON, height + EPSILON
+    for room, (x0, y0, x1, y1) in zip(rooms, boxes):
+        rect_area = room.width * room.height
+        rect_total += rect_area
+        if x0 < min_edge or y0 < min_edge or x1 > max_x or y1 > max_y:
+            out_of_bounds.append(room.name)
+        area = room.area
+        if rect_area > 0:
+            if abs(area - rect_area) > AREA_MISMATCH_TOLERANCE * rect_area:
+                area_mismatches[room.name] = round(abs(area - rect_area) / rect_area, 3)
+        else:
+            area_mismatches[room.name] = float("inf")
+
+    if out_of_bounds:
+        issues.append(ValidationIssue(
+            rule="out_of_bounds", severity="error", rooms=out_of_bounds,
+            message=f"{len(out_of_bounds)} room(s) extend beyond the {width}m x {height}m boundary",
+        ))
+
+    detached_ensuites = detached_ensuite_bathrooms(rooms, boxes)
+    if detached_ensuites:
+        issues.append(ValidationIssue(
+            rule="ensuite_adjacency", severity="error", rooms=detached_ensuites,
+            message=f"{len(detached_ensuites)} ensuite bathroom(s) don't share a wall with their bedroom",
+        ))
+
+    # Without overlaps the union is just the sum of the (clipped) rooms
+    if overlaps:
+        covered = union_area(rooms, width, height)
+    elif out_of_bounds:
+        covered = sum(clip_area(room, width, height) for room in rooms)
+    else:
+        covered = rect_total
+    coverage = covered / footprint if footprint > 0 else 0.0
+    if coverage < MIN_COVERAGE:
+        issues.append(ValidationIssue(
+            rule="coverage", severity="warning",
+            message=f"Rooms cover only {coverage:.0%} of the house footprint",
+        ))
+
+    if area_mismatches:
+        issues.append(ValidationIssue(
+            rule="area_mismatch", severity="warning", rooms=list(area_mismatches),
+            message=f"{len(area_mismatches)} room(s) have an area that doesn't match width x height",
+        ))
+
+    return LayoutReport(
+        valid=not overlaps and not out_of_bounds and not detached_ensuites,
+        coverage=round(coverage, 4),
+        overlaps=overlaps,
+        out_of_bounds=out_of_bounds,
+        detached_ensuites=detached_ensuites,
+        area_mismatches=area_mismatches,
+        issues=issues,
+    )
+
+
+# Weights of the layout score used to pick the best of several candidate layouts
+OVERLAP_PENALTY = 2.0             # per fraction of the footprint covered by overlaps
+OUT_OF_BOUNDS_PENALTY = 0.2       # per room extending beyond the house
+DETACHED_ENSUITE_PENALTY = 0.2    # per ensuite bathroom away from its bedroom
+AREA_MISMATCH_PENALTY = 0.05      # per room whose area doesn't match its rectangle
+MAX_ROOM_ASPECT = 3.0             # longest/shortest side above which a room is penalised
+ASPECT_PENALTY = 0.02             # per unit of aspect ratio above MAX_ROOM_ASPECT
+
+
+def score_layout(layout: LayoutPlan, report: LayoutReport | None = None) -> float:
+    """Score a layout for best-of-N selection; higher is better.
+
+    Starts from the covered fraction of the footprint (1.0 for a perfect
+    tiling) and subtracts penalties for overlaps, out-of-bounds rooms,
+    detached ensuites, area mismatches and elongated rooms. Hallways may be
+    as narrow as they like.
+    """
+    report = report or validate_layout(layout)
+    footprint = layout.width * layout.height
+    score = min(report.coverage, 1.0)
+
+    if footprint > 0:
+        score -= OVERLAP_PENALTY * sum(overlap.area for overlap in report.overlaps) / footprint
+    score -= OUT_OF_BOUNDS_PENALTY * len(report.out_of_bounds)
+    score -= DETACHED_ENSUITE_PENALTY * len(report.detached_ensuites)
+    score -= AREA_MISMATCH_PENALTY * len(report.area_mismatches)
+
+    for room in layout.rooms:
+        if room_type(room.name) == "Hallway" or room.width <= 0 or room.height <= 0:
+            continue
+        aspect = max(room.width / room.height, room.height / room.width)
+        if aspect > MAX_ROOM_ASPECT:
+            score -= ASPECT_PENALTY * (aspect - MAX_ROOM_ASPECT)
+
+    return round(score, 4)
+
+
+DOOR_WALL_TOLERANCE = 0.3         # m a door centre may sit off its wall line
+
+
+def _door_on_wall(door, wall) -> bool:
+    cx = door.x + door.width / 2
+    cy = door.y + door.height / 2
+    across, along = (cx, cy) if wall.orientation == "vertical" else (cy, cx)
+    return (
+        abs(across - wall.position) <= DOOR_WALL_TOLERANCE
+        and wall.start - EPSILON <= along <= wall.end + EPSILON
+    )
+
+
+def validate_doors(layout: LayoutPlan, door_plan: DoorPlan) -> PlanReport:
+    """Check door placement and connectivity for a layout.
+
+    Every door must sit on a wall shared by its two rooms (or on the house
+    boundary for doors to the Outside), every room must be reachable from
+    the Living Room without passing through a bathroom, and ensuite
+    bathrooms (see ensuite_pairs) may only open onto their bedroom. Runs in
+    time linear in the number of doors once the shared wall index is built.
+    """
+    rooms = layout.rooms
+    index = {room.name: i for i, room in enumerate(rooms)}
+    walls = {
+        frozenset((rooms[i].name, rooms[j].name)): wall
+        for (i, j), wall in shared_walls(rooms).items()
+    }
+    ensuites = {rooms[i].name: rooms[bedroom].name for i, bedroom in ensuite_pairs(rooms).items()}
+    issues = []
+
+    invalid_doors = []
+    door_graph = {room.name: set() for room in rooms}
+    ensuite_links = {}
+    for door in door_plan.doors:
+        label = f"{door.from_room} -> {door.to_room}"
+        names = {door.from_room, door.to_room}
+        if OUTSIDE in names:
+            inside = next((name for name in names if name != OUTSIDE), None)
+            candidates = exterior_walls(rooms[index[inside]], layout.width, layout.height) if inside in index else []
+        else:
+            wall = walls.get(frozenset(names))
+            candidates = [wall] if wall else []
+            if door.from_room in door_graph and door.to_room in door_graph:
+                door_graph[door.from_room].add(door.to_room)
+                door_graph[door.to_room].add(door.from_room)
+
+        if not any(_door_on_wall(door, wall) for wall in candidates):
+            invalid_doors.append(label)
+
+        for name, other in ((door.from_room, door.to_room), (door.to_room, door.from_room)):
+            if name in ensuites:
+                ensuite_links.setdefault(name, set()).add(other)
+
+    if invalid_doors:
+        issues.append(ValidationIssue(
+            rule="door_placement", severity="error", rooms=invalid_doors,
+            message=f"{len(invalid_doors)} door(s) not on a wall shared by their rooms",
+        ))
+
+    ensuite_violations = sorted(
+        name for name, others in ensuite_links.items()
+        if others - {ensuites[name]}
+    )
+    if ensuite_violations:
+        issues.append(ValidationIssue(
+            rule="ensuite_access", severity="error", rooms=ensuite_violations,
+            message=f"{len(ensuite_violations)} ensuite bathroom(s) open onto rooms other than their bedroom",
+        ))
+
+    entrance = next((room.name for room in rooms if room_type(room.name) == "Living Room"), None)
+    if entrance is None and rooms:
+        entrance = max(rooms, key=lambda room: room.width * room.height).name
+    reached = {entrance} if entrance else set()
+    queue = deque(reached)
+    while queue:
+        name = queue.popleft()
+        if room_type(name) == "Bathroom" and name != entrance:
+            continue  # bathrooms are dead ends
+        for neighbour in door_graph[name]:
+            if neighbour not in reached:
+                reached.add(neighbour)
+                queue.append(neighbour)
+    unreachable_rooms = [room.name for room in rooms if room.name not in reached]
+    if unreachable_rooms:
+        issues.append(ValidationIssue(
+            rule="reachability", severity="error", rooms=unreachable_rooms,
+            message=f"{len(unreachable_rooms)} room(s) can't be reached from the {entrance}",
+        ))
+
+    return PlanReport(
+        valid=not issues,
+        invalid_doors=invalid_doors,
+        unreachable_rooms=unreachable_rooms,
+        ensuite_violations=ensuite_violations,
+        issues=issues,
+    )